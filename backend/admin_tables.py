@@ -0,0 +1,256 @@
+import csv
+import io
+import json
+import math
+
+from queries import keyword_conditions, encode_key_cursor, decode_key_cursor
+
+# --- 관리자 화면 테이블 (페이지 조회 / 일괄 등록 / 일괄 삭제) ---
+# 관리 대상 테이블마다 목록 컬럼, 정렬 가능한 컬럼, 검색 컬럼(FTS 인덱스), 일괄 등록 필드를 정의한다.
+# 목록은 서버에서 검색/정렬/페이지를 나눠 한 번에 ADMIN_PAGE_SIZE 행만 읽는다.
+# 페이지는 OFFSET 대신 (정렬값, PK) 커서로 넘기고(이전/다음), 전체 건수는 ADMIN_COUNT_LIMIT 까지만 센다.
+
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+ADMIN_COUNT_LIMIT = 10000   # 이보다 많으면 "10,000+건" 으로만 표시 (페이지마다 전체를 세지 않음)
+BULK_MAX_ROWS = 50000       # 한 번에 올릴 수 있는 행 수
+BULK_MAX_ERRORS = 20        # 화면에 보여줄 검증 오류 수
+
+
+def text(value):
+    return value.strip() or None
+
+def required_text(value):
+    value = value.strip()
+    if not value:
+        raise ValueError("필수 값입니다")
+    return value
+
+def ymd(value):
+    """YYYY-MM-DD / YYYYMMDD -> YYYYMMDD (ETL 과 같은 형식)"""
+    digits = value.strip().replace('-', '').replace('.', '').replace('/', '')
+    if len(digits) != 8 or not digits.isdigit():
+        raise ValueError("날짜 형식은 YYYY-MM-DD 또는 YYYYMMDD 입니다")
+    return digits
+
+def optional_int(value):
+    value = value.strip()
+    return int(value) if value else None
+
+def coordinate(value):
+    value = value.strip()
+    if not value:
+        return 0  # 관리자 단건 추가와 같이 좌표 없음은 0 (R*Tree 에 넣지 않음)
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError("숫자가 아닙니다")
+    return number
+
+def image_url(value):
+    value = value.strip()
+    if value and not value.startswith(('http://', 'https://')):
+        raise ValueError("http:// 또는 https:// 주소여야 합니다")
+    return value or None
+
+def region(value):
+    return value.strip() or '기타'
+
+
+# kind -> 설정
+#   columns : 목록에 보여줄 (컬럼, 제목)
+#   sorts   : 정렬할 수 있는 목록 컬럼 -> ORDER BY 컬럼 (PK 를 두 번째 키로 붙임)
+#   fts     : 키워드 검색용 FTS5 테이블 (두 글자 단어는 같은 이름의 _bigram 인덱스, 한 글자 단어는 search 컬럼 LIKE)
+#   fields  : 일괄 등록 필드 (컬럼, 제목, 변환 함수)
+ADMIN_TABLES = {
+    'animal': {
+        'label': '유기동물', 'table': 'animal_status', 'pk': 'animal_id', 'fts': 'animal_fts',
+        'columns': [('animal_id', 'ID'), ('breed', '품종'), ('gender', '성별'), ('region', '지역'),
+                    ('shelter_name', '보호소'), ('register_date', '공고 시작'), ('register_end_date', '공고 종료')],
+        'sorts': {'register_date': 'register_ymd', 'register_end_date': 'register_end_ymd', 'region': 'region',
+                  'breed': 'breed', 'animal_id': 'animal_id'},
+        'default_sort': ('register_date', 'desc'),
+        'search': ['breed', 'shelter_name'],
+        'fields': [('breed', '품종', required_text), ('gender', '성별', text), ('weight', '체중', text),
+                   ('years', '나이', text), ('color', '색상', text), ('region', '지역', text),
+                   ('shelter_name', '보호소', text), ('register_date', '공고 시작', ymd),
+                   ('register_end_date', '공고 종료', ymd), ('image_url', '이미지', image_url)],
+    },
+    'shelter': {
+        'label': '보호소', 'table': 'shelter_final', 'pk': 'shelter_id', 'fts': 'shelter_fts',
+        'columns': [('shelter_id', 'ID'), ('name', '이름'), ('phone', '전화번호'), ('address', '주소'), ('capacity', '수용능력')],
+        'sorts': {'name': 'name', 'shelter_id': 'shelter_id'},
+        'default_sort': ('name', 'asc'),
+        'search': ['name', 'address'],
+        'fields': [('name', '이름', required_text), ('phone', '전화번호', text), ('address', '주소', text),
+                   ('capacity', '수용능력', optional_int)],
+    },
+    'hospital': {
+        'label': '동물병원', 'table': 'hospital_final', 'pk': 'hospital_id', 'fts': 'hospital_fts',
+        'columns': [('hospital_id', 'ID'), ('name', '이름'), ('phone', '전화번호'), ('address', '주소'), ('region', '지역')],
+        'sorts': {'name': 'name', 'region': 'region', 'hospital_id': 'hospital_id'},
+        'default_sort': ('name', 'asc'),
+        'search': ['name', 'address'],
+        'fields': [('name', '이름', required_text), ('phone', '전화번호', text), ('address', '주소', text),
+                   ('region', '지역', region), ('lat', '위도', coordinate), ('lon', '경도', coordinate)],
+    },
+    'pharmacy': {
+        'label': '동물약국', 'table': 'pharmacy_final', 'pk': 'pharmacy_id', 'fts': 'pharmacy_fts',
+        'columns': [('pharmacy_id', 'ID'), ('name', '이름'), ('phone', '전화번호'), ('address', '주소'), ('region', '지역')],
+        'sorts': {'name': 'name', 'region': 'region', 'pharmacy_id': 'pharmacy_id'},
+        'default_sort': ('name', 'asc'),
+        'search': ['name', 'address'],
+        'fields': [('name', '이름', required_text), ('phone', '전화번호', text), ('address', '주소', text),
+                   ('region', '지역', region), ('lat', '위도', coordinate), ('lon', '경도', coordinate)],
+    },
+}
+
+# 회원 목록 (user_data.db, 일괄 등록/삭제 없음 - 삭제/강등은 세션 무효화가 필요해서 한 명씩)
+USER_TABLE = {
+    'label': '회원', 'table': 'users', 'pk': 'id', 'fts': None,
+    'columns': [('id', 'ID'), ('email', '이메일'), ('name', '이름'), ('is_admin', '관리자'), ('created_at', '가입일')],
+    'sorts': {'id': 'id', 'name': 'name', 'email': 'email'},
+    'default_sort': ('id', 'desc'),
+    'search': ['email', 'name'],
+}
+
+
+# --- 목록 조회 ---
+def get_grid_args(spec, args):
+    """쿼리스트링에서 (검색어, 정렬, 방향, 페이지 번호(표시용), 페이지 크기, 이전/다음 커서)"""
+    sort = args.get('sort', spec['default_sort'][0])
+    if sort not in spec['sorts']:
+        sort = spec['default_sort'][0]
+    direction = args.get('dir', spec['default_sort'][1])
+    if direction not in ('asc', 'desc'):
+        direction = 'asc'
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except ValueError:
+        page = 1
+    try:
+        page_size = max(1, min(int(args.get('page_size', ADMIN_PAGE_SIZE)), ADMIN_MAX_PAGE_SIZE))
+    except ValueError:
+        page_size = ADMIN_PAGE_SIZE
+    return {'q': args.get('q', '').strip(), 'sort': sort, 'dir': direction, 'page': page, 'page_size': page_size,
+            'after': decode_key_cursor(args.get('after', '')), 'before': decode_key_cursor(args.get('before', ''))}
+
+
+def build_grid_where(spec, keyword):
+    if not keyword:
+        return "", []
+    if not spec.get('fts'):
+        likes = ' OR '.join(f"{col} LIKE ?" for col in spec['search'])
+        return f" WHERE ({likes})", [f'%{keyword}%'] * len(spec['search'])
+    conditions, params = keyword_conditions(keyword, spec['pk'], spec['fts'], spec['search'])
+    return (" WHERE " + " AND ".join(conditions), params) if conditions else ("", [])
+
+
+def keyset_condition(order, pk, direction, cursor):
+    """direction 순서로 커서(정렬값, PK) 다음에 오는 행 조건. SQLite 는 NULL 을 가장 작은 값으로 정렬함"""
+    value, key = cursor
+    if direction == 'ASC':
+        if value is None:
+            return f"({order} IS NOT NULL OR {pk} > ?)", [key]
+        return f"({order}, {pk}) > (?, ?)", [value, key]
+    if value is None:
+        return f"({order} IS NULL AND {pk} < ?)", [key]
+    return f"(({order}, {pk}) < (?, ?) OR {order} IS NULL)", [value, key]
+
+
+def count_rows(conn, spec, where, params):
+    """조건에 맞는 행 수. ADMIN_COUNT_LIMIT 를 넘으면 ADMIN_COUNT_LIMIT + 1 에서 멈춤"""
+    sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM {spec['table']}{where} LIMIT ?)"
+    return conn.execute(sql, params + [ADMIN_COUNT_LIMIT + 1]).fetchone()[0]
+
+
+def fetch_grid_page(conn, spec, grid):
+    """(행 목록, 전체 건수, 페이지 정보 {'prev', 'next': 커서 또는 None, 'more': 건수가 상한을 넘었는지})"""
+    where, params = build_grid_where(spec, grid['q'])
+    total = count_rows(conn, spec, where, params)
+    order, pk = spec['sorts'][grid['sort']], spec['pk']
+    direction = 'DESC' if grid['dir'] == 'desc' else 'ASC'
+    backward = grid['before'] is not None and grid['after'] is None
+    if backward:  # 이전 페이지: 반대 방향으로 읽어서 뒤집음
+        direction = 'ASC' if direction == 'DESC' else 'DESC'
+    cursor = grid['before'] if backward else grid['after']
+    if cursor is not None:
+        condition, cursor_params = keyset_condition(order, pk, direction, cursor)
+        where = f"{where} AND {condition}" if where else f" WHERE {condition}"
+        params = params + cursor_params
+    columns = ', '.join(col for col, _ in spec['columns'])
+    sql = (f"SELECT {columns}, {order} AS sort_key, {pk} AS sort_pk FROM {spec['table']}{where} "
+           f"ORDER BY {order} {direction}, {pk} {direction} LIMIT ?")
+    rows = conn.execute(sql, params + [grid['page_size'] + 1]).fetchall()
+    more = len(rows) > grid['page_size']
+    rows = rows[:grid['page_size']]
+    if backward:
+        rows.reverse()
+    has_prev = more if backward else cursor is not None
+    has_next = cursor is not None if backward else more
+    pager = {
+        'prev': encode_key_cursor((rows[0]['sort_key'], rows[0]['sort_pk'])) if rows and has_prev else None,
+        'next': encode_key_cursor((rows[-1]['sort_key'], rows[-1]['sort_pk'])) if rows and has_next else None,
+        'more': total > ADMIN_COUNT_LIMIT,
+    }
+    return rows, min(total, ADMIN_COUNT_LIMIT), pager
+
+
+# --- 일괄 삭제 ---
+def parse_ids(values):
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def delete_rows(conn, spec, ids):
+    """선택한 PK 들을 한 문장으로 삭제 (트랜잭션은 호출한 쪽에서 커밋). 삭제 건수 반환"""
+    if not ids:
+        return 0
+    return conn.execute(f"DELETE FROM {spec['table']} WHERE {spec['pk']} IN (SELECT value FROM json_each(?))",
+                        (json.dumps(ids),)).rowcount
+
+
+# --- 일괄 등록 (CSV / JSON) ---
+def read_upload(filename, data):
+    """업로드 파일 -> dict 행 목록. CSV 는 첫 줄이 헤더, JSON 은 객체 배열"""
+    if filename.lower().endswith('.json'):
+        rows = json.loads(data.decode('utf-8-sig'))
+        if isinstance(rows, dict):
+            rows = rows.get('rows', [])
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("JSON 은 객체 배열이어야 합니다")
+        return rows
+    return list(csv.DictReader(io.StringIO(data.decode('utf-8-sig'))))
+
+
+def validate_rows(spec, rows):
+    """(INSERT 값 튜플 목록, 오류 목록). 헤더는 컬럼명 또는 화면 제목 모두 허용"""
+    if len(rows) > BULK_MAX_ROWS:
+        return [], [f"한 번에 {BULK_MAX_ROWS}행까지 등록할 수 있습니다 (업로드 {len(rows)}행)"]
+    values, errors = [], []
+    for line, row in enumerate(rows, start=2):  # CSV 기준 줄 번호 (1줄은 헤더)
+        item = []
+        for col, label, convert in spec['fields']:
+            raw = row.get(col, row.get(label))
+            try:
+                item.append(convert('' if raw is None else str(raw)))
+            except ValueError as e:
+                errors.append(f"{line}행 {label}: {e}")
+                break
+        else:
+            values.append(tuple(item))
+        if len(errors) >= BULK_MAX_ERRORS:
+            break
+    return values, errors
+
+
+def insert_rows(conn, spec, values):
+    """검증된 값을 executemany 로 한 번에 삽입 (트랜잭션은 호출한 쪽에서 커밋)"""
+    columns = [col for col, _, _ in spec['fields']]
+    placeholders = ', '.join('?' * len(columns))
+    conn.executemany(f"INSERT INTO {spec['table']} ({', '.join(columns)}) VALUES ({placeholders})", values)
+    return len(values)
@@ -1,25 +1,286 @@
 import sqlite3
+import csv
 import os
-from flask import Flask, render_template, send_from_directory, jsonify, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+import time
+import hashlib
+from flask import Flask, render_template, send_from_directory, jsonify, request, redirect, url_for, session, flash, g, make_response, send_file, abort
 from functools import wraps
+from jinja2 import FileSystemBytecodeCache
+from db import SQLitePool, AnimalDBSwitch, resolve_animal_db, db_file, animal_db_builder, begin_animal_write, get_data_version, bump_data_version, BASE_DIR, ANIMAL_DB_PATH, USER_DB_PATH, ANIMAL_DB_PRAGMAS, ANIMAL_WRITE_DB_PRAGMAS, USER_DB_PRAGMAS
+from cache import LRUCache
+from admin_tables import (
+    ADMIN_TABLES, USER_TABLE, get_grid_args, fetch_grid_page, parse_ids, delete_rows,
+    read_upload, validate_rows, insert_rows,
+)
+from sessions import SessionStore, SQLiteSessionInterface
+from favorites import FavoriteCache, FAVORITE_CACHE_MAX_ENTRIES, bump_favorite_version
+from passwords import hash_password, verify_password, verify_dummy, prepare_dummy_hash, needs_rehash, PasswordBusy, LoginRateLimiter
+from profiling import Profiler, unwrap, prometheus_values
+import catalog
+import thumbnails
+from thumbnails import ThumbnailCache, ThumbnailError, THUMB_SIZES, THUMB_MAX_AGE
+from assets import AssetManifest, ASSET_MAX_AGE, asset_mimetype
+import lifecycle
+import recommend
+from queries import (
+    ANIMAL_PAGE_SIZE, ENDING_DAYS_CHOICES, get_animal_filters, get_page_size, decode_cursor, fetch_animal_page,
+    build_hospital_query, build_shelter_query, parse_nearby_args, find_nearby_facilities, fetch_animal_detail,
+)
 
 app = Flask(__name__, template_folder='frontend_test', static_folder='frontend_test')
-app.secret_key = 'super_secret_key_for_petmatch_prince_minjae'
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ANIMAL_DB_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'animal_data.db')
-USER_DB_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'user_data.db')
+# 세션은 서버에 저장하므로(sessions.py) 비밀 키는 flash 등 서명이 필요한 곳에만 쓰인다. 운영 환경에서는 환경변수로 지정
+app.secret_key = os.environ.get('PETMATCH_SECRET_KEY', 'super_secret_key_for_petmatch_prince_minjae')
+
+# --- 실행 설정 ---
+# 기본은 운영 설정. 개발할 때만 PETMATCH_DEBUG=1 (자동 재시작, 템플릿 다시 읽기, 빌드하지 않은 원본 CSS 사용)
+DEBUG = os.environ.get('PETMATCH_DEBUG') == '1'
+app.config['TEMPLATES_AUTO_RELOAD'] = DEBUG
+# 컴파일한 템플릿을 디스크에 저장해 두고 워커가 새로 뜰 때 다시 파싱하지 않는다. (원본이 바뀌면 다시 컴파일)
+JINJA_CACHE_DIR = os.environ.get('PETMATCH_JINJA_CACHE', os.path.join(BASE_DIR, '..', 'data', 'processed', 'jinja_cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+# CSS/JS 는 assets.py 로 빌드한 해시 이름 + 압축본을 사용 (빌드가 없으면 원본)
+asset_manifest = AssetManifest(enabled=not DEBUG)
+
+
+# --- DB 연결 (요청 단위로 풀에서 빌려 쓰고, 요청이 끝나면 반납) ---
+# 조회용 동물 DB는 읽기 전용, 관리자 수정은 별도의 쓰기용 연결을 사용한다.
+# 동물 DB 는 ETL 이 새 버전 파일로 교체할 수 있으므로 포인터가 가리키는 파일을 연다. (db.py 의 AnimalDBSwitch)
+db_pools = {
+    # 마이페이지에서 찜 목록과 동물 정보를 한 번에 JOIN 하도록 회원 DB를 user_db 로 붙여 둔다
+    'animal_db': SQLitePool(resolve_animal_db(), ANIMAL_DB_PRAGMAS, read_only=True, attach={'user_db': USER_DB_PATH}),
+    'animal_write_db': SQLitePool(resolve_animal_db(), ANIMAL_WRITE_DB_PRAGMAS, max_idle=1),
+    'user_db': SQLitePool(USER_DB_PATH, USER_DB_PRAGMAS),
+}
+
+# 로그인 세션은 user_data.db 의 sessions 테이블에 저장하고 쿠키에는 토큰만 담는다
+session_store = SessionStore(db_pools['user_db'], USER_DB_PATH + '.sessions.log')
+app.session_interface = SQLiteSessionInterface(session_store)
+
+# 요청/SQL 프로파일링 (PETMATCH_PROFILE=1 일 때만, 꺼져 있으면 아무 훅도 설치하지 않음)
+profiler = Profiler() if os.environ.get('PETMATCH_PROFILE') == '1' else None
+if profiler:
+    profiler.init_app(app)
+
+def _get_pooled_db(name):
+    if name not in g:
+        conn = db_pools[name].acquire()
+        setattr(g, name, profiler.wrap(conn) if profiler else conn)
+    return getattr(g, name)
 
 def get_animal_db():
-    conn = sqlite3.connect(ANIMAL_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _get_pooled_db('animal_db')
+
+def get_animal_write_db():
+    if 'animal_write_db' not in g:
+        animal_db_switch.check(force=True)  # 쓰기는 TTL 을 기다리지 않고 지금 서비스 중인 파일로
+    return _get_pooled_db('animal_write_db')
 
 def get_user_db():
-    conn = sqlite3.connect(USER_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _get_pooled_db('user_db')
+
+@app.teardown_appcontext
+def release_db(exc):
+    for name, pool in db_pools.items():
+        conn = g.pop(name, None)
+        if conn is not None:
+            pool.release(unwrap(conn))
+
+# 지역 목록, 지역별 종/성별 건수는 ETL 또는 관리자 수정 때만 바뀌므로
+# meta.data_version 이 같으면 프로세스 메모리에 계산해 둔 값을 그대로 쓴다.
+_facet_cache = {'version': None, 'facets': None}
+_facet_lock = threading.Lock()
+
+def compute_facets(conn):
+    animal_rows = conn.execute("""
+        SELECT region,
+               COUNT(*) AS total,
+               SUM(species = 'dog') AS dog,
+               SUM(species = 'cat') AS cat,
+               SUM(sex = 'M') AS male,
+               SUM(sex = 'F') AS female
+        FROM animal_status
+        WHERE region IS NOT NULL AND region != ''
+        GROUP BY region ORDER BY region
+    """).fetchall()
+
+    facility_rows = conn.execute("""
+        SELECT DISTINCT region FROM hospital_final WHERE region IS NOT NULL AND region != ''
+        UNION
+        SELECT DISTINCT region FROM pharmacy_final WHERE region IS NOT NULL AND region != ''
+        ORDER BY region
+    """).fetchall()
+
+    shelter_regions = set()
+    for row in conn.execute("SELECT address FROM shelter_final WHERE address IS NOT NULL"):
+        addr = row['address'].split()
+        if len(addr) >= 2 and addr[0] == '경기도':
+            shelter_regions.add(addr[1])
+        elif len(addr) >= 1:
+            shelter_regions.add(addr[0])
+
+    return {
+        'animal_regions': [row['region'] for row in animal_rows],
+        'animal_counts': {row['region']: dict(row) for row in animal_rows},
+        'facility_regions': [row['region'] for row in facility_rows],
+        'shelter_regions': sorted(shelter_regions),
+    }
+
+def get_facets(conn):
+    version = current_data_version()
+    with _facet_lock:
+        if _facet_cache['version'] != version or _facet_cache['facets'] is None:
+            _facet_cache['facets'] = compute_facets(conn)
+            _facet_cache['version'] = version
+        return _facet_cache['facets']
+
+# --- 목록 페이지 응답 캐시 ---
+# 공개 목록 페이지(/, /animals, /hospital, /shelter)는 (라우트, 정렬된 쿼리스트링, data_version) 단위로 캐시한다.
+# - page_cache    : 비로그인 사용자용 완성된 HTML(UTF-8 바이트) + ETag (SQLite 를 전혀 거치지 않음)
+# - context_cache : 로그인 사용자용 공용 조회 결과. 찜 목록(fav_ids)만 따로 붙여서 렌더링
+# data_version 은 DATA_VERSION_TTL 초마다 한 번만 meta 테이블에서 다시 읽는다.
+# 캐시 키의 버전은 (DB 파일 이름, data_version) 이라 ETL 이 DB 파일을 바꾸면 번호가 같아도 새로 만든다.
+DATA_VERSION_TTL = 2.0
+PAGE_CACHE_MAX_ENTRIES = 256
+PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+CONTEXT_CACHE_MAX_ENTRIES = 128
+CONTEXT_CACHE_MAX_BYTES = PAGE_CACHE_MAX_BYTES
+CONTEXT_CELL_BYTES = 100  # 조회 결과 한 칸(파이썬 값 + 참조)의 대략적인 크기
+
+page_cache = LRUCache(PAGE_CACHE_MAX_ENTRIES, PAGE_CACHE_MAX_BYTES)
+context_cache = LRUCache(CONTEXT_CACHE_MAX_ENTRIES, CONTEXT_CACHE_MAX_BYTES)
+_data_version = {'value': None, 'checked_at': 0.0}
+_data_version_lock = threading.Lock()
+
+# ETL 이 포인터를 바꾸면 같은 주기로 알아채고 풀을 새 파일로 옮김 (사용 중인 요청은 끝까지 예전 파일을 읽음)
+animal_db_switch = AnimalDBSwitch([db_pools['animal_db'], db_pools['animal_write_db']], interval=DATA_VERSION_TTL,
+                                  on_switch=lambda path: expire_data_version())
+
+def current_data_version():
+    """프로세스에 보관한 data_version 반환 (TTL 이 지났을 때만 DB 확인)"""
+    now = time.monotonic()
+    with _data_version_lock:
+        if _data_version['value'] is not None and now - _data_version['checked_at'] < DATA_VERSION_TTL:
+            return _data_version['value']
+    animal_db_switch.check()
+    conn = get_animal_db()
+    version = (os.path.basename(db_file(conn)), get_data_version(conn))
+    with _data_version_lock:
+        if _data_version['value'] != version:
+            # 예전 버전 키는 다시 쓰이지 않으므로 미리 비워 메모리를 돌려받는다
+            page_cache.clear()
+            context_cache.clear()
+        _data_version['value'] = version
+        _data_version['checked_at'] = now
+    return version
+
+def expire_data_version():
+    """관리자 수정 직후 다음 요청에서 바로 새 버전을 읽도록 함"""
+    with _data_version_lock:
+        _data_version['checked_at'] = 0.0
+
+# --- 메모리 동물 카탈로그 (PETMATCH_CATALOG=1, NumPy 필요) ---
+# 키워드 없는 /animals 목록의 필터/정렬/페이지 계산을 catalog.py 의 열 배열로 처리하고,
+# SQLite 에서는 해당 페이지의 animal_id 만 PK 로 읽는다. data_version 이 바뀌면 다시 적재한다.
+CATALOG_ENABLED = os.environ.get('PETMATCH_CATALOG') == '1' and catalog.available()
+_catalog = {'version': None, 'catalog': None}
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    if not CATALOG_ENABLED:
+        return None
+    version = current_data_version()
+    with _catalog_lock:
+        if _catalog['version'] != version:
+            _catalog['catalog'] = catalog.AnimalCatalog.load(get_animal_db())
+            _catalog['version'] = version
+        return _catalog['catalog']
+
+def fetch_animals(conn, filters, cursor=None, limit=ANIMAL_PAGE_SIZE):
+    """목록 한 페이지 조회. 카탈로그가 켜져 있고 키워드/마감 필터 없이 등록일 정렬이면 카탈로그, 아니면 SQL"""
+    sql_only = filters['keyword'] or filters['ending_days'] or filters['sort'] == 'ending'
+    animal_catalog = None if sql_only else get_catalog()
+    if animal_catalog is None:
+        return fetch_animal_page(conn, filters, cursor, limit)
+    return catalog.fetch_page(animal_catalog, conn, filters, cursor, limit)
+
+# --- 사용자별 찜 목록 캐시 (favorites.py) ---
+# 찜 목록은 사용자별 버전(user_data.db)이 같을 때만 메모리 사본을 쓰므로 다른 워커에서 바꾼 찜도 바로 보인다.
+favorite_cache = FavoriteCache(db_pools['user_db'])
+
+def get_fav_ids(user_id):
+    """사용자가 찜한 animal_id 목록 (정렬된 list, 템플릿의 tojson 용)"""
+    try:
+        _, ids = favorite_cache.get(get_user_db(), user_id)
+    except sqlite3.Error:
+        return [] # 테이블이 없거나 에러나면 빈 목록
+    return sorted(ids)
+
+# 메인 화면 "찜한 친구들과 비슷한 친구들" 은 (찜 버전, data_version) 이 같으면 다시 합산하지 않는다
+recommend_cache = LRUCache(FAVORITE_CACHE_MAX_ENTRIES)  # user_id -> ((찜 버전, data_version), 추천 행)
+
+def get_recommended(user_id):
+    try:
+        fav_version, _ = favorite_cache.get(get_user_db(), user_id)
+    except sqlite3.Error:
+        return recommend.fetch_recommended(get_animal_db(), user_id)
+    version = (fav_version, current_data_version())
+    cached = recommend_cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    rows = recommend.fetch_recommended(get_animal_db(), user_id)
+    recommend_cache.set(user_id, (version, rows))
+    return rows
+
+def context_size(context):
+    """조회 결과 크기 추정 (행 수 x 컬럼 수 x 칸당 크기). /hospital 처럼 행이 수천 개인 결과도 메모리 상한 안에 두기 위함"""
+    size = 0
+    for value in context.values():
+        if isinstance(value, (list, tuple)):
+            size += sum(len(row) if isinstance(row, (sqlite3.Row, tuple, dict)) else 1 for row in value) * CONTEXT_CELL_BYTES
+        elif isinstance(value, dict):
+            size += len(value) * CONTEXT_CELL_BYTES
+        else:
+            size += CONTEXT_CELL_BYTES
+    return size
+
+def render_cached(template, build_context, fallback=None, user_context=None):
+    """build_context() 결과를 캐시해 두고 템플릿을 렌더링, ETag/304 처리까지 한 응답을 반환.
+    fallback 이 있으면 조회 오류 시 그 값으로 렌더링하고 캐시에는 넣지 않는다.
+    user_context(user_id) 는 로그인 사용자별 값(캐시하지 않음)을 더할 때 사용한다."""
+    version = current_data_version()
+    key = (request.endpoint, tuple(sorted(request.args.items(multi=True))), version)
+    anonymous = 'user_id' not in session
+
+    cached = page_cache.get(key) if anonymous else None
+    if cached:
+        body, etag = cached
+    else:
+        context = context_cache.get(key)
+        cacheable = True
+        if context is None:
+            try:
+                context = build_context()
+            except sqlite3.Error as e:
+                if fallback is None:
+                    raise
+                print(f"검색 오류: {e}")
+                context, cacheable = fallback, False
+            if cacheable:
+                context_cache.set(key, context, size=context_size(context))
+        fav_ids = [] if anonymous else get_fav_ids(session['user_id'])
+        extra = user_context(session['user_id']) if user_context and not anonymous else {}
+        # 한 번만 UTF-8 로 인코딩해서 ETag 계산, 캐시 크기(바이트), 응답 본문에 같이 쓴다 (한글은 글자당 3바이트)
+        body = render_template(template, fav_ids=fav_ids, **context, **extra).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()
+        if anonymous and cacheable:
+            page_cache.set(key, (body, etag), size=len(body))
+
+    resp = make_response(body)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache' if anonymous else 'private, no-cache'
+    return resp.make_conditional(request)
 
 def admin_required(f):
     @wraps(f)
@@ -33,183 +294,165 @@ def admin_required(f):
 @app.route('/style.css')
 def serve_css(): return send_from_directory('frontend_test', 'style.css')
 
+# --- 빌드된 정적 파일 (내용 해시 이름이라 1년 캐시, Accept-Encoding 에 맞는 압축본 전송) ---
+@app.template_global()
+def asset_url(name):
+    hashed = asset_manifest.lookup(name)
+    if hashed:
+        return url_for('serve_asset', filename=hashed)
+    return url_for('static', filename=name)
+
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    if not asset_manifest.is_built(filename):
+        abort(404)
+    encoding, path = asset_manifest.choose(filename, request.accept_encodings)
+    resp = send_file(path, mimetype=asset_mimetype(filename), max_age=ASSET_MAX_AGE, conditional=True)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
 # --- 1. 메인 홈 (찜 목록 확인 추가) ---
 @app.route('/')
 def index():
-    conn_animal = get_animal_db()
-    items = conn_animal.execute('SELECT * FROM animal_status ORDER BY register_date DESC LIMIT 4').fetchall()
-    conn_animal.close()
+    def build_context():
+        conn_animal = get_animal_db()
+        items = conn_animal.execute('SELECT * FROM animal_status ORDER BY register_ymd DESC, animal_id DESC LIMIT 4').fetchall()
+        return {'latest_animals': items}
 
-    fav_ids = []
-    if 'user_id' in session:
-        conn_user = get_user_db()
-        try:
-            rows = conn_user.execute('SELECT animal_id FROM favorites WHERE user_id = ?', (session['user_id'],)).fetchall()
-            fav_ids = [r['animal_id'] for r in rows]
-        except:
-            pass # 테이블이 없거나 에러나면 빈 목록
-        conn_user.close()
+    def user_context(user_id):
+        # 찜한 동물과 비슷한 동물 (미리 계산한 animal_similar 표 조회, 찜/데이터가 바뀔 때만 다시 합산)
+        return {'recommended_animals': get_recommended(user_id)}
 
-    return render_template('index.html', latest_animals=items, fav_ids=fav_ids)
+    return render_cached('index.html', build_context, user_context=user_context)
 
 # --- 2. 유기동물 목록 ---
 @app.route('/animals')
 def animal_list():
-    conn = get_animal_db()
-    animals = []
-    region_list = []
+    filters = get_animal_filters(request.args)
+    page_size = get_page_size(request.args)
+    filter_context = {
+        'curr_keyword': filters['keyword'], 'curr_region': filters['region'],
+        'curr_species': filters['species'], 'curr_gender': filters['gender'],
+        'curr_sort': filters['sort'], 'curr_ending': filters['ending_days'],
+        'ending_choices': ENDING_DAYS_CHOICES, 'page_size': page_size,
+    }
+
+    def build_context():
+        conn = get_animal_db()
+        facets = get_facets(conn)
+        animals, next_cursor = fetch_animals(conn, filters, limit=page_size)
+        return dict(filter_context, animals=animals,
+                    region_list=facets['animal_regions'], region_counts=facets['animal_counts'],
+                    next_cursor=next_cursor)
+
+    # 조회 오류 시 빈 목록으로 렌더링 (캐시하지 않음). fav_ids 는 render_cached 가 붙여줌 (하트 표시)
+    fallback = dict(filter_context, animals=[], region_list=[], region_counts={}, next_cursor=None)
+    return render_cached('animals.html', build_context, fallback)
+
+# --- API: 유기동물 목록 (무한 스크롤용, 키셋 페이지네이션) ---
+@app.route('/api/animals')
+def api_animal_list():
+    filters = get_animal_filters(request.args)
+    page_size = get_page_size(request.args)
+
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args['cursor'])
+        if cursor is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
 
-    keyword = request.args.get('keyword', '')
-    region = request.args.get('region', '전체')
-    species = request.args.get('species', '전체')
-    gender = request.args.get('gender', '전체')
-    sort = request.args.get('sort', 'newest')
-    
-    sql = "SELECT * FROM animal_status WHERE 1=1"
-    params = []
-
-    if conn:
-        try:
-            regions_data = conn.execute("SELECT DISTINCT region FROM animal_status WHERE region IS NOT NULL AND region != '' ORDER BY region").fetchall()
-            region_list = [row['region'] for row in regions_data]
-
-            if keyword:
-                sql += " AND (breed LIKE ? OR shelter_name LIKE ?)"
-                params.extend([f'%{keyword}%', f'%{keyword}%'])
-            if region != '전체':
-                sql += " AND region LIKE ?"
-                params.append(f'%{region}%')
-            if species == '고양이':
-                sql += " AND breed LIKE '%고양이%'"
-            elif species == '개':
-                sql += " AND breed NOT LIKE '%고양이%'"
-            if gender == '수컷':
-                sql += " AND (gender = 'M' OR gender LIKE '수컷%')"
-            elif gender == '암컷':
-                sql += " AND (gender = 'F' OR gender LIKE '암컷%')"
-
-            if sort == 'oldest':
-                sql += " ORDER BY register_date ASC"
-            else:
-                sql += " ORDER BY register_date DESC"
-            
-            animals = conn.execute(sql, params).fetchall()
-        except Exception as e:
-            print(f"검색 오류: {e}")
-        finally:
-            conn.close()
-
-    fav_ids = []
-    if 'user_id' in session:
-        conn_user = get_user_db()
-        try:
-            rows = conn_user.execute('SELECT animal_id FROM favorites WHERE user_id = ?', (session['user_id'],)).fetchall()
-            fav_ids = [r['animal_id'] for r in rows] # 예: [1, 5, 10]
-        except:
-            pass
-        conn_user.close()
-
-    # 마지막에 fav_ids=fav_ids 전달해야 하트
-    return render_template('animals.html', animals=animals, 
-                           region_list=region_list,
-                           curr_keyword=keyword, curr_region=region, 
-                           curr_species=species, curr_gender=gender,
-                           curr_sort=sort,
-                           fav_ids=fav_ids) 
+    conn = get_animal_db()
+    rows, next_cursor = fetch_animals(conn, filters, cursor, page_size)
+    return jsonify({'animals': [dict(r) for r in rows], 'next_cursor': next_cursor})
 
 # --- 3. 병원/약국 ---
 @app.route('/hospital')
 def hospital_list():
-    conn = get_animal_db()
-    entities = []
-    region_list = []
     keyword = request.args.get('keyword', '')
     type_filter = request.args.get('type', '전체')
     region_filter = request.args.get('region', '전체')
-    
+    return render_cached('hospital.html', lambda: build_hospital_context(keyword, type_filter, region_filter))
+
+def build_hospital_context(keyword, type_filter, region_filter):
+    conn = get_animal_db()
+    region_list = get_facets(conn)['facility_regions']
+    sql, params = build_hospital_query(keyword, type_filter, region_filter)
+    entities = conn.execute(sql, params).fetchall()
+
+    return {'entities': entities, 'region_list': region_list,
+            'curr_keyword': keyword, 'curr_type': type_filter, 'curr_region': region_filter}
+
+# --- API: 내 주변 병원/약국 (R*Tree 반경 검색) ---
+@app.route('/api/nearby')
+def api_nearby():
     try:
-        r_query = """
-            SELECT DISTINCT region FROM hospital_final WHERE region IS NOT NULL AND region != ''
-            UNION
-            SELECT DISTINCT region FROM pharmacy_final WHERE region IS NOT NULL AND region != ''
-            ORDER BY region
-        """
-        region_rows = conn.execute(r_query).fetchall()
-        region_list = [row['region'] for row in region_rows]
-
-        base_query = "SELECT * FROM (SELECT hospital_id as id, name, address, phone, region, '동물병원' as type FROM hospital_final UNION ALL SELECT pharmacy_id as id, name, address, phone, region, '동물약국' as type FROM pharmacy_final) WHERE 1=1"
-        params = []
-        if keyword:
-            base_query += " AND (name LIKE ? OR address LIKE ?)"
-            params.extend([f'%{keyword}%', f'%{keyword}%'])
-        if type_filter != '전체':
-            base_query += " AND type = ?"
-            params.append(type_filter)
-        if region_filter != '전체':
-            base_query += " AND region LIKE ?"
-            params.append(f'%{region_filter}%')
-        base_query += " ORDER BY name ASC"
-        entities = conn.execute(base_query, params).fetchall()
-    finally:
-        conn.close()
-
-    return render_template('hospital.html', entities=entities, 
-                           region_list=region_list,
-                           curr_keyword=keyword, curr_type=type_filter, curr_region=region_filter)
+        lat, lon, radius_km, types, limit = parse_nearby_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_animal_db()
+    results = find_nearby_facilities(conn, lat, lon, radius_km, types, limit)
+    return jsonify({'results': results, 'radius_km': radius_km})
 
 # --- 4. 보호소 ---
 @app.route('/shelter')
 def shelter_list():
-    conn = get_animal_db()
-    shelters = []
-    region_list = [] 
     keyword = request.args.get('keyword', '')
     region_filter = request.args.get('region', '전체')
-    
-    try:
-        all_shelters = conn.execute("SELECT address FROM shelter_final WHERE address IS NOT NULL").fetchall()
-        temp_regions = set()
-        for row in all_shelters:
-            addr = row['address'].split()
-            if len(addr) >= 2 and addr[0] == '경기도':
-                temp_regions.add(addr[1]) 
-            elif len(addr) >= 1:
-                temp_regions.add(addr[0])
-        region_list = sorted(list(temp_regions)) 
-
-        sql = "SELECT * FROM shelter_final WHERE 1=1"
-        params = []
-        if keyword:
-            sql += " AND (name LIKE ? OR address LIKE ?)"
-            params.extend([f'%{keyword}%', f'%{keyword}%'])
-        if region_filter != '전체':
-            sql += " AND address LIKE ?"
-            params.append(f'%{region_filter}%')
-        sql += " ORDER BY name ASC"
-        shelters = conn.execute(sql, params).fetchall()
-    finally:
-        conn.close()
-
-    return render_template('shelter.html', shelters=shelters, 
-                           region_list=region_list, curr_keyword=keyword, curr_region=region_filter)
+    return render_cached('shelter.html', lambda: build_shelter_context(keyword, region_filter))
+
+def build_shelter_context(keyword, region_filter):
+    conn = get_animal_db()
+    region_list = get_facets(conn)['shelter_regions']
+    sql, params = build_shelter_query(keyword, region_filter)
+    shelters = conn.execute(sql, params).fetchall()
+
+    return {'shelters': shelters, 'region_list': region_list,
+            'curr_keyword': keyword, 'curr_region': region_filter}
 
 # --- API: 동물 상세 정보 ---
 @app.route('/api/animal/<int:id>')
 def get_animal_detail(id):
+    return jsonify(fetch_animal_detail(get_animal_db(), id))
+
+# --- API: 비슷한 동물 (recommend.py 가 미리 계산한 표를 PK 로 조회) ---
+@app.route('/api/animal/<int:id>/similar')
+def get_similar_animals(id):
+    limit = max(1, min(request.args.get('limit', recommend.TOP_K, type=int), recommend.TOP_K))
+    rows = recommend.fetch_similar(get_animal_db(), id, limit)
+    return jsonify({'animals': [dict(r) for r in rows]})
+
+# --- 동물 사진 썸네일 (원격 이미지를 한 번만 받아 줄이고 디스크에 캐시) ---
+# Pillow 가 없으면 줄일 수 없으므로 캐시를 만들지 않고 원본 주소로 보낸다 (원본 크기를 썸네일인 척 캐시하지 않음)
+thumbnail_cache = ThumbnailCache() if thumbnails.available() else None
+if thumbnail_cache is None:
+    print("⚠️ Pillow 가 설치되지 않아 /img 는 썸네일 대신 원본 이미지 주소로 redirect 합니다 (pip install Pillow)")
+
+@app.route('/img/<int:animal_id>')
+def animal_image(animal_id):
+    size = request.args.get('size', 'card')
+    if size not in THUMB_SIZES:
+        abort(404)
     conn = get_animal_db()
-    data = {}
+    row = (conn.execute("SELECT image_url FROM animal_status WHERE animal_id = ?", (animal_id,)).fetchone()
+           or conn.execute("SELECT image_url FROM animal_archive WHERE animal_id = ?", (animal_id,)).fetchone())
+    if not row or not row['image_url']:
+        abort(404)
+    if thumbnail_cache is None:
+        return redirect(row['image_url'])
     try:
-        sql = """
-            SELECT a.*, s.phone as shelter_phone
-            FROM animal_status a
-            LEFT JOIN shelter_final s ON a.shelter_id = s.shelter_id
-            WHERE a.animal_id = ?
-        """
-        row = conn.execute(sql, (id,)).fetchone()
-        if row: data = dict(row)
-    finally:
-        conn.close()
-    return jsonify(data)
+        path, digest, content_type = thumbnail_cache.get(row['image_url'], size)
+    except ThumbnailError as e:
+        # 받아오지 못하면 예전처럼 원본 주소를 직접 보게 함 (캐시하지 않음)
+        print(f"썸네일 오류 ({animal_id}): {e}")
+        return redirect(row['image_url'])
+    resp = send_file(path, mimetype=content_type, etag=digest, max_age=THUMB_MAX_AGE, conditional=True)
+    resp.cache_control.public = True
+    return resp
 
 # --- 💡 [신규] API: 찜하기(좋아요) 토글 ---
 @app.route('/api/favorite/<int:animal_id>', methods=['POST'])
@@ -219,27 +462,106 @@ def toggle_favorite(animal_id):
     
     user_id = session['user_id']
     conn = get_user_db()
-    action = 'removed'
     
     try:
-        # 이미 찜했는지 확인
-        existing = conn.execute('SELECT id FROM favorites WHERE user_id = ? AND animal_id = ?', (user_id, animal_id)).fetchone()
-        if existing:
-            conn.execute('DELETE FROM favorites WHERE id = ?', (existing['id'],))
-            action = 'removed'
-        else:
-            conn.execute('INSERT INTO favorites (user_id, animal_id) VALUES (?, ?)', (user_id, animal_id))
-            action = 'added'
-        conn.commit()
-    except Exception as e:
+        with conn:
+            # UNIQUE(user_id, animal_id) 때문에 이미 찜한 경우 INSERT 가 무시됨 -> 그때만 삭제
+            # 두 문장이 한 트랜잭션이라 동시에 눌러도 결과가 꼬이지 않는다
+            cur = conn.execute('INSERT INTO favorites (user_id, animal_id) VALUES (?, ?) ON CONFLICT(user_id, animal_id) DO NOTHING', (user_id, animal_id))
+            if cur.rowcount:
+                action = 'added'
+            else:
+                conn.execute('DELETE FROM favorites WHERE user_id = ? AND animal_id = ?', (user_id, animal_id))
+                action = 'removed'
+            bump_favorite_version(conn, user_id)  # 모든 워커의 찜 캐시가 다음 요청에 다시 읽음
+    except sqlite3.Error as e:
         print(f"찜하기 오류: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
-        
+
     return jsonify({'action': action})
 
+# --- API: 찜 일괄 변경 ---
+# 요청 예: {"ops": [{"op": "add", "animal_id": 1}, {"op": "remove", "animal_id": 2}]}
+#          {"ops": [{"op": "clear"}]}  -> 전체 찜 취소
+# 모든 op 을 순서대로 한 트랜잭션에서 처리한다 (하나라도 잘못되면 아무것도 바뀌지 않음).
+FAVORITE_BATCH_MAX_OPS = 500
+
+def parse_favorite_ops(payload):
+    """요청 본문을 (op, animal_id) 리스트로 변환. 형식이 잘못되면 None"""
+    ops = payload.get('ops') if isinstance(payload, dict) else None
+    if not isinstance(ops, list) or not ops or len(ops) > FAVORITE_BATCH_MAX_OPS:
+        return None
+    parsed = []
+    for op in ops:
+        if not isinstance(op, dict) or op.get('op') not in ('add', 'remove', 'clear'):
+            return None
+        animal_id = op.get('animal_id')
+        if op['op'] == 'clear':
+            animal_id = None
+        elif not isinstance(animal_id, int) or isinstance(animal_id, bool):
+            return None
+        parsed.append((op['op'], animal_id))
+    return parsed
+
+@app.route('/api/favorites', methods=['POST'])
+def batch_favorites():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    ops = parse_favorite_ops(request.get_json(silent=True))
+    if ops is None:
+        return jsonify({'error': f'ops 는 add/remove/clear 항목 1~{FAVORITE_BATCH_MAX_OPS}개의 리스트여야 합니다.'}), 400
+
+    user_id = session['user_id']
+    conn = get_user_db()
+    added = removed = 0
+    try:
+        with conn:
+            for op, animal_id in ops:
+                if op == 'add':
+                    added += conn.execute('INSERT INTO favorites (user_id, animal_id) VALUES (?, ?) ON CONFLICT(user_id, animal_id) DO NOTHING', (user_id, animal_id)).rowcount
+                elif op == 'remove':
+                    removed += conn.execute('DELETE FROM favorites WHERE user_id = ? AND animal_id = ?', (user_id, animal_id)).rowcount
+                else:
+                    removed += conn.execute('DELETE FROM favorites WHERE user_id = ?', (user_id,)).rowcount
+            bump_favorite_version(conn, user_id)
+    except sqlite3.Error as e:
+        print(f"찜 일괄 변경 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'added': added, 'removed': removed, 'fav_ids': get_fav_ids(user_id)})
+
 # --- 💡 [신규] 마이페이지 (찜한 목록) ---
+MYPAGE_PAGE_SIZE = 20
+
+def fetch_favorite_page(conn, user_id, before=None, limit=MYPAGE_PAGE_SIZE):
+    """최근 찜한 순으로 한 페이지 조회 (favorites.id 키셋 페이지네이션).
+    animal_status 에 없는 동물도 animal_id 가 NULL 인 행으로 함께 돌려주고,
+    공고가 끝나 animal_archive 로 옮겨진 동물은 archived_* 컬럼에 요약 정보를 담는다."""
+    sql = """
+        SELECT f.id AS favorite_id, f.animal_id AS favorite_animal_id, f.created_at AS favorited_at, a.*,
+               r.animal_id AS archived_id, r.breed AS archived_breed, r.region AS archived_region,
+               r.register_end_date AS archived_end_date, r.image_url AS archived_image_url
+        FROM user_db.favorites f
+        LEFT JOIN animal_archive r ON r.animal_id = f.animal_id
+        -- 다시 공고된 동물은 보관 행보다 같은 공고(source_key)의 보호 중 행을 우선
+        LEFT JOIN animal_status a ON a.animal_id = IFNULL(
+            (SELECT s.animal_id FROM animal_status s WHERE s.source_key = r.source_key), f.animal_id)
+        WHERE f.user_id = ?
+    """
+    params = [user_id]
+    if before:
+        sql += " AND f.id < ?"
+        params.append(before)
+    sql += " ORDER BY f.id DESC LIMIT ?"
+    params.append(limit + 1)
+    rows = conn.execute(sql, params).fetchall()
+    next_before = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_before = rows[-1]['favorite_id']
+    return rows, next_before
+
 @app.route('/mypage')
 def mypage():
     if 'user_id' not in session:
@@ -248,46 +570,55 @@ def mypage():
     
     user_id = session['user_id']
     user_name = session['user_name']
-    
-    # 1. 내가 찜한 동물 ID들 가져오기
-    conn_user = get_user_db()
-    fav_ids = []
+    before = request.args.get('before', type=int)
+
+    liked_animals, next_before = [], None
     try:
-        rows = conn_user.execute('SELECT animal_id FROM favorites WHERE user_id = ?', (user_id,)).fetchall()
-        fav_ids = [r['animal_id'] for r in rows]
-    except: pass
-    conn_user.close()
-    
-    # 2. 동물 정보 DB에서 해당 ID들의 정보 가져오기
-    liked_animals = []
-    if fav_ids:
-        conn_animal = get_animal_db()
-        # SQL: SELECT * FROM animal_status WHERE animal_id IN (1, 5, 10...)
-        placeholders = ','.join(['?'] * len(fav_ids))
-        sql = f"SELECT * FROM animal_status WHERE animal_id IN ({placeholders})"
-        try:
-            liked_animals = conn_animal.execute(sql, fav_ids).fetchall()
-        finally:
-            conn_animal.close()
-            
-    return render_template('mypage.html', animals=liked_animals, user_name=user_name)
+        liked_animals, next_before = fetch_favorite_page(get_animal_db(), user_id, before)
+    except sqlite3.Error as e:
+        print(f"찜 목록 조회 오류: {e}")
+
+    return render_template('mypage.html', animals=liked_animals, user_name=user_name,
+                           total=len(get_fav_ids(user_id)), next_before=next_before)
 
 # --- 로그인/회원가입/로그아웃 ---
+# 로그인 시도 제한 (이메일/IP 별 실패 횟수, 프로세스 메모리)
+login_limiter = LoginRateLimiter()
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
+        retry_after = login_limiter.retry_after(email, request.remote_addr)
+        if retry_after:
+            flash(f"로그인 시도가 너무 많습니다. {retry_after}초 후 다시 시도해 주세요.", 'error')
+            return render_template('login.html'), 429, {'Retry-After': str(retry_after)}
         conn = get_user_db()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-        conn.close()
-        if user and check_password_hash(user['password_hash'], password):
+        user = conn.execute('SELECT id, name, is_admin, password_hash FROM users WHERE email = ?', (email,)).fetchone()
+        try:
+            ok = verify_password(user['password_hash'], password) if user else verify_dummy(password)
+        except PasswordBusy:
+            flash("접속이 많습니다. 잠시 후 다시 시도해 주세요.", 'error')
+            return render_template('login.html'), 503, {'Retry-After': '1'}
+        if ok:
+            login_limiter.record_success(email)
+            session.regenerate()  # 로그인할 때마다 새 세션 토큰 발급
+            if needs_rehash(user['password_hash']):
+                # 예전 방식/비용으로 저장된 해시는 방금 확인한 비밀번호로 다시 저장
+                try:
+                    with conn:
+                        conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (hash_password(password), user['id']))
+                except (PasswordBusy, sqlite3.Error) as e:
+                    print(f"비밀번호 해시 갱신 실패: {e}")
             session['user_id'] = user['id']
             session['user_name'] = user['name']
             session['is_admin'] = user['is_admin']
             flash(f"환영합니다, {user['name']}님!", 'success')
             return redirect(url_for('index'))
-        else: flash("로그인 실패", 'error')
+        else:
+            login_limiter.record_failure(email, request.remote_addr)
+            flash("로그인 실패", 'error')
     return render_template('login.html')
 
 @app.route('/signup', methods=['GET', 'POST'])
@@ -295,7 +626,11 @@ def signup():
     if request.method == 'POST':
         name, email, pw = request.form['name'], request.form['email'], request.form['password']
         is_admin = 1 if request.form.get('is_admin') else 0
-        hashed = generate_password_hash(pw)
+        try:
+            hashed = hash_password(pw)
+        except PasswordBusy:
+            flash("접속이 많습니다. 잠시 후 다시 시도해 주세요.", 'error')
+            return render_template('signup.html'), 503, {'Retry-After': '1'}
         conn = get_user_db()
         try:
             conn.execute('INSERT INTO users (email, password_hash, name, is_admin) VALUES (?, ?, ?, ?)', (email, hashed, name, is_admin))
@@ -303,7 +638,6 @@ def signup():
             flash("가입 완료!", 'success')
             return redirect(url_for('login'))
         except: flash("이미 존재하는 이메일입니다.", 'error')
-        finally: conn.close()
     return render_template('signup.html')
 
 @app.route('/logout')
@@ -313,61 +647,223 @@ def logout(): session.clear(); return redirect(url_for('index'))
 @app.route('/admin')
 @admin_required
 def admin_dashboard():
-    conn = get_animal_db()
-    animals = conn.execute("SELECT * FROM animal_status ORDER BY register_date DESC").fetchall()
-    shelters = conn.execute("SELECT * FROM shelter_final ORDER BY name").fetchall()
-    hospitals = conn.execute("SELECT * FROM hospital_final ORDER BY name").fetchall()
-    conn.close()
-    return render_template('admin.html', animals=animals, shelters=shelters, hospitals=hospitals)
+    """관리 대상 테이블 하나를 서버에서 검색/정렬/페이지 나눠 보여줌 (?table=animal|shelter|hospital|pharmacy|user)"""
+    kind = request.args.get('table', 'animal')
+    if kind == 'user':
+        spec, conn = USER_TABLE, get_user_db()
+    elif kind in ADMIN_TABLES:
+        spec, conn = ADMIN_TABLES[kind], get_animal_db()
+    else:
+        abort(404)
+    grid = get_grid_args(spec, request.args)
+    rows, total, pager = fetch_grid_page(conn, spec, grid)
+    session_counts = session_store.active_counts(conn) if kind == 'user' else {}
+    return render_template('admin.html', kind=kind, spec=spec, tables=ADMIN_TABLES, grid=grid, rows=rows, total=total,
+                           pager=pager, pages=max(1, -(-total // grid['page_size'])), session_counts=session_counts,
+                           building=kind != 'user' and animal_db_builder() is not None)
+
+# --- 회원 관리 (삭제/강등/강제 로그아웃) ---
+# 세션 행을 같은 트랜잭션에서 지우고, 커밋 후 모든 워커의 세션 캐시를 무효화해서 즉시 로그아웃시킨다.
+@app.route('/admin/users/<int:user_id>/<action>', methods=['POST'])
+@admin_required
+def admin_user_action(user_id, action):
+    if action not in ('delete', 'demote', 'logout'):
+        abort(404)
+    if user_id == session['user_id'] and action != 'logout':
+        flash("자기 자신의 계정은 삭제하거나 강등할 수 없습니다.", 'error')
+        return redirect(admin_grid_url('user'))
+    conn = get_user_db()
+    with conn:
+        if action == 'delete':
+            conn.execute('DELETE FROM favorites WHERE user_id = ?', (user_id,))
+            bump_favorite_version(conn, user_id)
+            conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+        elif action == 'demote':
+            conn.execute('UPDATE users SET is_admin = 0 WHERE id = ?', (user_id,))
+        session_store.revoke_user(conn, user_id)
+    session_store.revoked()
+    flash({'delete': "회원을 삭제했습니다.", 'demote': "관리자 권한을 해제했습니다.",
+           'logout': "회원의 모든 세션을 로그아웃시켰습니다."}[action], 'success')
+    return redirect(admin_grid_url('user'))
+
+@app.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    # 적중/실패 횟수는 늘어나기만 하는 누적값(counter), 항목 수/바이트는 지금 시점의 값(gauge)
+    cache_counters = {
+        'petmatch_page_cache_hits': page_cache.hits,
+        'petmatch_page_cache_misses': page_cache.misses,
+        'petmatch_context_cache_hits': context_cache.hits,
+        'petmatch_context_cache_misses': context_cache.misses,
+        'petmatch_favorite_cache_hits': favorite_cache.cache.hits,
+        'petmatch_favorite_cache_misses': favorite_cache.cache.misses,
+        'petmatch_recommend_cache_hits': recommend_cache.hits,
+        'petmatch_recommend_cache_misses': recommend_cache.misses,
+        'petmatch_session_cache_hits': session_store.cache.hits,
+        'petmatch_session_cache_misses': session_store.cache.misses,
+    }
+    cache_gauges = {
+        'petmatch_page_cache_entries': len(page_cache),
+        'petmatch_page_cache_bytes': page_cache.total_bytes,
+        'petmatch_context_cache_entries': len(context_cache),
+        'petmatch_context_cache_bytes': context_cache.total_bytes,
+        'petmatch_session_cache_entries': len(session_store.cache),
+    }
+    if thumbnail_cache is not None:
+        cache_counters['petmatch_thumbnail_cache_hits'] = thumbnail_cache.hits
+        cache_counters['petmatch_thumbnail_cache_misses'] = thumbnail_cache.misses
+        cache_gauges['petmatch_thumbnail_cache_bytes'] = thumbnail_cache.total_bytes
+    if _catalog['catalog'] is not None:
+        cache_gauges['petmatch_catalog_animals'] = len(_catalog['catalog'])
+        cache_gauges['petmatch_catalog_bytes'] = _catalog['catalog'].nbytes
+    if request.args.get('format') == 'prometheus':
+        body = (profiler.prometheus(cache_gauges, cache_counters) if profiler
+                else prometheus_values(cache_gauges, cache_counters))
+        return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    if profiler and request.args.get('reset'):
+        profiler.reset()
+        return redirect(url_for('admin_metrics'))
+    return render_template('admin_metrics.html', enabled=profiler is not None,
+                           routes=profiler.slowest_routes() if profiler else [],
+                           queries=profiler.slowest_queries() if profiler else [],
+                           cache_metrics=dict(cache_counters, **cache_gauges))
+
+def commit_admin_change(conn):
+    """동물 DB 변경 커밋 + data_version 증가 (목록 캐시/카탈로그 무효화)"""
+    bump_data_version(conn)
+    conn.commit()
+    expire_data_version()
+
+def admin_grid_url(kind):
+    """작업 후 보던 목록 화면(검색/정렬/페이지)으로 돌아갈 주소"""
+    next_url = request.form.get('next', '')
+    if next_url.startswith('/admin') and not next_url.startswith('//'):
+        return next_url
+    return url_for('admin_dashboard', table=kind)
 
 @app.route('/admin/delete/<type>/<int:id>', methods=['POST'])
 @admin_required
 def delete_item(type, id):
-    conn = get_animal_db()
+    if type not in ADMIN_TABLES:
+        abort(404)
+    conn = get_animal_write_db()
+    try:
+        begin_animal_write(conn)
+        delete_rows(conn, ADMIN_TABLES[type], [id])
+        commit_admin_change(conn)
+    except sqlite3.Error as e:
+        conn.rollback()
+        flash(f"삭제 실패: {e}", 'error')
+    return redirect(admin_grid_url(type))
+
+# --- 일괄 삭제: 선택한 행을 한 트랜잭션, 한 문장으로 삭제 ---
+@app.route('/admin/<kind>/bulk-delete', methods=['POST'])
+@admin_required
+def bulk_delete(kind):
+    if kind not in ADMIN_TABLES:
+        abort(404)
+    ids = parse_ids(request.form.getlist('ids'))
+    if not ids:
+        flash("삭제할 항목을 선택하세요.", 'error')
+        return redirect(admin_grid_url(kind))
+    conn = get_animal_write_db()
+    try:
+        begin_animal_write(conn)
+        deleted = delete_rows(conn, ADMIN_TABLES[kind], ids)
+        commit_admin_change(conn)
+        flash(f"{deleted}건을 삭제했습니다.", 'success')
+    except sqlite3.Error as e:
+        conn.rollback()
+        flash(f"삭제 실패: {e}", 'error')
+    return redirect(admin_grid_url(kind))
+
+# --- 일괄 등록: CSV/JSON 파일을 검증한 뒤 executemany 로 한 번에 삽입 ---
+@app.route('/admin/<kind>/import', methods=['POST'])
+@admin_required
+def bulk_import(kind):
+    if kind not in ADMIN_TABLES:
+        abort(404)
+    spec = ADMIN_TABLES[kind]
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        flash("업로드할 CSV 또는 JSON 파일을 선택하세요.", 'error')
+        return redirect(admin_grid_url(kind))
     try:
-        if type == 'animal': conn.execute("DELETE FROM animal_status WHERE animal_id = ?", (id,))
-        elif type == 'shelter': conn.execute("DELETE FROM shelter_final WHERE shelter_id = ?", (id,))
-        elif type == 'hospital': conn.execute("DELETE FROM hospital_final WHERE hospital_id = ?", (id,))
-        conn.commit()
-    finally: conn.close()
-    return redirect(url_for('admin_dashboard'))
+        rows = read_upload(upload.filename, upload.read())
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        flash(f"파일을 읽을 수 없습니다: {e}", 'error')
+        return redirect(admin_grid_url(kind))
+    values, errors = validate_rows(spec, rows)
+    if errors:
+        # 한 행이라도 잘못되면 아무것도 넣지 않음 (고친 파일을 다시 올리면 됨)
+        for error in errors:
+            flash(error, 'error')
+        return redirect(admin_grid_url(kind))
+    conn = get_animal_write_db()
+    try:
+        begin_animal_write(conn)
+        inserted = insert_rows(conn, spec, values)
+        commit_admin_change(conn)
+        flash(f"{spec['label']} {inserted}건을 등록했습니다.", 'success')
+    except sqlite3.Error as e:
+        conn.rollback()
+        flash(f"등록 실패: {e}", 'error')
+    return redirect(admin_grid_url(kind))
 
 @app.route('/admin/add', methods=['POST'])
 @admin_required
 def add_item():
+    """단건 추가 (일괄 등록과 같은 검증/변환 규칙 사용)"""
     t = request.form['item_type']
-    conn = get_animal_db()
+    if t not in ADMIN_TABLES:
+        abort(404)
+    values, errors = validate_rows(ADMIN_TABLES[t], [request.form])
+    if errors:
+        flash(f"추가 실패: {errors[0].split(' ', 1)[1]}", 'error')
+        return redirect(admin_grid_url(t))
+    conn = get_animal_write_db()
     try:
-        if t == 'animal':
-            reg_date = request.form['register_date'].replace('-', '')
-            end_date = request.form['register_end_date'].replace('-', '')
-
-            conn.execute("""
-                INSERT INTO animal_status 
-                (breed, gender, weight, years, region, shelter_name, register_date, register_end_date, image_url) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                request.form['breed'], request.form['gender'], request.form['weight'],
-                request.form['years'], request.form['region'], request.form['shelter_name'],
-                reg_date, end_date, request.form['image_url']
-            ))
-            
-        elif t == 'shelter':
-            conn.execute("INSERT INTO shelter_final (name, phone, address) VALUES (?,?,?)", 
-                         (request.form['name'], request.form['phone'], request.form['address']))
-            
-        elif t == 'hospital':
-            conn.execute("INSERT INTO hospital_final (name, phone, address, region, lat, lon) VALUES (?,?,?,?,0,0)", 
-                         (request.form['name'], request.form['phone'], request.form['address'], '기타'))
-            
-        conn.commit()
+        begin_animal_write(conn)
+        insert_rows(conn, ADMIN_TABLES[t], values)
+        commit_admin_change(conn)
         flash("성공적으로 추가되었습니다!", 'success')
-    except Exception as e:
+    except sqlite3.Error as e:
+        conn.rollback()
         flash(f"추가 실패: {e}", 'error')
         print(f"에러: {e}")
-    finally:
-        conn.close()
-    return redirect(url_for('admin_dashboard'))
+    return redirect(admin_grid_url(t))
+
+# 공고 종료 동물 보관 테이블/종료일 인덱스 준비 (예전 DB 에도 한 번만 만들어 둠)
+if os.path.exists(animal_db_switch.path):
+    with app.app_context():
+        try:
+            lifecycle.ensure_schema(get_animal_write_db())
+        except sqlite3.Error as e:
+            print(f"보관 테이블 준비 실패: {e}")
+
+# PETMATCH_ARCHIVE_INTERVAL(초)을 지정하면 앱 프로세스 안에서 주기적으로 보관 처리.
+# 워커가 여러 개면 0(기본값)으로 두고 lifecycle.py 를 따로 한 곳에서만 실행한다.
+ARCHIVE_INTERVAL = int(os.environ.get('PETMATCH_ARCHIVE_INTERVAL', 0))
+if ARCHIVE_INTERVAL > 0:
+    archive_scheduler = lifecycle.ArchiveScheduler(ANIMAL_DB_PATH, ARCHIVE_INTERVAL,
+                                                   on_archived=lambda moved: expire_data_version())
+    archive_scheduler.start()
+
+# 없는 이메일 로그인 비교용 해시도 시작할 때 만들어 둠 (첫 요청만 느려서 가입 여부가 드러나지 않도록)
+prepare_dummy_hash()
+
+# 카탈로그는 첫 요청을 기다리지 않고 시작할 때 미리 적재 (DB 가 없으면 첫 요청 때 다시 시도)
+if CATALOG_ENABLED:
+    with app.app_context():
+        try:
+            get_catalog()
+        except sqlite3.Error as e:
+            print(f"카탈로그 적재 실패: {e}")
+
+# 운영 모드에서는 템플릿을 시작할 때 미리 컴파일 (바이트코드 캐시가 있으면 파일만 읽음) -> 첫 요청이 빨라짐
+if not DEBUG:
+    for name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html')):
+        app.jinja_env.get_template(name)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=DEBUG, port=int(os.environ.get('PETMATCH_PORT', 5000)))
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from db import SQLitePool, AnimalDBSwitch, resolve_animal_db, ANIMAL_DB_PRAGMAS
+from queries import (
+    get_animal_filters, get_page_size, decode_cursor, fetch_animal_page, fetch_animal_detail,
+    build_shelter_query, parse_nearby_args, find_nearby_facilities,
+)
+
+# --- 비동기 조회 API (ASGI) ---
+# 모바일 앱용 읽기 전용 JSON API. Flask 앱과 같은 DB 파일/쿼리 생성 함수(queries.py)를 쓴다.
+# 이벤트 루프는 요청을 받아 두기만 하고, SQLite 조회는 크기가 정해진 스레드 풀에서 실행한다.
+# 스레드 수보다 많은 요청은 풀의 큐에서 기다리므로 동시 접속이 많아도 스레드/연결 수는 늘지 않고,
+# 대기 요청이 MAX_PENDING 을 넘으면 바로 503 으로 돌려보낸다.
+#
+# 실행 예: uvicorn asgi:app --port 8000        (backend 폴더에서, uvicorn 은 별도 설치)
+#   GET /api/animals?region=수원시&species=고양이&cursor=...
+#   GET /api/animal/<id>
+#   GET /api/nearby?lat=37.26&lon=127.02&radius=3
+#   GET /api/shelters?keyword=보호소&region=수원시
+
+DB_WORKERS = int(os.environ.get('PETMATCH_ASGI_DB_WORKERS', 8))          # SQLite 조회 스레드 수
+MAX_PENDING = int(os.environ.get('PETMATCH_ASGI_MAX_PENDING', 1024))     # 대기 가능한 요청 수 (넘으면 503)
+
+animal_pool = SQLitePool(resolve_animal_db(), ANIMAL_DB_PRAGMAS, read_only=True, max_idle=DB_WORKERS)
+animal_db_switch = AnimalDBSwitch([animal_pool])  # ETL 이 동물 DB 파일을 바꾸면 새 파일로 옮김
+executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix='petmatch-db')
+_pending = 0
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def with_animal_db(func, *args):
+    """스레드 풀에서 실행: 풀에서 연결을 빌려 func(conn, *args) 를 호출하고 반납"""
+    animal_db_switch.check()
+    conn = animal_pool.acquire()
+    try:
+        return func(conn, *args)
+    finally:
+        animal_pool.release(conn)
+
+
+async def run_db(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, with_animal_db, func, *args)
+
+
+# --- 라우트별 조회 함수 (스레드 풀에서 실행) ---
+def animals_query(conn, args):
+    filters = get_animal_filters(args)
+    cursor = None
+    if args.get('cursor'):
+        cursor = decode_cursor(args['cursor'])
+        if cursor is None:
+            raise ApiError(400, 'Invalid cursor')
+    rows, next_cursor = fetch_animal_page(conn, filters, cursor, get_page_size(args))
+    return {'animals': [dict(r) for r in rows], 'next_cursor': next_cursor}
+
+
+def nearby_query(conn, args):
+    try:
+        lat, lon, radius_km, types, limit = parse_nearby_args(args)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return {'results': find_nearby_facilities(conn, lat, lon, radius_km, types, limit), 'radius_km': radius_km}
+
+
+def shelters_query(conn, args):
+    sql, params = build_shelter_query(args.get('keyword', ''), args.get('region', '전체'))
+    return {'shelters': [dict(r) for r in conn.execute(sql, params).fetchall()]}
+
+
+async def route(path, args):
+    if path == '/api/animals':
+        return await run_db(animals_query, args)
+    if path.startswith('/api/animal/'):
+        animal_id = path[len('/api/animal/'):]
+        if not animal_id.isdigit():
+            raise ApiError(404, 'Not Found')
+        return await run_db(fetch_animal_detail, int(animal_id))
+    if path == '/api/nearby':
+        return await run_db(nearby_query, args)
+    if path == '/api/shelters':
+        return await run_db(shelters_query, args)
+    raise ApiError(404, 'Not Found')
+
+
+# --- ASGI 진입점 ---
+async def send_json(send, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            animal_pool.close_all()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    global _pending
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    if scope['method'] != 'GET':
+        return await send_json(send, 405, {'error': 'Method Not Allowed'})
+    if _pending >= MAX_PENDING:
+        return await send_json(send, 503, {'error': '요청이 많습니다. 잠시 후 다시 시도해 주세요.'})
+
+    args = dict(parse_qsl(scope.get('query_string', b'').decode('utf-8', 'replace')))
+    _pending += 1  # 이벤트 루프 스레드에서만 바뀌므로 잠금 불필요
+    try:
+        payload = await route(scope['path'], args)
+        await send_json(send, 200, payload)
+    except ApiError as e:
+        await send_json(send, e.status, {'error': e.message})
+    except sqlite3.Error as e:
+        print(f"조회 오류: {e}")
+        await send_json(send, 500, {'error': 'DB 조회 오류'})
+    finally:
+        _pending -= 1
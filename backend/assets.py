@@ -0,0 +1,130 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 압축본만 만든다
+    brotli = None
+
+from db import BASE_DIR
+
+# --- 정적 파일(CSS/JS) 빌드: 내용 해시 파일 이름 + 미리 압축 ---
+# frontend_test 의 CSS/JS 를 ASSET_DIR 에 style.<해시>.css 처럼 내용 해시를 붙인 이름으로 복사하고
+# 같은 이름 + .gz / .br 압축본을 함께 만든다. 내용이 바뀌면 파일 이름이 바뀌므로 브라우저는
+# 1년(ASSET_MAX_AGE) 동안 다시 묻지 않고 캐시를 쓰고, 서버는 요청마다 압축하지 않는다.
+# 앱은 시작할 때 원본의 해시를 계산해서 같은 이름의 빌드 파일이 있을 때만 사용한다.
+# (빌드를 잊었거나 원본을 고친 뒤 다시 빌드하지 않았으면 원본 파일을 그대로 제공)
+#
+# 실행: cd backend && python assets.py   (배포할 때마다, 원본 CSS/JS 를 고친 뒤)
+
+SOURCE_DIR = os.path.join(BASE_DIR, 'frontend_test')
+ASSET_DIR = os.environ.get('PETMATCH_ASSET_DIR', os.path.join(BASE_DIR, 'dist'))
+ASSET_PATTERNS = ('*.css', '*.js')
+ASSET_MAX_AGE = 365 * 24 * 3600   # 해시 이름 파일의 브라우저 캐시 기간 (초)
+HASH_LENGTH = 12
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # 클라이언트가 둘 다 받으면 앞쪽 우선
+MIME_TYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+
+def list_sources(source_dir=SOURCE_DIR):
+    return sorted(path for pattern in ASSET_PATTERNS for path in glob.glob(os.path.join(source_dir, pattern)))
+
+
+def hashed_name(path, data=None):
+    """style.css -> style.<sha256 앞 12자>.css"""
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def write_file(path, data):
+    """임시 파일에 쓰고 이름을 바꿔서 읽는 쪽이 반쯤 쓴 파일을 보지 않게 함"""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_assets(source_dir=SOURCE_DIR, asset_dir=ASSET_DIR, clean=False):
+    """해시 이름 파일과 압축본을 만들고 {원본 이름: 해시 이름} 반환. clean 이면 이번에 만들지 않은 예전 빌드 삭제"""
+    os.makedirs(asset_dir, exist_ok=True)
+    built = {}
+    for path in list_sources(source_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        name = hashed_name(path, data)
+        target = os.path.join(asset_dir, name)
+        write_file(target, data)
+        # mtime=0 으로 같은 원본이면 항상 같은 압축 결과가 나오게 함
+        write_file(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            write_file(target + '.br', brotli.compress(data, quality=11))
+        built[os.path.basename(path)] = name
+        print(f"  📦 {os.path.basename(path)} -> {name} ({len(data):,} bytes)")
+    if clean:
+        keep = set(built.values())
+        for path in glob.glob(os.path.join(asset_dir, '*')):
+            name = os.path.basename(path)
+            for _, suffix in ENCODINGS:
+                name = name[:-len(suffix)] if name.endswith(suffix) else name
+            if name not in keep:
+                os.remove(path)
+    return built
+
+
+class AssetManifest:
+    """원본 이름 -> 빌드된 해시 이름. 빌드 파일이 없거나 원본과 해시가 다르면 원본을 쓴다"""
+
+    def __init__(self, source_dir=SOURCE_DIR, asset_dir=ASSET_DIR, enabled=True):
+        self.source_dir = source_dir
+        self.asset_dir = asset_dir
+        self.files = {}
+        self.encodings = {}  # 해시 이름 -> 미리 만들어 둔 [(Content-Encoding, 접미사)]
+        if enabled:
+            self.load()
+
+    def load(self):
+        files, encodings = {}, {}
+        for path in list_sources(self.source_dir):
+            name = hashed_name(path)
+            target = os.path.join(self.asset_dir, name)
+            if os.path.exists(target):
+                files[os.path.basename(path)] = name
+                encodings[name] = [(enc, suffix) for enc, suffix in ENCODINGS if os.path.exists(target + suffix)]
+            else:
+                print(f"⚠️ 빌드된 정적 파일이 없어 원본을 제공합니다: {os.path.basename(path)} (cd backend && python assets.py)")
+        self.files = files
+        self.encodings = encodings
+
+    def lookup(self, name):
+        return self.files.get(name)
+
+    def is_built(self, filename):
+        return filename in self.encodings
+
+    def choose(self, filename, accept_encodings):
+        """(Content-Encoding 또는 None, 보낼 파일 경로). accept_encodings 는 werkzeug 의 Accept 객체"""
+        path = os.path.join(self.asset_dir, filename)
+        for encoding, suffix in self.encodings[filename]:
+            if accept_encodings.quality(encoding) > 0:
+                return encoding, path + suffix
+        return None, path
+
+
+def asset_mimetype(filename):
+    return MIME_TYPES.get(os.path.splitext(filename)[1], 'application/octet-stream')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CSS/JS 를 해시 이름 + gzip/brotli 압축본으로 빌드")
+    parser.add_argument('--out', default=ASSET_DIR)
+    parser.add_argument('--clean', action='store_true', help="이번 빌드에 없는 예전 파일 삭제 (예전 워커가 모두 재시작된 뒤에)")
+    args = parser.parse_args()
+    print(f"🛠️ 정적 파일 빌드 -> {args.out}" + ("" if brotli else " (brotli 미설치: gzip 만 생성)"))
+    result = build_assets(asset_dir=args.out, clean=args.clean)
+    print(f"✅ {len(result)}개 파일 빌드 완료")
@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+# --- 메모리 LRU 캐시 ---
+# 목록 페이지 응답/조회 결과를 프로세스 메모리에 보관한다.
+# 항목 수(max_entries)와 전체 크기(max_bytes) 중 하나라도 넘으면 가장 오래 안 쓴 항목부터 지운다.
+
+
+class LRUCache:
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, size=0):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # 캐시 전체보다 큰 값은 보관하지 않음
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._items[key] = (value, size)
+            self.total_bytes += size
+            while len(self._items) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def pop(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is not None:
+                self.total_bytes -= item[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
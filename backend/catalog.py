@@ -0,0 +1,142 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy 가 없으면 카탈로그 없이 SQLite 로만 조회
+    np = None
+
+from queries import SPECIES_VALUES, SEX_VALUES, encode_cursor
+
+# --- 메모리 동물 카탈로그 (NumPy 열 배열) ---
+# /animals 의 지역/종/성별 필터 + 등록일 정렬 + 키셋 페이지네이션을 SQLite 대신 벡터 연산으로 처리한다.
+# 동물 한 마리당 정렬 키(int64) 8바이트 + 지역/종/성별 코드 4바이트 = 12바이트만 보관하고,
+# 실제 행(sqlite3.Row)은 요청한 페이지의 animal_id 만 PK 로 조회한다.
+# 키워드 검색은 FTS 인덱스가 필요하므로 카탈로그를 쓰지 않고 SQLite 로 조회한다.
+
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+BLOCK_ROWS = 4096  # 한 번에 검사할 행 수 (부족하면 두 배씩 늘림)
+SPECIES_CODES = {'dog': 0, 'cat': 1}
+SEX_CODES = {None: 0, 'M': 1, 'F': 2}
+
+
+def available():
+    return np is not None
+
+
+def sort_key(register_ymd, animal_id):
+    """(등록일, animal_id) 를 하나의 정수로 합친 정렬 키 (키셋 커서 비교와 같은 순서)"""
+    return (int(register_ymd) << ID_BITS) | int(animal_id)
+
+
+class AnimalCatalog:
+    def __init__(self, keys, region_codes, species_codes, sex_codes, regions):
+        self.keys = keys                  # 오름차순 정렬된 sort_key
+        self.region_codes = region_codes  # regions 리스트의 인덱스
+        self.species_codes = species_codes
+        self.sex_codes = sex_codes
+        self.region_index = {name: i for i, name in enumerate(regions)}
+
+    @classmethod
+    def load(cls, conn):
+        rows = conn.execute("SELECT animal_id, register_ymd, region, species, sex FROM animal_status").fetchall()
+        regions = sorted({row['region'] for row in rows if row['region'] is not None})
+        region_index = {name: i for i, name in enumerate(regions)}
+        missing_region = len(regions)  # region 이 NULL 인 행 (어떤 지역 필터와도 일치하지 않음)
+
+        count = len(rows)
+        keys = np.fromiter((sort_key(row['register_ymd'] or 0, row['animal_id']) for row in rows), dtype=np.int64, count=count)
+        region_codes = np.fromiter((region_index.get(row['region'], missing_region) for row in rows), dtype=np.int16, count=count)
+        species_codes = np.fromiter((SPECIES_CODES.get(row['species'], 0) for row in rows), dtype=np.int8, count=count)
+        sex_codes = np.fromiter((SEX_CODES.get(row['sex'], 0) for row in rows), dtype=np.int8, count=count)
+
+        order = np.argsort(keys, kind='stable')
+        return cls(keys[order], region_codes[order], species_codes[order], sex_codes[order], regions)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.region_codes.nbytes + self.species_codes.nbytes + self.sex_codes.nbytes
+
+    def _filter_codes(self, region, species, sex):
+        """필터 값을 코드로 변환. 없는 지역이면 None"""
+        region_code = None
+        if region is not None:
+            region_code = self.region_index.get(region)
+            if region_code is None:
+                return None
+        return (region_code,
+                None if species is None else SPECIES_CODES[species],
+                None if sex is None else SEX_CODES[sex])
+
+    def _block_hits(self, lo, hi, codes):
+        """[lo, hi) 구간에서 조건에 맞는 행 위치"""
+        region_code, species_code, sex_code = codes
+        mask = np.ones(hi - lo, dtype=bool)
+        if region_code is not None:
+            mask &= self.region_codes[lo:hi] == region_code
+        if species_code is not None:
+            mask &= self.species_codes[lo:hi] == species_code
+        if sex_code is not None:
+            mask &= self.sex_codes[lo:hi] == sex_code
+        return np.flatnonzero(mask) + lo
+
+    def query(self, region=None, species=None, sex=None, newest=True, cursor=None, limit=20):
+        """한 페이지의 (animal_id 리스트, 다음 커서 (register_ymd, animal_id) 또는 None).
+        커서 위치부터 블록 단위로 필요한 만큼만 훑으므로 전체 배열을 매번 검사하지 않는다."""
+        codes = self._filter_codes(region, species, sex)
+        if codes is None:
+            return [], None
+        keys = self.keys
+        want = limit + 1
+        hits = []
+        found = 0
+        block = BLOCK_ROWS
+        if newest:
+            # 최신순 = 키 내림차순: 커서보다 작은 키(배열 앞쪽)를 뒤에서부터
+            hi = len(keys) if cursor is None else int(np.searchsorted(keys, sort_key(*cursor), side='left'))
+            while hi > 0 and found < want:
+                lo = max(0, hi - block)
+                block_hits = self._block_hits(lo, hi, codes)[::-1]
+                hits.append(block_hits)
+                found += len(block_hits)
+                hi = lo
+                block *= 2  # 조건이 까다로우면 블록을 키워 반복 횟수를 줄임
+        else:
+            lo = 0 if cursor is None else int(np.searchsorted(keys, sort_key(*cursor), side='right'))
+            while lo < len(keys) and found < want:
+                hi = min(len(keys), lo + block)
+                block_hits = self._block_hits(lo, hi, codes)
+                hits.append(block_hits)
+                found += len(block_hits)
+                lo = hi
+                block *= 2
+
+        positions = np.concatenate(hits)[:want] if hits else np.empty(0, dtype=np.int64)
+        page_keys = keys[positions[:limit]]
+        ids = [int(k) & ID_MASK for k in page_keys]
+        next_cursor = None
+        if len(positions) > limit:
+            last = int(page_keys[-1])
+            next_cursor = (last >> ID_BITS, last & ID_MASK)
+        return ids, next_cursor
+
+
+def fetch_page(catalog, conn, filters, cursor=None, limit=20):
+    """queries.fetch_animal_page 와 같은 (행 목록, 다음 커서) 를 카탈로그로 계산.
+    키워드 필터는 처리하지 않으므로 호출하는 쪽에서 keyword 가 없을 때만 사용한다."""
+    ids, next_key = catalog.query(
+        region=None if filters['region'] == '전체' else filters['region'],
+        species=SPECIES_VALUES.get(filters['species']),
+        sex=SEX_VALUES.get(filters['gender']),
+        newest=filters['sort'] != 'oldest',
+        cursor=cursor, limit=limit,
+    )
+    if not ids:
+        return [], None
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(f"SELECT * FROM animal_status WHERE animal_id IN ({placeholders})", ids).fetchall()
+    by_id = {row['animal_id']: row for row in rows}
+    rows = [by_id[i] for i in ids if i in by_id]  # 카탈로그 이후 삭제된 행은 건너뜀
+    next_cursor = encode_cursor({'register_ymd': next_key[0], 'animal_id': next_key[1]}) if next_key else None
+    return rows, next_cursor
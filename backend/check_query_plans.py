@@ -0,0 +1,73 @@
+import sqlite3
+import sys
+import os
+
+# app.py 가 쓰는 쿼리 생성 함수(queries.py)를 그대로 가져와서 실제 쿼리 플랜을 확인한다.
+# preprocessing.py 로 DB를 만든 뒤 실행: python check_query_plans.py [DB 경로]
+from db import ANIMAL_DB_PATH, resolve_animal_db
+from queries import build_animal_query, build_hospital_query, build_shelter_query, get_animal_filters
+
+def route_queries(conn):
+    """(이름, SQL, 파라미터) 목록 - 화면별 대표 쿼리"""
+    region = conn.execute("SELECT region FROM animal_status WHERE region IS NOT NULL LIMIT 1").fetchone()
+    region = region[0] if region else '수원시'
+    facility_region = conn.execute("SELECT region FROM hospital_final WHERE region IS NOT NULL LIMIT 1").fetchone()
+    facility_region = facility_region[0] if facility_region else '수원시'
+
+    def animals(**args):
+        return build_animal_query(get_animal_filters(args), cursor=(20240101, 100) if args.pop('_cursor', None) else None)
+
+    return [
+        ('index', "SELECT * FROM animal_status ORDER BY register_ymd DESC, animal_id DESC LIMIT 4", []),
+        ('animals', *animals()),
+        ('animals 다음 페이지', *animals(_cursor=True)),
+        ('animals 오래된순', *animals(sort='oldest')),
+        ('animals 지역', *animals(region=region)),
+        ('animals 고양이+암컷', *animals(species='고양이', gender='암컷')),
+        ('animals 키워드', *animals(keyword='리트리버')),
+        ('animals 두 글자 키워드', *animals(keyword='믹스')),
+        ('animals 키워드 + 두 글자', *animals(keyword='리트리버 수원')),
+        ('animals 마감 임박순', *animals(sort='ending')),
+        ('animals 7일 이내 마감', *animals(ending='7')),
+        ('animals 지역+마감 임박순', *animals(region=region, sort='ending')),
+        ('facets', """SELECT region, COUNT(*), SUM(species = 'dog'), SUM(species = 'cat'), SUM(sex = 'M'), SUM(sex = 'F')
+                      FROM animal_status WHERE region IS NOT NULL AND region != '' GROUP BY region ORDER BY region""", []),
+        ('hospital 지역', *build_hospital_query('', '전체', facility_region)),
+        ('hospital 키워드', *build_hospital_query('동물병원', '전체', '전체')),
+        ('hospital 두 글자 키워드', *build_hospital_query('수원', '전체', '전체')),
+        ('shelter', *build_shelter_query('', '전체')),
+        ('shelter 키워드', *build_shelter_query('보호소', '전체')),
+        ('shelter 두 글자 키워드', *build_shelter_query('수원', '전체')),
+        ('animal 상세', "SELECT * FROM animal_status WHERE animal_id = ?", [1]),
+    ]
+
+def full_scans(plan_rows):
+    """인덱스 없이 테이블 전체를 읽는 단계 (가상 테이블/서브쿼리 결과 스캔은 제외)"""
+    bad = []
+    for row in plan_rows:
+        detail = row[3]
+        if detail.startswith('SCAN ') and 'INDEX' not in detail and 'VIRTUAL TABLE' not in detail \
+                and 'CONSTANT ROW' not in detail and not detail.startswith('SCAN (subquery'):
+            bad.append(detail)
+    return bad
+
+def main(db_path):
+    conn = sqlite3.connect(db_path)
+    failed = 0
+    for name, sql, params in route_queries(conn):
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        bad = full_scans(plan)
+        status = "❌" if bad else "✅"
+        print(f"{status} {name}")
+        for row in plan:
+            print(f"     {row[3]}")
+        failed += bool(bad)
+    conn.close()
+    if failed:
+        print(f"\n인덱스를 쓰지 않는 쿼리 {failed}개")
+        return 1
+    print("\n모든 쿼리가 인덱스를 사용합니다.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else os.path.normpath(resolve_animal_db(ANIMAL_DB_PATH))))
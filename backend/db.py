@@ -0,0 +1,365 @@
+import glob
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# --- SQLite 연결 풀 ---
+# 요청마다 sqlite3.connect / close 를 반복하지 않도록 연결을 재사용한다.
+# 한 연결은 동시에 한 스레드만 사용하므로 check_same_thread=False 로 열어도 안전하다.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 벤치마크 등에서 다른 DB 파일을 쓰려면 환경변수로 경로를 지정
+ANIMAL_DB_PATH = os.environ.get('PETMATCH_ANIMAL_DB', os.path.join(BASE_DIR, '..', 'data', 'processed', 'animal_data.db'))
+USER_DB_PATH = os.environ.get('PETMATCH_USER_DB', os.path.join(BASE_DIR, '..', 'data', 'processed', 'user_data.db'))
+
+ANIMAL_DB_PRAGMAS = [
+    "PRAGMA mmap_size = 268435456",   # 256MB 메모리 맵 (읽기 전용 조회 위주)
+    "PRAGMA cache_size = -32000",     # 약 32MB 페이지 캐시
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA query_only = ON",
+]
+
+ANIMAL_WRITE_DB_PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",
+]
+
+USER_DB_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",      # 찜하기 쓰기 중에도 다른 워커가 읽을 수 있도록
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -8000",
+]
+
+
+def connect(path, pragmas, read_only=False, attach=None):
+    """attach: {별칭: 경로} - 다른 DB 파일을 같은 연결에 붙여 한 쿼리로 JOIN 할 수 있게 함"""
+    if read_only:
+        conn = sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for alias, attach_path in (attach or {}).items():
+        if os.path.exists(attach_path):  # 없는 파일을 ATTACH 하면 빈 DB가 새로 생기므로 건너뜀
+            conn.execute("ATTACH DATABASE ? AS " + alias, (attach_path,))
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+# --- 데이터 버전 (meta.data_version) ---
+# ETL, 관리자 수정, 보관 스케줄러가 동물 DB 를 바꾸면 값을 올리고, 앱은 값이 바뀌면 메모리 캐시를 다시 만든다.
+def get_data_version(conn):
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    except sqlite3.OperationalError:
+        return 0 # meta 테이블이 없는 예전 DB
+    return int(row[0]) if row else 0
+
+def bump_data_version(conn):
+    """쓰기와 같은 트랜잭션 안에서 호출 (commit은 호출한 쪽에서)"""
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("""
+        INSERT INTO meta (key, value) VALUES ('data_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """)
+
+
+def db_file(conn):
+    """연결이 실제로 열고 있는 main DB 파일 경로"""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+# --- 동물 DB 교체 (blue/green) ---
+# ETL 은 서비스 중인 파일을 고치지 않고 새 버전 파일(animal_data.<시각>.db)을 만들어 검증한 뒤,
+# 포인터 파일(animal_data.db.current)에 그 파일 이름을 써서 한 번에 바꾼다. (임시 파일 + os.replace)
+# 앱은 포인터를 주기적으로 확인해 바뀌었으면 풀을 새 파일로 옮긴다. 포인터가 없으면 animal_data.db 를 그대로 쓴다.
+def animal_db_pointer(base=ANIMAL_DB_PATH):
+    return base + '.current'
+
+def resolve_animal_db(base=ANIMAL_DB_PATH):
+    """지금 서비스 중인 동물 DB 파일 경로"""
+    try:
+        with open(animal_db_pointer(base), encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return base
+    return os.path.join(os.path.dirname(base), name) if name else base
+
+def switch_animal_db(path, base=ANIMAL_DB_PATH):
+    """포인터를 path 로 바꿈 (base 와 같은 폴더의 파일이어야 함)"""
+    pointer = animal_db_pointer(base)
+    tmp = pointer + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, pointer)
+
+
+# --- 갱신 중 쓰기 막기 ---
+# 새 버전 파일은 서비스 중인 파일을 복사한 것이라, 복사한 뒤에 서비스 중인 파일에 쓴 내용(관리자 추가/삭제,
+# 보관 스케줄러)은 포인터를 바꾸는 순간 사라진다. 그래서 새 버전을 만드는 동안 잠금 파일(animal_data.db.building)에
+# 갱신 프로세스의 pid 를 적어 두고, 서비스 중인 파일에 쓰는 쪽은 begin_animal_write 로 쓰기 잠금을 잡은 뒤
+# 잠금 파일을 확인해서 있으면 쓰지 않는다. 갱신 쪽은 잠금 파일을 만든 다음 쓰기 잠금을 한 번 잡아서
+# 이미 진행 중인 쓰기가 끝나길 기다린 뒤에 복사하므로, 그 전에 커밋된 쓰기는 모두 복사본에 들어간다.
+# 갱신 프로세스가 죽어서 남은 잠금 파일은 pid 가 살아 있지 않으면 무시한다.
+WRITE_WAIT_TIMEOUT = 60  # 갱신이 진행 중인 쓰기를 기다리는 최대 시간 (초)
+
+
+class AnimalDBFrozen(sqlite3.OperationalError):
+    """갱신 중이라 서비스 중인 동물 DB 에 쓸 수 없음"""
+
+
+def animal_db_lock(base=ANIMAL_DB_PATH):
+    return base + '.building'
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        return True  # Windows 의 os.kill 은 프로세스를 끝내므로 확인하지 않음 (남은 잠금 파일은 직접 삭제)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def animal_db_builder(base=ANIMAL_DB_PATH):
+    """새 버전을 만드는 중이면 그 프로세스의 pid, 아니면 None"""
+    try:
+        with open(animal_db_lock(base), encoding='ascii') as f:
+            pid = int(f.read().split()[0])
+    except (FileNotFoundError, ValueError, IndexError):
+        return None
+    return pid if _pid_alive(pid) else None
+
+def begin_animal_write(conn, base=ANIMAL_DB_PATH):
+    """서비스 중인 동물 DB 에 쓰는 트랜잭션 시작 (BEGIN IMMEDIATE, commit 은 호출한 쪽에서).
+    갱신 중이거나 conn 이 이미 교체된 예전 버전 파일이면 롤백하고 AnimalDBFrozen"""
+    conn.execute("BEGIN IMMEDIATE")
+    if animal_db_builder(base):
+        conn.rollback()
+        raise AnimalDBFrozen("데이터 갱신(ETL)이 진행 중이라 지금은 고칠 수 없습니다. 갱신이 끝난 뒤 다시 시도해 주세요.")
+    if os.path.realpath(db_file(conn)) != os.path.realpath(resolve_animal_db(base)):
+        conn.rollback()
+        raise AnimalDBFrozen("동물 DB 가 새 버전으로 바뀌었습니다. 다시 시도해 주세요.")
+
+
+# --- 새 버전 파일 ---
+def new_version_path(base=ANIMAL_DB_PATH):
+    """base 와 같은 폴더의 animal_data.<시각>.db"""
+    stem = os.path.splitext(base)[0]
+    stamp = time.strftime('%Y%m%d%H%M%S')
+    path = f"{stem}.{stamp}.db"
+    suffix = 1
+    while os.path.exists(path):
+        path = f"{stem}.{stamp}-{suffix}.db"
+        suffix += 1
+    return path
+
+def copy_db(source_path, target_path):
+    """서비스 중인 DB 를 읽기 전용으로 열어 복사 (SQLite 백업 API, 읽는 쪽을 막지 않음)"""
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+def remove_db_file(path):
+    for suffix in ('', '-journal', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+def cleanup_versions(base, keep):
+    """keep (서비스 중인 파일, 바로 전 파일) 만 남기고 예전 버전 파일 삭제"""
+    keep = {os.path.abspath(path) for path in keep}
+    for path in glob.glob(glob.escape(os.path.splitext(base)[0]) + ".*.db"):
+        if os.path.abspath(path) not in keep:
+            remove_db_file(path)
+            print(f"  🗑️ 예전 버전 삭제: {os.path.basename(path)}")
+
+
+class AnimalDBVersion:
+    """서비스 중인 동물 DB 를 복사한 새 버전 파일. with 블록 동안 서비스 중인 파일에는 쓰지 못한다.
+
+        with AnimalDBVersion(base) as version:
+            conn = sqlite3.connect(version.path)   # 새 버전 파일을 고침
+            ...
+            version.publish()                      # 포인터를 바꿔 교체
+
+    publish 하지 않고 끝나면 새 파일은 지운다 (keep = True 면 확인용으로 남김)."""
+
+    def __init__(self, base=ANIMAL_DB_PATH):
+        self.base = base
+        self.path = new_version_path(base)
+        self.active_path = None
+        self.published = False
+        self.keep = False
+
+    def __enter__(self):
+        self._lock()
+        try:
+            self.active_path = resolve_animal_db(self.base)
+            if os.path.exists(self.active_path):
+                # 잠금 파일을 만들기 전에 시작한 쓰기가 끝나길 기다린 뒤 복사
+                conn = sqlite3.connect(self.active_path, timeout=WRITE_WAIT_TIMEOUT)
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.rollback()
+                finally:
+                    conn.close()
+                copy_db(self.active_path, self.path)
+        except BaseException:
+            self._unlock()
+            raise
+        return self
+
+    def publish(self):
+        switch_animal_db(self.path, self.base)
+        self.published = True
+        cleanup_versions(self.base, (self.path, self.active_path))
+
+    def __exit__(self, *exc):
+        if not self.published and not self.keep:
+            remove_db_file(self.path)
+        self._unlock()
+        return False
+
+    def _lock(self):
+        lock = animal_db_lock(self.base)
+        tmp = f"{lock}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='ascii') as f:
+            f.write(f"{os.getpid()}\n")
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp, lock)  # pid 가 다 쓰인 파일을 한 번에 만듦 (이미 있으면 실패)
+                    return
+                except FileExistsError:
+                    pid = animal_db_builder(self.base)
+                    if pid:
+                        raise AnimalDBFrozen(f"다른 갱신이 진행 중입니다 (pid {pid}, {lock})")
+                    try:
+                        os.remove(lock)  # 죽은 갱신 프로세스가 남긴 잠금
+                    except FileNotFoundError:
+                        pass
+            raise AnimalDBFrozen(f"갱신 잠금을 잡지 못했습니다 ({lock})")
+        finally:
+            os.remove(tmp)
+
+    def _unlock(self):
+        lock = animal_db_lock(self.base)
+        try:
+            with open(lock, encoding='ascii') as f:
+                mine = f.read().split()[:1] == [str(os.getpid())]
+            if mine:
+                os.remove(lock)
+        except FileNotFoundError:
+            pass
+
+
+class SQLitePool:
+    """쓰고 난 연결을 돌려받아 다음 요청에 다시 내주는 간단한 연결 풀"""
+
+    def __init__(self, path, pragmas, read_only=False, max_idle=8, attach=None):
+        self.path = path
+        self.pragmas = pragmas
+        self.read_only = read_only
+        self.attach = attach
+        self.max_idle = max_idle
+        self._idle = []
+        self._paths = {}  # id(연결) -> 연 파일 (repoint 전에 빌려 간 연결은 반납될 때 닫음)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            path = self.path
+        conn = connect(path, self.pragmas, self.read_only, self.attach)
+        with self._lock:
+            self._paths[id(conn)] = path
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._close(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle and self._paths.get(id(conn)) == self.path:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    def _close(self, conn):
+        with self._lock:
+            self._paths.pop(id(conn), None)
+        conn.close()
+
+    def repoint(self, path):
+        """새 파일로 전환. 놀고 있는 연결은 바로 닫고, 사용 중인 연결은 요청이 끝나 반납될 때 닫는다"""
+        with self._lock:
+            self.path = path
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+
+class AnimalDBSwitch:
+    """포인터 파일을 최대 interval 초마다 stat 해서 바뀌었으면 풀들을 새 파일로 옮김"""
+
+    def __init__(self, pools, base=ANIMAL_DB_PATH, interval=2.0, on_switch=None):
+        self.pools = pools
+        self.base = base
+        self.interval = interval
+        self.on_switch = on_switch  # on_switch(새 경로): 메모리 캐시 비우기 등
+        self.path = resolve_animal_db(base)
+        self._pointer_mtime = self._stat()
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            return os.stat(animal_db_pointer(self.base)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def check(self, force=False):
+        """바뀌었으면 True. 요청마다 불러도 interval 안에서는 시각 비교만 한다"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            mtime = self._stat()
+            if mtime == self._pointer_mtime:
+                return False
+            path = resolve_animal_db(self.base)
+            if not os.path.exists(path):
+                return False  # 포인터만 먼저 보인 경우 다음 확인 때 다시 시도
+            self._pointer_mtime = mtime
+            if path == self.path:
+                return False
+            for pool in self.pools:
+                pool.repoint(path)
+            self.path = path
+        print(f"🔁 동물 DB 전환: {os.path.basename(path)}")
+        if self.on_switch:
+            self.on_switch(path)
+        return True
@@ -0,0 +1,52 @@
+from cache import LRUCache
+
+# --- 사용자별 찜 목록 캐시 ---
+# 페이지를 볼 때마다 사용자의 찜 목록 전체를 읽지 않도록 animal_id 집합을 프로세스 메모리에 보관한다.
+# user_data.db 의 favorite_versions 에 사용자별 버전을 두고, 찜을 바꾸는 트랜잭션에서 함께 올린다.
+# 요청마다 버전 한 칸만 PK 로 읽어 캐시의 버전과 비교하므로 다른 워커에서 바꾼 찜도 다음 요청에 바로 반영된다.
+
+FAVORITE_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS favorite_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+FAVORITE_CACHE_MAX_ENTRIES = 4096
+
+
+def bump_favorite_version(conn, user_id):
+    """찜을 바꾸는 트랜잭션 안에서 호출 (commit 은 호출한 쪽에서)"""
+    conn.execute("""
+        INSERT INTO favorite_versions (user_id, version) VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+    """, (user_id,))
+
+
+def favorite_version(conn, user_id):
+    row = conn.execute("SELECT version FROM favorite_versions WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+class FavoriteCache:
+    """user_id -> (찜 버전, 찜한 animal_id frozenset)"""
+
+    def __init__(self, pool=None, max_entries=FAVORITE_CACHE_MAX_ENTRIES):
+        self.cache = LRUCache(max_entries)
+        if pool is not None:
+            conn = pool.acquire()
+            try:
+                conn.executescript(FAVORITE_VERSION_SCHEMA)
+            finally:
+                pool.release(conn)
+
+    def get(self, conn, user_id):
+        # 버전을 먼저 읽으므로 그 사이에 찜이 바뀌어도 다음 요청에서 버전이 달라 다시 읽는다
+        version = favorite_version(conn, user_id)
+        cached = self.cache.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached
+        ids = frozenset(row[0] for row in conn.execute('SELECT animal_id FROM favorites WHERE user_id = ?', (user_id,)))
+        entry = (version, ids)
+        self.cache.set(user_id, entry)
+        return entry
@@ -0,0 +1,201 @@
+import argparse
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+from db import (
+    ANIMAL_DB_PATH, ANIMAL_WRITE_DB_PRAGMAS, AnimalDBFrozen, connect, bump_data_version, resolve_animal_db,
+    animal_db_builder, begin_animal_write,
+)
+
+# --- 공고 종료 동물 보관(archive) 스케줄러 ---
+# 공고 종료일(register_end_ymd)이 지난 동물을 animal_status 에서 animal_archive 로 옮겨
+# 목록/검색이 읽는 테이블에는 보호 중인 공고만 남게 한다.
+# - ARCHIVE_BATCH 행씩 나눠서 옮기므로 쓰기 잠금을 오래 잡지 않는다. (배치마다 커밋)
+# - 옮긴 행이 있으면 meta.data_version 을 올려 앱의 목록 캐시/카탈로그를 새로 만든다.
+# - ETL 이 새 버전 파일을 만드는 동안에는 옮기지 않는다. (복사한 뒤에 옮긴 내용은 교체 때 사라지므로 다음 실행으로 미룸)
+# - animal_id 는 그대로 두므로 찜 목록(마이페이지)과 상세 API 는 보관된 동물도 찾을 수 있다.
+# - 보관된 공고가 같은 공고고유번호(source_key)로 다시 들어오면 보관 행을 지우고 예전 animal_id 를 돌려준다.
+# 앱 프로세스 안에서 돌리려면 PETMATCH_ARCHIVE_INTERVAL(초)을 지정하고,
+# 워커가 여러 개면 한 곳에서만 `python lifecycle.py --interval 3600` 으로 따로 실행하면 된다.
+
+ARCHIVE_BATCH = 1000
+ARCHIVE_INTERVAL = 3600
+
+# 공고 종료일 정렬/필터 인덱스 (ETL 의 INDEX_SCRIPT 와 같은 정의, 예전 DB 에도 만들어 둠)
+# animal_id 는 AUTOINCREMENT 가 아니라서 가장 큰 id 가 보관되면 새 행이 그 id 를 다시 받을 수 있다.
+# 그러면 보관된 동물을 찜한 사용자에게 엉뚱한 동물이 보이므로, 새 행의 id 가 보관된 id 와 겹치면 보관된 id 보다 크게 옮긴다.
+# (한 번 옮기면 다음 행부터는 MAX+1 이 이미 더 크므로 대부분의 INSERT 에서는 WHEN 조건만 확인)
+# 다시 공고된 동물(보관 행과 source_key 가 같음)은 보관 행의 id 를 그대로 받고 보관 행은 지운다.
+# 그래서 찜한 사용자는 같은 id 로 다시 보호 중인 공고를 보게 되고 보관/보호 중 행이 함께 남지 않는다.
+# (예전 id 를 다른 행이 쓰고 있으면 되돌리지 않고 새 id 규칙만 적용)
+RELISTED_ID_SQL = """(
+    SELECT r.animal_id FROM animal_archive r WHERE r.source_key = new.source_key
+    AND NOT EXISTS (SELECT 1 FROM animal_status s WHERE s.animal_id = r.animal_id AND s.animal_id != new.animal_id)
+    LIMIT 1)"""
+
+END_INDEX_SCRIPT = f"""
+CREATE INDEX IF NOT EXISTS idx_animal_end ON animal_status(register_end_ymd, animal_id);
+CREATE INDEX IF NOT EXISTS idx_animal_region_end ON animal_status(region, register_end_ymd);
+CREATE INDEX IF NOT EXISTS idx_archive_source_key ON animal_archive(source_key);
+CREATE TRIGGER IF NOT EXISTS animal_status_relisted AFTER INSERT ON animal_status
+WHEN {RELISTED_ID_SQL} IS NOT NULL
+BEGIN
+    UPDATE animal_status SET animal_id = {RELISTED_ID_SQL}
+    WHERE animal_id = new.animal_id;
+    DELETE FROM animal_archive WHERE source_key = new.source_key;
+END;
+CREATE TRIGGER IF NOT EXISTS animal_status_id_after_archive AFTER INSERT ON animal_status
+WHEN EXISTS (SELECT 1 FROM animal_archive WHERE animal_id = new.animal_id) AND {RELISTED_ID_SQL} IS NULL
+BEGIN
+    UPDATE animal_status SET animal_id = (SELECT MAX(animal_id) + 1 FROM animal_archive)
+    WHERE animal_id = new.animal_id;
+END;
+"""
+
+
+def today_ymd(today=None):
+    return int((today or datetime.date.today()).strftime('%Y%m%d'))
+
+
+def stored_columns(conn, table):
+    """generated 컬럼을 뺀 실제 저장 컬럼 [(이름, 타입)]"""
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA table_xinfo({table})") if row[6] == 0]
+
+
+def ensure_schema(conn):
+    """animal_archive 를 animal_status 의 저장 컬럼 + archived_at 으로 만들고, 새로 생긴 컬럼은 추가"""
+    live = stored_columns(conn, 'animal_status')
+    if not live:
+        return  # ETL 전의 빈 DB
+    existing = {name for name, _ in stored_columns(conn, 'animal_archive')}
+    if not existing:
+        columns = ',\n    '.join('animal_id INTEGER PRIMARY KEY' if name == 'animal_id' else f'{name} {col_type}'
+                                  for name, col_type in live)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS animal_archive (
+                {columns},
+                archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )""")
+    else:
+        for name, col_type in live:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE animal_archive ADD COLUMN {name} {col_type}")
+    # 다시 공고된 경우를 빼는 조건이 없는 예전 트리거는 새로 만든다
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'animal_status_id_after_archive'").fetchone()
+    if row and 'source_key' not in row[0]:
+        conn.execute("DROP TRIGGER animal_status_id_after_archive")
+    conn.executescript(END_INDEX_SCRIPT)
+    order_id_triggers(conn)
+    conn.commit()
+
+
+def order_id_triggers(conn):
+    """id 를 옮기는 트리거가 검색/위치 인덱스 트리거보다 나중에 실행되도록 인덱스 트리거를 다시 만든다.
+    SQLite 는 나중에 만든 트리거부터 실행하는데, 인덱스에 새 행이 들어가기 전에 id 를 옮기면
+    FTS 가 없는 행을 지우게 되어 인덱스가 깨진다."""
+    rows = conn.execute("SELECT rowid, name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'animal_status'").fetchall()
+    id_triggers = ('animal_status_relisted', 'animal_status_id_after_archive')
+    newest = max((rowid for rowid, name, _ in rows if name in id_triggers), default=0)
+    for rowid, name, sql in sorted(rows, key=lambda r: r[0]):
+        if name not in id_triggers and rowid < newest:
+            conn.execute(f"DROP TRIGGER {name}")
+            conn.execute(sql)
+
+
+def archive_expired(conn, today=None, batch=ARCHIVE_BATCH, base=None):
+    """공고 종료일이 오늘보다 이전인 동물을 배치 단위로 옮기고, 옮긴 행 수를 반환.
+    base 를 주면 서비스 중인 파일로 보고 배치마다 갱신 중인지 확인 (갱신 중이면 AnimalDBFrozen)"""
+    if base and animal_db_builder(base):
+        raise AnimalDBFrozen("데이터 갱신(ETL)이 진행 중이라 보관 처리를 건너뜁니다.")
+    ensure_schema(conn)
+    cutoff = today_ymd(today)
+    columns = ', '.join(name for name, _ in stored_columns(conn, 'animal_status'))
+    moved = 0
+    while True:
+        with conn:
+            if base:
+                try:
+                    begin_animal_write(conn, base)
+                except AnimalDBFrozen:
+                    if not moved:
+                        raise
+                    break  # 앞 배치는 복사 전에 커밋됐으므로 data_version 만 올리고 나머지는 다음 실행으로
+            # 종료일 인덱스(idx_animal_end)로 지난 공고만 찾는다. 종료일이 없는 행(0)은 건드리지 않음
+            ids = [r[0] for r in conn.execute(
+                "SELECT animal_id FROM animal_status WHERE register_end_ymd > 0 AND register_end_ymd < ? LIMIT ?",
+                (cutoff, batch))]
+            if not ids:
+                break
+            id_json = json.dumps(ids)
+            conn.execute(f"""
+                INSERT OR REPLACE INTO animal_archive ({columns})
+                SELECT {columns} FROM animal_status WHERE animal_id IN (SELECT value FROM json_each(?))
+            """, (id_json,))
+            conn.execute("DELETE FROM animal_status WHERE animal_id IN (SELECT value FROM json_each(?))", (id_json,))
+            moved += len(ids)
+    if moved:
+        with conn:
+            bump_data_version(conn)
+    return moved
+
+
+class ArchiveScheduler:
+    """interval 초마다 archive_expired 를 실행하는 백그라운드 스레드"""
+
+    def __init__(self, db_path=ANIMAL_DB_PATH, interval=ARCHIVE_INTERVAL, on_archived=None):
+        self.db_path = db_path  # 기본 경로 (ETL 이 파일을 바꾸면 실행할 때마다 포인터를 따라감)
+        self.interval = interval
+        self.on_archived = on_archived  # 옮긴 행이 있을 때 호출 (앱의 data_version 캐시 만료 등)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        conn = connect(resolve_animal_db(self.db_path), ANIMAL_WRITE_DB_PRAGMAS)
+        try:
+            moved = archive_expired(conn, base=self.db_path)
+        except AnimalDBFrozen as e:
+            print(f"ℹ️ {e}")
+            moved = 0
+        finally:
+            conn.close()
+        if moved:
+            print(f"📦 공고 종료 동물 {moved}건 보관 처리")
+            if self.on_archived:
+                self.on_archived(moved)
+        return moved
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"보관 처리 실패: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='petmatch-archive', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="공고 종료 동물 보관 처리 (animal_status -> animal_archive)")
+    parser.add_argument('--db', default=ANIMAL_DB_PATH)
+    parser.add_argument('--interval', type=int, default=0, help="초 단위 반복 간격 (0 이면 한 번만 실행)")
+    args = parser.parse_args()
+    scheduler = ArchiveScheduler(args.db, args.interval)
+    if args.interval <= 0:
+        scheduler.run_once()
+    else:
+        while True:
+            try:
+                scheduler.run_once()
+            except sqlite3.Error as e:
+                print(f"보관 처리 실패: {e}")
+            time.sleep(args.interval)
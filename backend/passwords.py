@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+from cache import LRUCache
+
+# --- 비밀번호 해시 ---
+# 해시 방식은 Werkzeug 형식 문자열로 설정한다. (저장된 해시 앞부분 "<방식>$salt$hash" 에 그대로 남음)
+#   scrypt:32768:8:1        (기본값, Werkzeug 기본과 같음)
+#   pbkdf2:sha256:600000    (반복 횟수 지정)
+# 로그인에 성공했을 때 저장된 해시의 방식이 설정과 다르면 새 방식으로 다시 저장한다.
+#
+# 해시 계산은 CPU 를 많이 쓰므로 크기가 정해진 스레드 풀에서만 실행한다.
+# 로그인이 몰려도 동시에 계산하는 해시는 HASH_WORKERS 개뿐이라 페이지 요청이 밀리지 않고,
+# 대기 중인 계산이 HASH_MAX_PENDING 을 넘으면 바로 PasswordBusy 로 거절한다.
+
+PASSWORD_METHOD = os.environ.get('PETMATCH_PASSWORD_METHOD', 'scrypt:32768:8:1')
+PASSWORD_SALT_LENGTH = 16
+HASH_WORKERS = int(os.environ.get('PETMATCH_HASH_WORKERS', max(1, min(4, (os.cpu_count() or 2) // 2))))
+HASH_MAX_PENDING = int(os.environ.get('PETMATCH_HASH_MAX_PENDING', 64))
+HASH_TIMEOUT = 10.0  # 풀에서 기다리는 시간 포함 (초)
+
+
+class PasswordBusy(Exception):
+    """해시 계산 대기열이 가득 참"""
+
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='petmatch-hash')
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _run(func, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordBusy()
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    # 자리는 계산이 실제로 끝날 때(또는 시작 전에 취소될 때) 돌려준다.
+    # 시간 초과로 먼저 응답해도 이미 도는 해시는 멈출 수 없으므로 그동안 자리를 계속 차지한다.
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()
+        raise PasswordBusy()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_METHOD, PASSWORD_SALT_LENGTH)
+
+
+def verify_password(stored_hash, password):
+    return _run(check_password_hash, stored_hash, password)
+
+
+# 비용을 생략한 설정(예: "scrypt", "pbkdf2")도 Werkzeug 는 기본값을 채워 "scrypt:32768:8:1" 처럼 저장한다
+METHOD_DEFAULTS = {
+    'scrypt': ('32768', '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+def parse_method(method):
+    """Werkzeug 방식 문자열 -> (방식, 매개변수 튜플). 생략한 매개변수는 Werkzeug 기본값으로 채움"""
+    name, *params = method.split(':')
+    defaults = METHOD_DEFAULTS.get(name, ())
+    return name, tuple(params) + defaults[len(params):]
+
+
+def needs_rehash(stored_hash):
+    """저장된 해시의 방식/비용이 현재 설정과 다르면 True"""
+    return parse_method(stored_hash.split('$', 1)[0]) != parse_method(PASSWORD_METHOD)
+
+
+# 없는 이메일도 같은 시간만큼 걸리도록 비교용으로 쓰는 해시 (가입 여부 추측 방지)
+# 앱이 시작할 때 prepare_dummy_hash() 로 미리 만들어 둔다. 첫 요청에서 만들면 그 요청만 느려져 티가 나므로.
+# 만드는 것도 해시 풀(_run)에서 하므로 동시 계산 수 제한을 벗어나지 않는다.
+_dummy_hash = None
+_dummy_lock = threading.Lock()
+
+def prepare_dummy_hash():
+    global _dummy_hash
+    with _dummy_lock:
+        if _dummy_hash is None:
+            _dummy_hash = _run(generate_password_hash, 'petmatch-dummy', PASSWORD_METHOD, PASSWORD_SALT_LENGTH)
+        return _dummy_hash
+
+def verify_dummy(password):
+    verify_password(prepare_dummy_hash(), password)
+    return False
+
+
+# --- 로그인 시도 제한 ---
+# 이메일별 / IP 별로 최근 window 초 안의 실패 횟수를 메모리에 기록하고, 한도를 넘으면 잠시 막는다.
+# 키 수는 LRUCache 로 제한하므로 많은 IP 에서 시도해도 메모리가 계속 늘지 않는다.
+LOGIN_WINDOW = 300.0
+LOGIN_MAX_FAILURES_PER_EMAIL = 5
+LOGIN_MAX_FAILURES_PER_IP = 20
+
+
+class LoginRateLimiter:
+    def __init__(self, window=LOGIN_WINDOW, max_per_email=LOGIN_MAX_FAILURES_PER_EMAIL,
+                 max_per_ip=LOGIN_MAX_FAILURES_PER_IP, max_keys=10000):
+        self.window = window
+        self.limits = {'email': max_per_email, 'ip': max_per_ip}
+        self._failures = LRUCache(max_entries=max_keys)  # (종류, 값) -> deque[실패 시각]
+        self._lock = threading.Lock()
+
+    def _keys(self, email, ip):
+        return [('email', email.strip().lower()), ('ip', ip or '-')]
+
+    def retry_after(self, email, ip):
+        """막혀 있으면 다시 시도할 수 있을 때까지 남은 초, 아니면 0"""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key in self._keys(email, ip):
+                attempts = self._failures.get(key)
+                if not attempts:
+                    continue
+                while attempts and now - attempts[0] >= self.window:
+                    attempts.popleft()
+                if len(attempts) >= self.limits[key[0]]:
+                    wait = max(wait, self.window - (now - attempts[0]))
+        return int(wait) + 1 if wait else 0
+
+    def record_failure(self, email, ip):
+        now = time.monotonic()
+        with self._lock:
+            for key in self._keys(email, ip):
+                attempts = self._failures.get(key)
+                if attempts is None:
+                    attempts = deque(maxlen=self.limits[key[0]])
+                    self._failures.set(key, attempts)
+                attempts.append(now)
+
+    def record_success(self, email):
+        with self._lock:
+            self._failures.pop(('email', email.strip().lower()))
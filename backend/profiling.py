@@ -0,0 +1,224 @@
+import re
+import threading
+import time
+from flask import g, request, has_request_context, before_render_template, template_rendered
+
+# --- 요청/SQL 프로파일링 ---
+# PETMATCH_PROFILE=1 일 때만 켜진다. 꺼져 있으면 훅도 연결 래퍼도 설치하지 않으므로 오버헤드가 없다.
+# - SQL 문장별 실행 시간/호출 수/행 수 (연결을 ProfiledConnection 으로 감싸서 측정)
+# - 요청별 DB / 템플릿 / 나머지 시간 -> Server-Timing 응답 헤더
+# - 라우트별 누적 통계 -> /admin/metrics (HTML, Prometheus 텍스트)
+
+MAX_TRACKED_QUERIES = 500  # 서로 다른 SQL 문장은 이만큼만 집계 (메모리 상한)
+_whitespace = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    return _whitespace.sub(' ', sql).strip()
+
+
+class ProfiledCursor:
+    """fetch 시간과 행 수를 같은 SQL 항목에 더해 주는 커서 래퍼"""
+
+    def __init__(self, cursor, profiler, key):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._key = key
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._profiler.record_query(self._key, time.perf_counter() - started, len(rows), calls=0)
+        return rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._profiler.record_query(self._key, time.perf_counter() - started, int(row is not None), calls=0)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._profiler.record_query(self._key, time.perf_counter() - started, len(rows), calls=0)
+        return rows
+
+    def __iter__(self):
+        started = time.perf_counter()
+        count = 0
+        for row in self._cursor:
+            count += 1
+            yield row
+        self._profiler.record_query(self._key, time.perf_counter() - started, count, calls=0)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """sqlite3.Connection 대신 쓰는 래퍼. execute 계열만 측정하고 나머지는 그대로 넘긴다."""
+
+    def __init__(self, conn, profiler):
+        self.raw = conn
+        self._profiler = profiler
+
+    def execute(self, sql, params=()):
+        started = time.perf_counter()
+        cursor = self.raw.execute(sql, params)
+        key = normalize_sql(sql)
+        self._profiler.record_query(key, time.perf_counter() - started, max(cursor.rowcount, 0))
+        return ProfiledCursor(cursor, self._profiler, key)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        cursor = self.raw.executemany(sql, seq_of_params)
+        self._profiler.record_query(normalize_sql(sql), time.perf_counter() - started, max(cursor.rowcount, 0))
+        return cursor
+
+    def __enter__(self):
+        self.raw.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.raw.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def unwrap(conn):
+    return conn.raw if isinstance(conn, ProfiledConnection) else conn
+
+
+class Profiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = {}  # sql -> {'calls', 'seconds', 'max', 'rows'}
+        self.routes = {}   # endpoint -> {'count', 'seconds', 'max', 'db', 'template'}
+
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+
+    def wrap(self, conn):
+        return ProfiledConnection(conn, self)
+
+    # --- 수집 ---
+    def record_query(self, key, seconds, rows, calls=1):
+        if has_request_context() and 'profile' in g:
+            g.profile['db'] += seconds
+            g.profile['queries'] += calls
+        with self._lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                if len(self.queries) >= MAX_TRACKED_QUERIES:
+                    return
+                stats = self.queries[key] = {'calls': 0, 'seconds': 0.0, 'max': 0.0, 'rows': 0}
+            stats['calls'] += calls
+            stats['seconds'] += seconds
+            stats['rows'] += rows
+            # execute 와 fetch 를 따로 재므로 최대값은 호출 단위가 아닌 측정 단위 기준
+            stats['max'] = max(stats['max'], seconds)
+
+    def _start_request(self):
+        g.profile = {'start': time.perf_counter(), 'db': 0.0, 'queries': 0, 'template': 0.0, 'template_start': None}
+
+    def _start_template(self, sender, template, context, **extra):
+        if 'profile' in g:
+            g.profile['template_start'] = time.perf_counter()
+
+    def _finish_template(self, sender, template, context, **extra):
+        if 'profile' in g and g.profile['template_start'] is not None:
+            g.profile['template'] += time.perf_counter() - g.profile['template_start']
+            g.profile['template_start'] = None
+
+    def _finish_request(self, response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        total = time.perf_counter() - profile['start']
+        db, template = profile['db'], profile['template']
+        other = max(total - db - template, 0.0)
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={db * 1000:.2f};desc="SQL x{profile["queries"]}"',
+            f'tpl;dur={template * 1000:.2f}',
+            f'app;dur={other * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        endpoint = request.endpoint or 'unknown'
+        with self._lock:
+            stats = self.routes.setdefault(endpoint, {'count': 0, 'seconds': 0.0, 'max': 0.0, 'db': 0.0, 'template': 0.0})
+            stats['count'] += 1
+            stats['seconds'] += total
+            stats['max'] = max(stats['max'], total)
+            stats['db'] += db
+            stats['template'] += template
+        return response
+
+    # --- 조회 ---
+    def slowest_queries(self, limit=20):
+        with self._lock:
+            items = [dict(stats, sql=sql) for sql, stats in self.queries.items()]
+        return sorted(items, key=lambda s: s['seconds'], reverse=True)[:limit]
+
+    def slowest_routes(self, limit=20):
+        with self._lock:
+            items = [dict(stats, endpoint=endpoint) for endpoint, stats in self.routes.items()]
+        return sorted(items, key=lambda s: s['seconds'] / s['count'], reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+            self.routes.clear()
+
+    def prometheus(self, gauges=None, counters=None):
+        """Prometheus 텍스트 포맷 (gauges / counters: 추가로 내보낼 {이름: 값}, prometheus_values 참고)"""
+        with self._lock:
+            routes = {k: dict(v) for k, v in self.routes.items()}
+            queries = {k: dict(v) for k, v in self.queries.items()}
+
+        lines = []
+        def metric(name, kind, help_text, samples):
+            lines.extend(format_metric(name, kind, help_text, samples))
+
+        metric('petmatch_request_seconds', 'summary', '라우트별 요청 처리 시간',
+               [(f'petmatch_request_seconds_{suffix}', {'endpoint': e}, s[key])
+                for e, s in routes.items() for suffix, key in (('sum', 'seconds'), ('count', 'count'))])
+        for name, key, help_text in [('petmatch_request_db_seconds_total', 'db', '라우트별 SQL 실행 시간 합계'),
+                                     ('petmatch_request_template_seconds_total', 'template', '라우트별 템플릿 렌더링 시간 합계')]:
+            metric(name, 'counter', help_text, [(name, {'endpoint': e}, s[key]) for e, s in routes.items()])
+        metric('petmatch_request_max_seconds', 'gauge', '라우트별 가장 느린 요청',
+               [('petmatch_request_max_seconds', {'endpoint': e}, s['max']) for e, s in routes.items()])
+        for name, key, help_text in [('petmatch_sql_seconds_total', 'seconds', 'SQL 문장별 실행 시간 합계'),
+                                     ('petmatch_sql_calls_total', 'calls', 'SQL 문장별 실행 횟수'),
+                                     ('petmatch_sql_rows_total', 'rows', 'SQL 문장별 반환/변경 행 수')]:
+            metric(name, 'counter', help_text, [(name, {'query': q}, s[key]) for q, s in queries.items()])
+        return '\n'.join(lines) + '\n' + prometheus_values(gauges, counters)
+
+
+def format_metric(name, kind, help_text, samples):
+    """samples: (샘플 이름, 라벨 dict, 값) 목록 -> HELP / TYPE / 샘플 줄 목록"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for sample_name, labels, value in samples:
+        label_text = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+        lines.append(f'{sample_name}{{{label_text}}} {value}' if label_text else f'{sample_name} {value}')
+    return lines
+
+
+def prometheus_values(gauges=None, counters=None):
+    """캐시 등 앱이 따로 세는 값 (프로파일링이 꺼져 있어도 내보냄).
+    counters 는 늘어나기만 하는 누적 횟수라 counter 형식에 _total 을 붙이고 (워커 재시작 후 rate() 가 맞도록),
+    gauges 는 크기/항목 수처럼 지금 시점의 값"""
+    lines = []
+    for name, value in (counters or {}).items():
+        total = name if name.endswith('_total') else f'{name}_total'
+        lines.extend(format_metric(total, 'counter', name, [(total, {}, value)]))
+    for name, value in (gauges or {}).items():
+        lines.extend(format_metric(name, 'gauge', name, [(name, {}, value)]))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,307 @@
+import base64
+import datetime
+import json
+import math
+
+# --- 조회 쿼리 생성 함수 ---
+# Flask 화면(app.py)과 비동기 API(asgi.py)가 같은 SQL 을 쓰도록 모아 둔 모듈.
+# 웹 프레임워크에 의존하지 않고, 쿼리스트링은 dict 처럼 .get() 이 되는 값이면 된다.
+
+# --- 키워드 검색 (FTS5 trigram / bigram 인덱스) ---
+# 3글자 이상 단어는 trigram 인덱스(<이름>_fts), 두 글자 단어는 ETL 이 만든 bigram 인덱스(<이름>_bigram)로 찾는다.
+# 한 글자 단어만 인덱스를 쓸 수 없어서, 다른 단어의 인덱스 조건으로 좁혀진 행에 LIKE 로 확인한다.
+FTS_MIN_KEYWORD = 3  # trigram 인덱스는 3글자 이상 단어에만 적용됨
+BIGRAM_KEYWORD = 2
+
+def split_keyword(keyword):
+    """검색어 -> (3글자 이상 단어, 두 글자 단어, 한 글자 단어)"""
+    terms = keyword.split()
+    return ([t for t in terms if len(t) >= FTS_MIN_KEYWORD],
+            [t for t in terms if len(t) == BIGRAM_KEYWORD],
+            [t for t in terms if len(t) < BIGRAM_KEYWORD])
+
+def fts_phrases(terms):
+    """단어 목록을 FTS5 MATCH 식으로 (단어별 일치, AND 결합). 단어가 없으면 None"""
+    return ' '.join('"' + t.replace('"', '""') + '"' for t in terms) or None
+
+def build_fts_match(keyword):
+    """3글자 이상 단어만 trigram MATCH 식으로 변환 (없으면 None)"""
+    return fts_phrases(split_keyword(keyword)[0])
+
+def build_bigram_match(keyword):
+    """두 글자 단어만 bigram MATCH 식으로 변환 (없으면 None)"""
+    return fts_phrases(split_keyword(keyword)[1])
+
+def keyword_conditions(keyword, pk, fts, columns, trigram=True):
+    """검색어 -> (AND 로 이을 WHERE 조건 목록, 파라미터).
+    trigram=False 면 3글자 이상 단어 조건은 호출한 쪽이 FTS 표를 JOIN 해서 처리한다 (관련도 정렬용)"""
+    long_terms, short_terms, single_chars = split_keyword(keyword)
+    conditions, params = [], []
+    if trigram and long_terms:
+        conditions.append(f"{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)")
+        params.append(fts_phrases(long_terms))
+    if short_terms:
+        bigram = fts.replace('_fts', '_bigram')
+        conditions.append(f"{pk} IN (SELECT rowid FROM {bigram} WHERE {bigram} MATCH ?)")
+        params.append(fts_phrases(short_terms))
+    for term in single_chars:
+        conditions.append('(' + ' OR '.join(f"{col} LIKE ?" for col in columns) + ')')
+        params.extend([f'%{term}%'] * len(columns))
+    return conditions, params
+
+
+# --- 유기동물 목록 (키셋 페이지네이션) ---
+ANIMAL_PAGE_SIZE = 20   # 한 번에 보여줄 카드 수 (무한 스크롤 단위)
+MAX_PAGE_SIZE = 100
+SPECIES_VALUES = {'개': 'dog', '고양이': 'cat'}
+SEX_VALUES = {'수컷': 'M', '암컷': 'F'}
+# 정렬 -> (정렬 날짜 컬럼, 방향). ending(마감 임박순)은 오늘 이후 종료되는 공고만 종료일 순으로
+ANIMAL_SORTS = {
+    'newest': ('register_ymd', 'DESC'),
+    'oldest': ('register_ymd', 'ASC'),
+    'ending': ('register_end_ymd', 'ASC'),
+}
+ENDING_DAYS_CHOICES = (3, 7, 14)  # "N일 이내 마감" 필터 값
+
+def encode_cursor(row, column='register_ymd'):
+    """마지막 행의 (정렬 날짜, animal_id)를 URL에 넣을 수 있는 커서 문자열로 변환"""
+    raw = f"{row[column]}|{row['animal_id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """커서 문자열을 (정렬 날짜, animal_id) 튜플로 복원. 잘못된 값이면 None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        reg_ymd, animal_id = raw.rsplit('|', 1)
+        return int(reg_ymd), int(animal_id)
+    except (ValueError, UnicodeError):
+        return None
+
+def encode_key_cursor(values):
+    """정렬 키 값들(문자열/숫자/None)을 커서 문자열로 변환. 정렬 컬럼이 여러 종류인 관리자 목록용"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_key_cursor(cursor, length=2):
+    """encode_key_cursor 의 반대. 잘못된 값이면 None"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        return None
+    return values
+
+def get_animal_filters(args):
+    """쿼리스트링에서 목록 필터 값을 꺼냄 (HTML 페이지와 JSON API 공용)"""
+    return {
+        'keyword': args.get('keyword', ''),
+        'region': args.get('region', '전체'),
+        'species': args.get('species', '전체'),
+        'gender': args.get('gender', '전체'),
+        'sort': args.get('sort', 'newest') if args.get('sort') in ANIMAL_SORTS else 'newest',
+        'ending_days': get_ending_days(args),
+    }
+
+def get_ending_days(args):
+    try:
+        days = int(args.get('ending', 0))
+    except ValueError:
+        return None
+    return days if days in ENDING_DAYS_CHOICES else None
+
+def ymd_after(days, today=None):
+    """오늘부터 days 일 뒤 날짜를 YYYYMMDD 정수로"""
+    return int(((today or datetime.date.today()) + datetime.timedelta(days=days)).strftime('%Y%m%d'))
+
+def get_page_size(args):
+    try:
+        size = int(args.get('page_size', ANIMAL_PAGE_SIZE))
+    except ValueError:
+        size = ANIMAL_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+def build_animal_query(filters, cursor=None, limit=ANIMAL_PAGE_SIZE, today=None):
+    """필터 + 키셋(정렬 날짜, animal_id) 페이지네이션 SQL 생성.
+    다음 페이지 존재 여부를 알기 위해 limit + 1 건을 조회한다."""
+    sql = "SELECT * FROM animal_status WHERE 1=1"
+    params = []
+
+    if filters['keyword']:
+        conditions, keyword_params = keyword_conditions(filters['keyword'], 'animal_id', 'animal_fts',
+                                                        ['breed', 'shelter_name'])
+        for condition in conditions:
+            sql += f" AND {condition}"
+        params.extend(keyword_params)
+    # 지역 드롭다운 값은 region 컬럼 값 그대로이므로 인덱스를 쓰는 일치 비교
+    if filters['region'] != '전체':
+        sql += " AND region = ?"
+        params.append(filters['region'])
+    # species / sex / register_ymd 는 ETL 이 만든 정규화 컬럼 (인덱스 사용)
+    if filters['species'] in SPECIES_VALUES:
+        sql += " AND species = ?"
+        params.append(SPECIES_VALUES[filters['species']])
+    if filters['gender'] in SEX_VALUES:
+        sql += " AND sex = ?"
+        params.append(SEX_VALUES[filters['gender']])
+
+    # 마감 임박순 / N일 이내 마감: 이미 끝난 공고는 제외 (종료일 인덱스 범위 조회)
+    if filters['sort'] == 'ending' or filters['ending_days']:
+        sql += " AND register_end_ymd >= ?"
+        params.append(ymd_after(0, today))
+    if filters['ending_days']:
+        sql += " AND register_end_ymd <= ?"
+        params.append(ymd_after(filters['ending_days'], today))
+
+    column, direction = ANIMAL_SORTS[filters['sort']]
+    if cursor:
+        sql += f" AND ({column}, animal_id) {'<' if direction == 'DESC' else '>'} (?, ?)"
+        params.extend(cursor)
+    sql += f" ORDER BY {column} {direction}, animal_id {direction}"
+
+    sql += " LIMIT ?"
+    params.append(limit + 1)
+    return sql, params
+
+def fetch_animal_page(conn, filters, cursor=None, limit=ANIMAL_PAGE_SIZE):
+    """한 페이지 분량의 동물 목록과 다음 페이지 커서를 반환 (마지막 페이지면 커서는 None)"""
+    sql, params = build_animal_query(filters, cursor, limit)
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], ANIMAL_SORTS[filters['sort']][0])
+    return rows, next_cursor
+
+# --- 동물 상세 ---
+def fetch_animal_detail(conn, animal_id):
+    """상세 팝업 정보 (dict, 없으면 빈 dict). 보호소 전화/주소/수용능력은 ETL 이 미리 복사해 두었으므로 PK 조회 한 번.
+    공고가 끝나 animal_archive 로 옮겨진 동물(찜 목록에서 여는 경우)은 archived=True 로 표시한다.
+    같은 공고가 다시 보호 중이면(source_key 가 같은 animal_status 행) 보관 행 대신 그 행을 돌려준다"""
+    row = conn.execute("SELECT * FROM animal_status WHERE animal_id = ?", (animal_id,)).fetchone()
+    if row:
+        return dict(row)
+    row = conn.execute("SELECT * FROM animal_archive WHERE animal_id = ?", (animal_id,)).fetchone()
+    if not row:
+        return {}
+    live = conn.execute("SELECT * FROM animal_status WHERE source_key = ?", (row['source_key'],)).fetchone()
+    return dict(live) if live else dict(row, archived=True)
+
+# --- 병원/약국 ---
+def build_hospital_query(keyword, type_filter, region_filter):
+    """병원/약국 목록 SQL 생성. 키워드가 있으면 각각의 FTS 인덱스로 찾고 관련도(rank) 순으로 정렬"""
+    match = build_fts_match(keyword) if keyword else None
+    params = []
+    branches = []
+    for type_name, (table, _, pk) in FACILITY_SOURCES.items():
+        fts = table.replace('_final', '_fts')
+        if match:
+            branch = (f"SELECT t.{pk} as id, t.name, t.address, t.phone, t.region, '{type_name}' as type, f.rank as score "
+                      f"FROM {table} t JOIN {fts} f ON f.rowid = t.{pk} WHERE {fts} MATCH ?")
+            params.append(match)
+        else:
+            branch = (f"SELECT t.{pk} as id, t.name, t.address, t.phone, t.region, '{type_name}' as type, 0 as score "
+                      f"FROM {table} t WHERE 1=1")
+        if keyword:
+            conditions, keyword_params = keyword_conditions(keyword, f"t.{pk}", fts, ['t.name', 't.address'],
+                                                            trigram=False)
+            branch += ''.join(f" AND {condition}" for condition in conditions)
+            params.extend(keyword_params)
+        branches.append(branch)
+    sub_query = " UNION ALL ".join(branches)
+
+    base_query = f"SELECT * FROM ({sub_query}) WHERE 1=1"
+    if type_filter != '전체':
+        base_query += " AND type = ?"
+        params.append(type_filter)
+    if region_filter != '전체':
+        base_query += " AND region = ?"  # 드롭다운 값 = 시군명 (region 인덱스 사용)
+        params.append(region_filter)
+    base_query += " ORDER BY score ASC, name ASC"
+    return base_query, params
+
+# --- 내 주변 병원/약국 (R*Tree 반경 검색) ---
+NEARBY_DEFAULT_RADIUS_KM = 3
+NEARBY_MAX_RADIUS_KM = 50
+NEARBY_DEFAULT_LIMIT = 20
+NEARBY_MAX_LIMIT = 100
+EARTH_RADIUS_KM = 6371.0
+
+# 구분 -> (테이블, R*Tree, PK)
+FACILITY_SOURCES = {
+    '동물병원': ('hospital_final', 'hospital_rtree', 'hospital_id'),
+    '동물약국': ('pharmacy_final', 'pharmacy_rtree', 'pharmacy_id'),
+}
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def find_nearby_facilities(conn, lat, lon, radius_km, types, limit):
+    """반경을 감싸는 사각형으로 R*Tree 후보를 찾고, 실제 거리로 걸러 가까운 순 limit 건 반환"""
+    dlat = radius_km / 111.32
+    dlon = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+    results = []
+    for type_name in types:
+        table, rtree, pk = FACILITY_SOURCES[type_name]
+        rows = conn.execute(f"""
+            SELECT f.{pk} AS id, f.name, f.address, f.phone, f.region, f.lat, f.lon
+            FROM {rtree} r JOIN {table} f ON f.{pk} = r.id
+            WHERE r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ?
+        """, (lat + dlat, lat - dlat, lon + dlon, lon - dlon)).fetchall()
+        for row in rows:
+            distance = haversine_km(lat, lon, row['lat'], row['lon'])
+            if distance <= radius_km:
+                item = dict(row)
+                item['type'] = type_name
+                item['distance_km'] = round(distance, 3)
+                results.append(item)
+    results.sort(key=lambda item: item['distance_km'])
+    return results[:limit]
+
+def parse_nearby_args(args):
+    """쿼리스트링 -> (lat, lon, radius_km, types, limit). 값이 잘못되면 ValueError(오류 메시지)"""
+    try:
+        lat = float(args['lat'])
+        lon = float(args['lon'])
+        radius_km = float(args.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+        limit = int(args.get('limit', NEARBY_DEFAULT_LIMIT))
+    except (KeyError, ValueError, TypeError):
+        raise ValueError('lat, lon 값이 필요합니다.')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('좌표 범위가 올바르지 않습니다.')
+
+    radius_km = max(0.1, min(radius_km, NEARBY_MAX_RADIUS_KM))
+    limit = max(1, min(limit, NEARBY_MAX_LIMIT))
+    type_filter = args.get('type', '전체')
+    if type_filter == '전체':
+        types = list(FACILITY_SOURCES)
+    elif type_filter in FACILITY_SOURCES:
+        types = [type_filter]
+    else:
+        raise ValueError('type 은 전체/동물병원/동물약국 중 하나입니다.')
+    return lat, lon, radius_km, types, limit
+
+# --- 보호소 ---
+def build_shelter_query(keyword, region_filter):
+    match = build_fts_match(keyword) if keyword else None
+    params = []
+    if match:
+        sql = "SELECT s.* FROM shelter_final s JOIN shelter_fts f ON f.rowid = s.shelter_id WHERE shelter_fts MATCH ?"
+        params.append(match)
+    else:
+        sql = "SELECT s.* FROM shelter_final s WHERE 1=1"
+    if keyword:
+        conditions, keyword_params = keyword_conditions(keyword, 's.shelter_id', 'shelter_fts', ['s.name', 's.address'],
+                                                        trigram=False)
+        sql += ''.join(f" AND {condition}" for condition in conditions)
+        params.extend(keyword_params)
+    if region_filter != '전체':
+        sql += " AND s.address LIKE ?"
+        params.append(f'%{region_filter}%')
+    sql += " ORDER BY f.rank, s.name ASC" if match else " ORDER BY s.name ASC"
+    return sql, params
@@ -0,0 +1,300 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 가 없으면 추천 표를 만들 수 없음 (조회는 표만 있으면 동작)
+    np = None
+
+from db import ANIMAL_DB_PATH, USER_DB_PATH, ANIMAL_WRITE_DB_PRAGMAS, USER_DB_PRAGMAS, AnimalDBFrozen, AnimalDBVersion, connect, bump_data_version
+
+# --- 비슷한 동물 추천 ---
+# 오프라인(build)에서 동물마다 비슷한 동물 TOP_K 마리를 미리 계산해 animal_similar 에 저장하고,
+# 화면/API 는 이 표를 (animal_id, rank) PK 로 한 번 읽기만 한다.
+# 점수 = COLLAB_WEIGHT x 찜 기반 유사도 + (1 - COLLAB_WEIGHT) x 속성 유사도
+#  - 찜 기반: 사용자 x 동물 찜 행렬의 동물-동물 코사인 유사도 (같이 찜한 사용자 수 / sqrt(각 찜 수 곱))
+#  - 속성: 품종/지역/나이/성별/체중/색상이 같은 항목의 가중치 합 (0~1)
+# 모든 쌍(n^2)을 계산하지 않도록 후보는 "같이 찜한 동물" + "속성 키가 같은 그룹에서 등록일이 가까운 동물"로 제한한다.
+# 표를 다시 만들면 meta.data_version 을 올리므로, 앱이 (찜 버전, data_version) 으로 캐시한 추천도 새로 계산된다.
+
+SIMILAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS animal_similar (
+    animal_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,       -- 0 부터, 점수 높은 순
+    similar_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (animal_id, rank)
+) WITHOUT ROWID;
+"""
+
+TOP_K = 12
+COLLAB_WEIGHT = 0.5
+USER_MAX_FAVORITES = 50     # 사용자마다 최근 찜 N 개만 사용 (쌍 수가 찜 수의 제곱으로 늘어나므로)
+PAIR_CHUNK = 5_000_000      # 한 번에 만드는 찜 쌍 수 (메모리 상한)
+CANDIDATE_WINDOW = 8        # 그룹 안에서 앞뒤로 볼 후보 수
+SCORE_SCALE = 10000         # 저장 점수 단위 (소수 넷째 자리)
+SCORE_BITS = 14
+ATTRIBUTE_WEIGHTS = {'breed': 0.35, 'region': 0.2, 'age': 0.15, 'sex': 0.1, 'weight': 0.1, 'color': 0.1}
+# 후보 그룹 키 (위에서부터 좁은 그룹). 그룹 안에서는 등록일 순으로 이웃한 동물을 후보로 삼는다
+CANDIDATE_LEVELS = [
+    ('species', 'breed', 'region', 'sex', 'age'),
+    ('species', 'breed', 'region'),
+    ('species', 'breed'),
+    ('species', 'region', 'age'),
+]
+
+RECOMMEND_SEEDS = 20        # "추천" 블록: 최근 찜한 동물 N 마리의 유사 동물을 합산
+RECOMMEND_LIMIT = 4
+
+
+def available():
+    return np is not None
+
+
+# --- 속성 코드 ---
+def birth_year(value):
+    """'2021(년생)' -> 2021"""
+    match = re.search(r'(\d{4})', value or '')
+    return int(match.group(1)) if match else None
+
+def weight_bucket(value):
+    """'5.2(Kg)' -> 반 옥타브(log2 x 2) 단위 구간. 작은 개/고양이는 촘촘하게, 큰 개는 넓게 묶인다"""
+    match = re.search(r'(\d+(?:\.\d+)?)', value or '')
+    if not match or float(match.group(1)) <= 0:
+        return None
+    return round(math.log2(float(match.group(1))) * 2)
+
+def unique_counts(values):
+    """정렬된 고유값과 개수 (np.unique 보다 빠른 정렬 + 경계 비교)"""
+    values = np.sort(values)
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return values[starts], np.diff(np.r_[starts, len(values)])
+
+def group_rank(groups):
+    """정렬된 그룹 배열에서 각 원소가 그룹 안에서 몇 번째인지"""
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    return np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+
+def encode(values):
+    """값 -> 정수 코드 (없는 값은 -1, 어떤 값과도 같지 않은 것으로 취급)"""
+    index = {}
+    return np.fromiter((-1 if v is None or v == '' else index.setdefault(v, len(index)) for v in values),
+                       dtype=np.int32, count=len(values))
+
+
+def load_animals(conn):
+    rows = conn.execute("""SELECT animal_id, register_ymd, species, breed, region, sex, years, weight, color
+                           FROM animal_status ORDER BY animal_id""").fetchall()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    ymd = np.fromiter((r[1] or 0 for r in rows), dtype=np.int64, count=len(rows))
+    attrs = {
+        'species': encode([r[2] for r in rows]),
+        'breed': encode([r[3] for r in rows]),
+        'region': encode([r[4] for r in rows]),
+        'sex': encode([r[5] for r in rows]),
+        'age': encode([birth_year(r[6]) for r in rows]),
+        'weight': encode([weight_bucket(r[7]) for r in rows]),
+        'color': encode([r[8] for r in rows]),
+    }
+    return ids, ymd, attrs
+
+
+def load_favorites(conn, ids):
+    """(사용자, 동물 위치) 배열. 사용자별 최근 USER_MAX_FAVORITES 개, 목록에 없는 동물(보관/삭제)은 제외"""
+    rows = conn.execute("SELECT user_id, animal_id FROM favorites ORDER BY user_id, id DESC").fetchall()
+    if not rows or not len(ids):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    users = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    animals = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    pos = np.minimum(np.searchsorted(ids, animals), len(ids) - 1)
+    keep = ids[pos] == animals
+    users, pos = users[keep], pos[keep]
+    keep = group_rank(users) < USER_MAX_FAVORITES
+    return users[keep], pos[keep]
+
+
+# --- 찜 기반 유사도 ---
+def cooccurrence(users, items, n):
+    """같은 사용자가 찜한 동물 쌍 (a * n + b, 함께 찜한 사용자 수). 사용자 단위로 나눠 만든 뒤 합친다"""
+    if not len(users):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    sizes = np.diff(np.r_[starts, len(users)])
+    total_pairs = np.cumsum(sizes ** 2)
+    keys, counts = [], []
+    lo = 0
+    while lo < len(starts):
+        # 쌍 수(찜 수^2 합)가 PAIR_CHUNK 를 넘지 않도록 연속한 사용자를 묶음
+        done = total_pairs[lo - 1] if lo else 0
+        hi = max(lo + 1, int(np.searchsorted(total_pairs, done + PAIR_CHUNK, side='right')))
+        chunk_starts, chunk_sizes = starts[lo:hi], sizes[lo:hi]
+        per_item = np.repeat(chunk_sizes, chunk_sizes)                 # 각 찜이 만들 쌍 수
+        item_pos = np.arange(chunk_starts[0], chunk_starts[-1] + chunk_sizes[-1])
+        left = np.repeat(item_pos, per_item)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(per_item) - per_item, per_item)
+        right = np.repeat(np.repeat(chunk_starts, chunk_sizes), per_item) + offsets
+        a, b = items[left], items[right]
+        uniq, count = unique_counts(a[a != b] * n + b[a != b])
+        keys.append(uniq)
+        counts.append(count)
+        lo = hi
+    if len(keys) == 1:
+        return keys[0], counts[0]
+    keys, counts = np.concatenate(keys), np.concatenate(counts)
+    order = np.argsort(keys)
+    keys, counts = keys[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+# --- 속성 후보 ---
+def neighbor_pairs(attrs, ymd, columns, window):
+    """columns 가 같은 그룹 안에서 등록일 순으로 앞뒤 window 마리를 후보 쌍 (a * n + b) 으로"""
+    n = len(ymd)
+    order = np.lexsort((ymd,) + tuple(attrs[c] for c in reversed(columns)))
+    changed = np.zeros(n, dtype=bool)
+    changed[0] = True
+    for c in columns:
+        col = attrs[c][order]
+        changed[1:] |= col[1:] != col[:-1]
+    group = np.cumsum(changed)
+    pairs = []
+    for d in range(1, window + 1):
+        same = group[d:] == group[:-d]
+        a, b = order[:-d][same], order[d:][same]
+        pairs.append(a * n + b)
+        pairs.append(b * n + a)
+    return np.concatenate(pairs) if pairs else np.zeros(0, dtype=np.int64)
+
+
+def attribute_score(attrs, a, b):
+    score = np.zeros(len(a), dtype=np.float64)
+    for column, weight in ATTRIBUTE_WEIGHTS.items():
+        codes = attrs[column]
+        score += weight * ((codes[a] == codes[b]) & (codes[a] >= 0))
+    return score
+
+
+def compute_similar(ids, ymd, attrs, users, items, k=TOP_K):
+    """(animal_id, rank, similar_id, score) 배열들"""
+    n = len(ids)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0)
+    co_keys, co_counts = cooccurrence(users, items, n)
+    candidates = [co_keys] + [neighbor_pairs(attrs, ymd, level, CANDIDATE_WINDOW) for level in CANDIDATE_LEVELS]
+    keys, _ = unique_counts(np.concatenate(candidates))
+    a, b = keys // n, keys % n
+
+    degree = np.bincount(items, minlength=n)
+    cosine = np.zeros(len(keys))
+    if len(co_keys):
+        pos = np.searchsorted(keys, co_keys)  # co_keys 는 모두 keys 안에 있음
+        ca, cb = co_keys // n, co_keys % n
+        cosine[pos] = co_counts / np.sqrt(degree[ca] * degree[cb])
+    score = COLLAB_WEIGHT * cosine + (1 - COLLAB_WEIGHT) * attribute_score(attrs, a, b)
+
+    # 동물별로 점수 높은 순 (같으면 최근 등록된 동물 먼저) 상위 k 개.
+    # (동물, 1 - 점수, b 의 최근 등록 순위) 를 int64 하나로 합쳐 한 번만 정렬한다
+    recent = np.argsort(-ymd, kind='stable')
+    recent_rank = np.empty(n, dtype=np.int64)
+    recent_rank[recent] = np.arange(n)
+    rank_bits = max(1, (n - 1).bit_length())
+    inverted = np.rint((1.0 - score) * SCORE_SCALE).astype(np.int64)
+    packed = np.sort((a << (rank_bits + SCORE_BITS)) | (inverted << rank_bits) | recent_rank[b])
+    a = packed >> (rank_bits + SCORE_BITS)
+    keep = group_rank(a) < k
+    packed, a = packed[keep], a[keep]
+    similar = recent[packed & ((1 << rank_bits) - 1)]
+    score = 1.0 - ((packed >> rank_bits) & ((1 << SCORE_BITS) - 1)) / SCORE_SCALE
+    return ids[a], group_rank(a), ids[similar], score
+
+
+def build(animal_conn, user_conn, k=TOP_K):
+    """animal_similar 를 다시 만들고 (동물 수, 저장한 행 수) 반환"""
+    ids, ymd, attrs = load_animals(animal_conn)
+    users, items = load_favorites(user_conn, ids)
+    animal_ids, ranks, similar_ids, scores = compute_similar(ids, ymd, attrs, users, items, k)
+    animal_conn.executescript(SIMILAR_SCHEMA)
+    with animal_conn:
+        animal_conn.execute("DELETE FROM animal_similar")
+        animal_conn.executemany(
+            "INSERT INTO animal_similar (animal_id, rank, similar_id, score) VALUES (?, ?, ?, ?)",
+            zip(animal_ids.tolist(), ranks.tolist(), similar_ids.tolist(), scores.tolist()))
+        bump_data_version(animal_conn)
+    return len(ids), len(animal_ids)
+
+
+def build_into(animal_conn, user_db_path=None, k=TOP_K):
+    """animal_conn (ETL 이 만드는 새 버전 파일 등)에 유사 동물 표를 만든다"""
+    if not available():
+        print("⚠️ NumPy 가 없어 유사 동물 표를 만들지 않습니다.")
+        return
+    start = time.perf_counter()
+    user_conn = connect(user_db_path or USER_DB_PATH, USER_DB_PRAGMAS)
+    try:
+        animals, rows = build(animal_conn, user_conn, k)
+    finally:
+        user_conn.close()
+    print(f"🤝 유사 동물 표 생성: {animals}마리, {rows}행 ({time.perf_counter() - start:.1f}초)")
+
+
+def build_db(animal_db_path=ANIMAL_DB_PATH, user_db_path=None, k=TOP_K):
+    """서비스 중인 파일을 복사한 새 버전에 표를 만들고 교체 (ETL 과 같은 방식, 만드는 동안 관리자 쓰기는 막힘)"""
+    if not available():
+        print("⚠️ NumPy 가 없어 유사 동물 표를 만들지 않습니다.")
+        return
+    with AnimalDBVersion(animal_db_path) as version:
+        animal_conn = connect(version.path, ANIMAL_WRITE_DB_PRAGMAS)
+        try:
+            build_into(animal_conn, user_db_path, k)
+        finally:
+            animal_conn.close()
+        version.publish()
+    print(f"🔁 서비스 DB 교체: {os.path.basename(version.active_path)} -> {os.path.basename(version.path)}")
+
+
+# --- 조회 (앱) ---
+def fetch_similar(conn, animal_id, limit=TOP_K):
+    """미리 계산한 비슷한 동물 (보호 중인 동물만). 표가 없으면 빈 목록"""
+    try:
+        return conn.execute("""
+            SELECT a.*, s.score FROM animal_similar s
+            JOIN animal_status a ON a.animal_id = s.similar_id
+            WHERE s.animal_id = ? ORDER BY s.rank LIMIT ?
+        """, (animal_id, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def fetch_recommended(conn, user_id, limit=RECOMMEND_LIMIT):
+    """최근 찜한 동물들의 유사 동물 점수를 합산해 아직 찜하지 않은 동물 추천 (conn 에 user_db 가 붙어 있어야 함)"""
+    try:
+        return conn.execute("""
+            SELECT a.*, r.score FROM (
+                SELECT similar_id, SUM(score) AS score FROM animal_similar
+                WHERE animal_id IN (SELECT animal_id FROM user_db.favorites WHERE user_id = ? ORDER BY id DESC LIMIT ?)
+                GROUP BY similar_id
+            ) r
+            JOIN animal_status a ON a.animal_id = r.similar_id
+            WHERE r.similar_id NOT IN (SELECT animal_id FROM user_db.favorites WHERE user_id = ?)
+            ORDER BY r.score DESC, a.register_ymd DESC LIMIT ?
+        """, (user_id, RECOMMEND_SEEDS, user_id, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="찜/속성 기반 유사 동물 표(animal_similar) 생성")
+    parser.add_argument('--db', default=ANIMAL_DB_PATH)
+    parser.add_argument('--user-db', default=USER_DB_PATH)
+    parser.add_argument('--k', type=int, default=TOP_K, help="동물마다 저장할 유사 동물 수")
+    args = parser.parse_args()
+    try:
+        build_db(args.db, args.user_db, args.k)
+    except AnimalDBFrozen as e:
+        print(f"❌ {e}")
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from cache import LRUCache
+
+# --- 서버 세션 (user_data.db) ---
+# 쿠키에는 임의의 토큰(32자)만 담고, 세션 내용은 user_data.db 의 sessions 테이블에 저장한다.
+# DB 에는 토큰의 SHA-256 만 저장하므로 DB 가 유출돼도 쿠키를 만들어 낼 수 없다.
+# - 자주 쓰는 세션은 프로세스 메모리 LRU 에 두어 요청마다 DB 를 읽지 않는다.
+# - 다른 워커의 LRU 에 남은 오래된 사본은 "무효화 로그" 파일(log_path)로 버린다.
+#   첫 줄은 세대 토큰, 그 뒤는 바뀐 세션의 sid 한 줄씩 (이미 있는 세션을 고치거나 지울 때 추가).
+#   워커는 요청마다 파일을 stat 해서 커졌으면 새 줄만 읽어 그 sid 만 LRU 에서 지운다.
+# - 관리자가 회원을 삭제/강등하면 그 회원의 세션 행을 지우고 로그를 새 세대로 바꾼다.
+#   세대가 바뀐 것을 본 워커는 LRU 를 통째로 비운다. 로그가 SESSION_LOG_MAX_BYTES 를 넘을 때도 같음.
+# - 만료된 세션은 저장할 때 SESSION_CLEANUP_INTERVAL 마다 SESSION_CLEANUP_BATCH 개씩 지운다.
+
+SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,          -- 쿠키 토큰의 SHA-256
+    user_id INTEGER,
+    data TEXT NOT NULL,            -- JSON
+    expires_at INTEGER NOT NULL,   -- unix time (초)
+    updated_at INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+"""
+
+SESSION_COOKIE_NAME = 'petmatch_sid'
+SESSION_TTL = 7 * 24 * 3600        # 마지막 갱신 후 이 시간이 지나면 만료
+SESSION_REFRESH = 24 * 3600        # 만료 시각은 하루에 한 번만 늦춤 (요청마다 쓰지 않도록)
+SESSION_CACHE_MAX_ENTRIES = 10000
+SESSION_CLEANUP_INTERVAL = 300.0
+SESSION_CLEANUP_BATCH = 500
+SESSION_LOG_MAX_BYTES = 256 * 1024  # 무효화 로그가 이보다 커지면 새 세대로 교체
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, token=None, expires_at=0, updated_at=0):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.token = token
+        self.expires_at = expires_at
+        self.updated_at = updated_at
+        self.old_token = None
+        self.modified = False
+
+    def regenerate(self):
+        """로그인처럼 권한이 바뀔 때 토큰을 새로 발급 (세션 고정 공격 방지)"""
+        if self.token:
+            self.old_token = self.token
+        self.token = None
+        self.modified = True
+
+
+def token_key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    def __init__(self, pool, log_path):
+        self.pool = pool
+        self.log_path = log_path
+        self.cache = LRUCache(SESSION_CACHE_MAX_ENTRIES)  # sid -> (data, expires_at, updated_at)
+        self._log_lock = threading.Lock()
+        self._log_seen = None       # 마지막으로 읽은 로그 (inode, 크기)
+        self._log_generation = None
+        self._log_offset = 0
+        self._last_cleanup = 0.0
+        conn = pool.acquire()
+        try:
+            conn.executescript(SESSION_SCHEMA)
+        finally:
+            pool.release(conn)
+        with self._log_lock:
+            self._read_log()
+            if self._log_generation in (None, b''):  # 처음 실행 (또는 예전 에포크 파일)
+                self._new_generation()
+                self._read_log()
+
+    # --- 워커 간 무효화 ---
+    def _stat_log(self):
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size
+
+    def _sync_log(self):
+        """다른 워커가 남긴 sid 를 LRU 에서 지움. 세대가 바뀌었으면 LRU 를 비움"""
+        if self._stat_log() == self._log_seen:
+            return
+        with self._log_lock:
+            self._read_log()
+
+    def _read_log(self):
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            if self._log_seen is not None:
+                self.cache.clear()
+            self._log_seen, self._log_generation, self._log_offset = None, None, 0
+            return
+        with f:
+            generation = f.readline()
+            if generation != self._log_generation:
+                self.cache.clear()
+                self._log_generation, self._log_offset = generation, f.tell()
+            f.seek(self._log_offset)
+            chunk = f.read()
+            done = chunk.rfind(b'\n') + 1  # 쓰는 중인 마지막 줄은 다음에 읽음
+            for sid in chunk[:done].split():
+                self.cache.pop(sid.decode('ascii'))
+            self._log_offset += done
+            self._log_seen = (os.fstat(f.fileno()).st_ino, self._log_offset)
+
+    def _new_generation(self):
+        """로그를 새 세대로 교체 -> 모든 워커가 LRU 를 비움"""
+        tmp = f"{self.log_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(secrets.token_hex(16).encode('ascii') + b'\n')
+        os.replace(tmp, self.log_path)
+
+    def _invalidate(self, sid):
+        """다른 워커의 sid 사본을 버리도록 로그에 한 줄 추가"""
+        with self._log_lock:
+            self._read_log()
+            line = sid.encode('ascii') + b'\n'
+            with open(self.log_path, 'ab') as f:
+                f.write(line)
+                end = f.tell()
+                ino = os.fstat(f.fileno()).st_ino
+            if self._log_seen == (ino, end - len(line)):
+                # 사이에 다른 워커가 쓴 줄이 없으면 내 줄은 건너뜀 (방금 저장한 내 캐시는 최신)
+                self._log_offset, self._log_seen = end, (ino, end)
+            if end > SESSION_LOG_MAX_BYTES:
+                self._new_generation()
+
+    # --- 조회/저장 ---
+    def load(self, token):
+        """(data, expires_at, updated_at) 또는 None"""
+        self._sync_log()
+        sid = token_key(token)
+        now = int(time.time())
+        cached = self.cache.get(sid)
+        if cached is None or cached[1] <= now:
+            # 만료돼 보여도 다른 워커가 touch 로 늦췄을 수 있으니 DB 를 다시 읽음
+            conn = self.pool.acquire()
+            try:
+                row = conn.execute('SELECT data, expires_at, updated_at FROM sessions WHERE sid = ?', (sid,)).fetchone()
+            finally:
+                self.pool.release(conn)
+            if row is None or row['expires_at'] <= now:
+                self.cache.pop(sid)
+                return None
+            cached = (json.loads(row['data']), row['expires_at'], row['updated_at'])
+            self.cache.set(sid, cached)
+        return cached
+
+    def save(self, token, data, existing):
+        """세션 저장. 토큰이 없으면 새로 발급해서 반환"""
+        token = token or secrets.token_urlsafe(24)
+        sid = token_key(token)
+        now = int(time.time())
+        expires_at = now + SESSION_TTL
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO sessions (sid, user_id, data, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(sid) DO UPDATE SET user_id = excluded.user_id, data = excluded.data,
+                        expires_at = excluded.expires_at, updated_at = excluded.updated_at
+                """, (sid, data.get('user_id'), json.dumps(data, ensure_ascii=False), expires_at, now))
+            self._cleanup(conn, now)
+        finally:
+            self.pool.release(conn)
+        if existing:
+            self._invalidate(sid)
+        self.cache.set(sid, (data, expires_at, now))
+        return token
+
+    def touch(self, token):
+        """내용은 그대로 두고 만료 시각만 늦춤"""
+        sid = token_key(token)
+        now = int(time.time())
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                conn.execute('UPDATE sessions SET expires_at = ?, updated_at = ? WHERE sid = ?', (now + SESSION_TTL, now, sid))
+        finally:
+            self.pool.release(conn)
+        cached = self.cache.get(sid)
+        if cached:
+            self.cache.set(sid, (cached[0], now + SESSION_TTL, now))
+
+    def delete(self, token):
+        sid = token_key(token)
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+        finally:
+            self.pool.release(conn)
+        self.cache.pop(sid)
+        self._invalidate(sid)
+
+    def revoke_user(self, conn, user_id):
+        """회원의 모든 세션 삭제 (강제 로그아웃). conn 의 트랜잭션은 호출한 쪽에서 커밋"""
+        conn.execute('DELETE FROM sessions WHERE user_id = ?', (user_id,))
+
+    def revoked(self):
+        """revoke_user 를 커밋한 뒤 호출: 모든 워커의 캐시를 무효화"""
+        with self._log_lock:
+            self._new_generation()
+            self._read_log()
+
+    def _cleanup(self, conn, now):
+        if time.monotonic() - self._last_cleanup < SESSION_CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = time.monotonic()
+        with conn:
+            conn.execute("""DELETE FROM sessions WHERE sid IN
+                            (SELECT sid FROM sessions WHERE expires_at <= ? LIMIT ?)""", (now, SESSION_CLEANUP_BATCH))
+
+    def active_counts(self, conn):
+        """user_id -> 유효한 세션 수"""
+        rows = conn.execute('SELECT user_id, COUNT(*) FROM sessions WHERE user_id IS NOT NULL AND expires_at > ? GROUP BY user_id',
+                            (int(time.time()),)).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Flask 세션 인터페이스: 서명 쿠키 대신 SessionStore 사용"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        token = request.cookies.get(SESSION_COOKIE_NAME)
+        if token:
+            loaded = self.store.load(token)
+            if loaded is not None:
+                data, expires_at, updated_at = loaded
+                return ServerSession(dict(data), token, expires_at, updated_at)
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.token and session.modified:  # 로그아웃 (session.clear())
+                self.store.delete(session.token)
+                response.delete_cookie(SESSION_COOKIE_NAME, domain=domain, path=path)
+            if session.old_token:
+                self.store.delete(session.old_token)
+            return
+
+        response.vary.add('Cookie')
+        if session.modified:
+            if session.old_token:
+                self.store.delete(session.old_token)
+            existing = session.token is not None
+            token = self.store.save(session.token, dict(session), existing)
+            response.set_cookie(
+                SESSION_COOKIE_NAME, token,
+                expires=self.get_expiration_time(app, session), domain=domain, path=path,
+                httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app) or 'Lax',
+            )
+        elif time.time() - session.updated_at > SESSION_REFRESH:
+            self.store.touch(session.token)
@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 가 없으면 썸네일을 만들지 않음 (앱은 /img 를 원본 주소로 redirect)
+    Image = None
+
+from db import BASE_DIR, ANIMAL_DB_PATH, resolve_animal_db
+
+# --- 동물 사진 썸네일 프록시 캐시 ---
+# animal_status.image_url 은 공공데이터 서버의 원격 이미지라 카드마다 느린 외부 요청이 생긴다.
+# /img/<animal_id> 가 원본을 한 번만 받아 카드/모달 크기로 줄이고 디스크에 저장해 둔다.
+#
+# 디렉터리 구조 (THUMB_DIR)
+#   objects/ab/<sha256>           : 변환된 이미지 (내용 해시로 저장 -> 같은 사진은 한 번만 보관)
+#   refs/<sha1(url)>-<크기>        : "<sha256> <content-type>" (원본 URL -> 이미지 연결)
+# 전체 크기가 THUMB_MAX_BYTES 를 넘으면 최근에 쓰지 않은(mtime 이 오래된) 이미지부터 지운다.
+# 참조가 가리키는 이미지가 지워졌으면 다음 요청 때 다시 받아온다.
+
+THUMB_DIR = os.environ.get('PETMATCH_THUMB_DIR', os.path.join(BASE_DIR, '..', 'data', 'processed', 'thumbs'))
+THUMB_MAX_BYTES = int(os.environ.get('PETMATCH_THUMB_MAX_MB', 512)) * 1024 * 1024
+THUMB_SIZES = {'card': (400, 300), 'modal': (900, 900)}  # 최대 가로 x 세로 (비율 유지)
+THUMB_MAX_AGE = 30 * 24 * 3600   # 브라우저 캐시 기간 (초)
+JPEG_QUALITY = 82
+FETCH_TIMEOUT = 10               # 원본 이미지 요청 제한 시간 (초)
+FETCH_MAX_BYTES = 10 * 1024 * 1024
+PREWARM_WORKERS = 8
+LOCK_STRIPES = 64                # 같은 URL 을 동시에 두 번 받지 않도록 쓰는 잠금 수
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def available():
+    """썸네일을 만들 수 있는지 (Pillow 설치 여부)"""
+    return Image is not None
+
+
+def fetch_image(url):
+    """원본 이미지 (bytes, content-type). http/https 만 허용"""
+    if not url.startswith(('http://', 'https://')):
+        raise ThumbnailError(f"지원하지 않는 주소: {url}")
+    req = urllib.request.Request(url, headers={'User-Agent': 'PetMatch-Thumbnailer/1.0'})
+    try:
+        with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT) as resp:
+            content_type = resp.headers.get_content_type()
+            data = resp.read(FETCH_MAX_BYTES + 1)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise ThumbnailError(f"이미지 요청 실패: {e}") from e
+    if not content_type.startswith('image/'):
+        raise ThumbnailError(f"이미지가 아닌 응답: {content_type}")
+    if len(data) > FETCH_MAX_BYTES:
+        raise ThumbnailError("이미지가 너무 큽니다")
+    return data, content_type
+
+
+def resize_image(data, content_type, size):
+    """size 안에 들어가도록 줄인 JPEG (bytes, content-type)"""
+    if Image is None:
+        # 원본 크기를 "썸네일"로 캐시하지 않도록 실패로 처리
+        raise ThumbnailError("Pillow 가 설치되지 않아 썸네일을 만들 수 없습니다 (pip install Pillow)")
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert('RGB')
+            img.thumbnail(size, Image.LANCZOS)
+            out = io.BytesIO()
+            img.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ThumbnailError(f"이미지 변환 실패: {e}") from e
+    return out.getvalue(), 'image/jpeg'
+
+
+class ThumbnailCache:
+    def __init__(self, directory=THUMB_DIR, max_bytes=THUMB_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.refs_dir = os.path.join(directory, 'refs')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fetch_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = sum(size for _, size, _ in self._scan_objects())
+
+    # --- 경로 ---
+    def _ref_path(self, url, size):
+        return os.path.join(self.refs_dir, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}-{size}")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _scan_objects(self):
+        """(경로, 크기, mtime) 목록"""
+        for root, _, files in os.walk(self.objects_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    # --- 조회 ---
+    def lookup(self, url, size):
+        """캐시에 있으면 (경로, sha256, content-type), 없으면 None"""
+        try:
+            with open(self._ref_path(url, size), encoding='ascii') as f:
+                digest, content_type = f.read().split()
+        except (FileNotFoundError, ValueError):
+            return None
+        path = self._object_path(digest)
+        try:
+            os.utime(path)  # LRU 순서 갱신
+        except FileNotFoundError:
+            return None
+        return path, digest, content_type
+
+    def get(self, url, size='card'):
+        """썸네일 (경로, sha256, content-type). 없으면 원본을 받아 모든 크기를 한 번에 만든다"""
+        found = self.lookup(url, size)
+        if found:
+            self.hits += 1
+            return found
+        stripe = int(hashlib.sha1(url.encode('utf-8')).hexdigest()[:8], 16) % LOCK_STRIPES
+        with self._fetch_locks[stripe]:
+            found = self.lookup(url, size)  # 기다리는 동안 다른 요청이 만들었을 수 있음
+            if found:
+                self.hits += 1
+                return found
+            self.misses += 1
+            self._fill(url)
+        self.evict()
+        found = self.lookup(url, size)
+        if found is None:
+            raise ThumbnailError("썸네일 저장 실패")
+        return found
+
+    def _fill(self, url):
+        data, content_type = fetch_image(url)
+        for size_name, box in THUMB_SIZES.items():
+            out, out_type = resize_image(data, content_type, box)
+            digest = self._store(out)
+            self._write_atomic(self._ref_path(url, size_name), f"{digest} {out_type}".encode('ascii'))
+
+    def _store(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_atomic(path, data)
+        with self._lock:
+            self.total_bytes += len(data)
+        return digest
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # --- 정리 ---
+    def evict(self):
+        """최대 크기를 넘으면 오래 쓰지 않은 이미지부터 지워 90% 까지 줄임"""
+        with self._lock:
+            if self.total_bytes <= self.max_bytes:
+                return 0
+            objects = sorted(self._scan_objects(), key=lambda o: o[2])
+            self.total_bytes = sum(size for _, size, _ in objects)  # 다른 프로세스 변경분 반영
+            target = self.max_bytes * 0.9
+            removed = 0
+            for path, size, _ in objects:
+                if self.total_bytes <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self.total_bytes -= size
+                removed += 1
+            return removed
+
+    # --- 미리 받아두기 ---
+    def prewarm(self, urls, workers=PREWARM_WORKERS):
+        """URL 목록의 썸네일을 스레드 풀에서 미리 만든다. (새로 만든 수, 실패 수) 반환"""
+        todo = [u for u in dict.fromkeys(urls) if u and not all(self.lookup(u, s) for s in THUMB_SIZES)]
+
+        def warm(url):
+            try:
+                self.get(url)
+                return True
+            except ThumbnailError as e:
+                print(f"  ⚠️ {url}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='petmatch-thumb') as pool:
+            results = list(pool.map(warm, todo))
+        return sum(results), len(results) - sum(results)
+
+
+def prewarm_db(db_path=ANIMAL_DB_PATH, workers=PREWARM_WORKERS, cache=None):
+    """animal_status 의 모든 image_url 썸네일을 미리 만든다 (ETL 직후 실행용)"""
+    if not available():
+        print("⚠️ Pillow 가 설치되지 않아 썸네일 미리 만들기를 건너뜁니다 (pip install Pillow)")
+        return 0, 0
+    conn = sqlite3.connect(f"file:{resolve_animal_db(db_path)}?mode=ro", uri=True)
+    try:
+        urls = [r[0] for r in conn.execute("SELECT DISTINCT image_url FROM animal_status WHERE image_url IS NOT NULL AND image_url != ''")]
+    finally:
+        conn.close()
+    cache = cache or ThumbnailCache()
+    print(f"🖼️ 썸네일 미리 만들기: 이미지 {len(urls)}개, 스레드 {workers}개")
+    created, failed = cache.prewarm(urls, workers)
+    print(f"✅ 새로 만든 썸네일 {created}개, 실패 {failed}개 (캐시 {cache.total_bytes / 1024 / 1024:.1f}MB)")
+    return created, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="동물 사진 썸네일 캐시 미리 만들기")
+    parser.add_argument('--db', default=ANIMAL_DB_PATH)
+    parser.add_argument('--workers', type=int, default=PREWARM_WORKERS)
+    args = parser.parse_args()
+    prewarm_db(args.db, args.workers)
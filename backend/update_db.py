@@ -1,5 +1,7 @@
 import sqlite3
 import os
+from sessions import SESSION_SCHEMA
+from favorites import FAVORITE_VERSION_SCHEMA
 
 # 1. 경로 설정
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,7 +16,9 @@ CREATE TABLE IF NOT EXISTS favorites (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(user_id, animal_id) -- 중복 찜하기 방지
 );
-"""
+-- 마이페이지: 사용자별 최근 찜 순 페이지 조회용
+CREATE INDEX IF NOT EXISTS idx_favorites_user_recent ON favorites(user_id, id);
+""" + FAVORITE_VERSION_SCHEMA + SESSION_SCHEMA  # 찜 버전 (favorites.py), 로그인 세션 (sessions.py)
 
 def update_db():
     if not os.path.exists(USER_DB_PATH):
@@ -23,10 +27,10 @@ def update_db():
 
     try:
         conn = sqlite3.connect(USER_DB_PATH)
-        conn.execute(SQL_SCHEMA)
+        conn.executescript(SQL_SCHEMA)
         conn.commit()
         conn.close()
-        print(f"✅ 즐겨찾기 테이블 추가 완료!")
+        print(f"✅ 즐겨찾기 / 세션 테이블 추가 완료!")
     except Exception as e:
         print(f"❌ 테이블 추가 실패: {e}")
 
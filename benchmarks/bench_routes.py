@@ -0,0 +1,269 @@
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# --- 라우트 벤치마크 ---
+# make_bench_db.py 로 만든 합성 DB 를 대상으로 각 화면/API 를
+#   1) Flask test client (단일 스레드, 네트워크 없이 앱 코드만)
+#   2) 로컬 HTTP 서버 + 여러 스레드 클라이언트 (동시 접속)
+# 로 호출하고 p50/p95/p99 지연시간, 처리량, 최대 RSS 를 JSON 으로 저장한다.
+# 예: python bench_routes.py --requests 300 --concurrency 8 --out results/$(git rev-parse --short HEAD).json
+#     python bench_routes.py --compare results/old.json results/new.json
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, '..')
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, 'data')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+from make_bench_db import BENCH_PASSWORD, bench_email  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, wall_seconds):
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'count': len(values),
+        'errors': errors,
+        'p50_ms': ms(percentile(values, 50)),
+        'p95_ms': ms(percentile(values, 95)),
+        'p99_ms': ms(percentile(values, 99)),
+        'mean_ms': ms(sum(values) / len(values)) if values else None,
+        'throughput_rps': round(len(values) / wall_seconds, 1) if wall_seconds else None,
+    }
+
+
+def peak_rss_mb():
+    # 리눅스는 KB, macOS 는 byte 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# --- 시나리오 ---
+# (이름, 로그인 필요 여부, 메서드, URL 생성 함수)
+def build_scenarios(data_dir):
+    conn = sqlite3.connect(os.path.join(data_dir, 'animal_data.db'))
+    regions = [r[0] for r in conn.execute("SELECT DISTINCT region FROM animal_status")]
+    facility_regions = [r[0] for r in conn.execute("SELECT DISTINCT region FROM hospital_final")]
+    max_animal_id = conn.execute("SELECT MAX(animal_id) FROM animal_status").fetchone()[0]
+    conn.close()
+
+    def animals_url(rng):
+        args = {}
+        if rng.random() < 0.5:
+            args['region'] = rng.choice(regions)
+        if rng.random() < 0.5:
+            args['species'] = rng.choice(['개', '고양이'])
+        if rng.random() < 0.3:
+            args['gender'] = rng.choice(['수컷', '암컷'])
+        if rng.random() < 0.2:
+            args['keyword'] = rng.choice(['리트리버', '고양이', '말티즈', '보호센터', '믹스', '진도'])
+        if rng.random() < 0.2:
+            args['sort'] = 'oldest'
+        return '/animals?' + urllib.parse.urlencode(args)
+
+    def hospital_url(rng):
+        args = {'region': rng.choice(facility_regions)}
+        if rng.random() < 0.3:
+            args['keyword'] = '동물병원'
+        return '/hospital?' + urllib.parse.urlencode(args)
+
+    return [
+        ('index', False, 'GET', lambda rng: '/'),
+        ('animals', False, 'GET', animals_url),
+        ('api_animals', False, 'GET', lambda rng: animals_url(rng).replace('/animals', '/api/animals')),
+        ('hospital', False, 'GET', hospital_url),
+        ('shelter', False, 'GET', lambda rng: '/shelter?' + urllib.parse.urlencode({'region': rng.choice(regions)})),
+        ('api_animal_detail', False, 'GET', lambda rng: f'/api/animal/{rng.randint(1, max_animal_id)}'),
+        ('animals_logged_in', True, 'GET', animals_url),
+        ('api_favorite_toggle', True, 'POST', lambda rng: f'/api/favorite/{rng.randint(1, max_animal_id)}'),
+        ('mypage', True, 'GET', lambda rng: '/mypage'),
+    ]
+
+
+# --- 1) Flask test client ---
+def run_test_client(app, scenarios, requests_per_scenario, seed):
+    results = {}
+    anon = app.test_client()
+    user = app.test_client()
+    user.post('/login', data={'email': bench_email(2), 'password': BENCH_PASSWORD})
+    for name, needs_login, method, make_url in scenarios:
+        rng = random.Random(seed)
+        client = user if needs_login else anon
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(requests_per_scenario):
+            url = make_url(rng)
+            t0 = time.perf_counter()
+            resp = client.open(url, method=method)
+            latencies.append(time.perf_counter() - t0)
+            errors += resp.status_code >= 400
+        results[name] = summarize(latencies, errors, time.perf_counter() - started)
+        print(f"  [test_client] {name:<22} p50={results[name]['p50_ms']}ms p99={results[name]['p99_ms']}ms")
+    return results
+
+
+# --- 2) 로컬 HTTP 서버 + 멀티스레드 클라이언트 ---
+def start_http_server(app):
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # 요청마다 찍히는 접근 로그 끄기
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def make_opener(base_url, user_index=None):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    if user_index is not None:
+        data = urllib.parse.urlencode({'email': bench_email(user_index), 'password': BENCH_PASSWORD}).encode()
+        opener.open(base_url + '/login', data=data).read()
+    return opener
+
+
+def run_http(app, scenarios, requests_per_scenario, concurrency, seed):
+    server, base_url = start_http_server(app)
+    results = {}
+    try:
+        # 스레드마다 다른 사용자로 로그인 (찜 쓰기가 한 사용자에 몰리지 않도록)
+        anon_openers = [make_opener(base_url) for _ in range(concurrency)]
+        user_openers = [make_opener(base_url, user_index=i + 2) for i in range(concurrency)]
+        for name, needs_login, method, make_url in scenarios:
+            openers = user_openers if needs_login else anon_openers
+            per_worker = max(1, requests_per_scenario // concurrency)
+
+            def worker(worker_index):
+                rng = random.Random(seed + worker_index)
+                opener = openers[worker_index]
+                latencies, errors = [], 0
+                for _ in range(per_worker):
+                    req = urllib.request.Request(base_url + make_url(rng), method=method, data=b'' if method == 'POST' else None)
+                    t0 = time.perf_counter()
+                    try:
+                        with opener.open(req) as resp:
+                            resp.read()
+                    except urllib.error.HTTPError as e:
+                        e.read()
+                        errors += 1
+                    latencies.append(time.perf_counter() - t0)
+                return latencies, errors
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(worker, range(concurrency)))
+            wall = time.perf_counter() - started
+            latencies = [v for lat, _ in outcomes for v in lat]
+            results[name] = summarize(latencies, sum(err for _, err in outcomes), wall)
+            print(f"  [http x{concurrency}] {name:<22} p50={results[name]['p50_ms']}ms "
+                  f"p99={results[name]['p99_ms']}ms {results[name]['throughput_rps']} req/s")
+    finally:
+        server.shutdown()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- 결과 비교 ---
+def compare(old_path, new_path):
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    for mode in new['results']:
+        for name, stats in new['results'][mode].items():
+            before = old['results'].get(mode, {}).get(name)
+            if not before or not before['p95_ms'] or not stats['p95_ms']:
+                continue
+            change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            mark = '🔺' if change > 10 else ('🔻' if change < -10 else '  ')
+            print(f"{mark} {mode:<12} {name:<22} p95 {before['p95_ms']:>9.2f}ms -> {stats['p95_ms']:>9.2f}ms ({change:+.1f}%)")
+    print(f"   peak RSS {old['meta']['peak_rss_mb']}MB -> {new['meta']['peak_rss_mb']}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PetMatch Flask 라우트 벤치마크")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="make_bench_db.py 로 만든 DB 폴더")
+    parser.add_argument('--requests', type=int, default=200, help="시나리오당 요청 수")
+    parser.add_argument('--concurrency', type=int, default=8, help="HTTP 모드 동시 스레드 수")
+    parser.add_argument('--mode', choices=['all', 'test_client', 'http'], default='all')
+    parser.add_argument('--no-page-cache', action='store_true', help="목록 페이지 응답 캐시를 끄고 측정")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--out', help="결과 JSON 저장 경로")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="두 결과 JSON 의 p95 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    animal_db = os.path.join(args.data_dir, 'animal_data.db')
+    if not os.path.exists(animal_db):
+        sys.exit(f"❌ {animal_db} 가 없습니다. make_bench_db.py 를 먼저 실행하세요.")
+    # app 을 import 하기 전에 DB 경로를 합성 DB 로 바꿔 둔다
+    os.environ['PETMATCH_ANIMAL_DB'] = animal_db
+    os.environ['PETMATCH_USER_DB'] = os.path.join(args.data_dir, 'user_data.db')
+    import app as app_module
+    if args.no_page_cache:
+        from cache import LRUCache
+        app_module.page_cache = LRUCache(max_entries=0)
+        app_module.context_cache = LRUCache(max_entries=0)
+
+    scenarios = build_scenarios(args.data_dir)
+    results = {}
+    if args.mode in ('all', 'test_client'):
+        results['test_client'] = run_test_client(app_module.app, scenarios, args.requests, args.seed)
+    if args.mode in ('all', 'http'):
+        results['http'] = run_http(app_module.app, scenarios, args.requests, args.concurrency, args.seed)
+
+    conn = sqlite3.connect(animal_db)
+    animal_count = conn.execute("SELECT COUNT(*) FROM animal_status").fetchone()[0]
+    conn.close()
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'animals': animal_count,
+            'requests_per_scenario': args.requests,
+            'concurrency': args.concurrency,
+            'page_cache': not args.no_page_cache,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'results': results,
+    }
+    print(f"  최대 RSS: {report['meta']['peak_rss_mb']}MB")
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
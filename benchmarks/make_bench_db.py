@@ -0,0 +1,160 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from itertools import islice
+
+from werkzeug.security import generate_password_hash
+
+# --- 벤치마크용 합성 DB 생성 ---
+# preprocessing.py 의 스키마/인덱스/FTS/R*Tree 스크립트를 그대로 사용해 실제 ETL 결과와 같은 구조의
+# animal_data.db 와 user_data.db 를 원하는 규모로 만든다. (CSV 를 거치지 않고 최종 테이블에 바로 넣음)
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data', 'py'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+import preprocessing as etl  # noqa: E402
+import create_user_db  # noqa: E402
+import update_db  # noqa: E402
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+BENCH_PASSWORD = 'bench1234'
+CHUNK_ROWS = 10_000
+
+REGIONS = [
+    '수원시', '성남시', '의정부시', '안양시', '부천시', '광명시', '평택시', '동두천시', '안산시', '고양시',
+    '과천시', '구리시', '남양주시', '오산시', '시흥시', '군포시', '의왕시', '하남시', '용인시', '파주시',
+    '이천시', '안성시', '김포시', '화성시', '광주시', '양주시', '포천시', '여주시', '연천군', '가평군', '양평군',
+]
+DOG_BREEDS = ['믹스견', '말티즈', '푸들', '진도견', '골든 리트리버', '시바견', '포메라니안', '비숑 프리제', '웰시 코기', '치와와']
+CAT_BREEDS = ['한국 고양이', '코리안 숏헤어 고양이', '페르시안 고양이', '러시안 블루 고양이', '샴 고양이']
+COLORS = ['흰색', '검정', '갈색', '크림', '삼색', '치즈', '회색']
+GENDERS = ['M', 'F', 'Q']
+# 경기도 대략의 좌표 범위
+LAT_RANGE = (36.9, 38.3)
+LON_RANGE = (126.5, 127.9)
+
+
+def chunked(rows, size=CHUNK_ROWS):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def shelter_rows(count, rng):
+    for i in range(1, count + 1):
+        region = REGIONS[i % len(REGIONS)]
+        yield (f'bench-shelter-{i}', f'{region} 동물보호센터 {i}', rng.randint(20, 300),
+               f'경기도 {region} 보호로 {i}', f'031-{rng.randint(100, 999)}-{i % 10000:04d}')
+
+
+def facility_rows(prefix, label, count, rng):
+    for i in range(1, count + 1):
+        region = rng.choice(REGIONS)
+        yield (f'{prefix}-{i}', f'{region} {label} {i}', f'경기도 {region} 병원로 {i}',
+               f'031-{rng.randint(100, 999)}-{i % 10000:04d}', region,
+               round(rng.uniform(*LAT_RANGE), 6), round(rng.uniform(*LON_RANGE), 6))
+
+
+def animal_rows(count, shelters, rng):
+    for i in range(1, count + 1):
+        shelter_id, shelter_name, capacity, address, phone, region = shelters[rng.randrange(len(shelters))]
+        breed = rng.choice(CAT_BREEDS) if rng.random() < 0.4 else rng.choice(DOG_BREEDS)
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        yield (f'bench-animal-{i}', region, f'2024{month:02d}{day:02d}', f'2024{month:02d}{min(day + 10, 28):02d}',
+               breed, None, rng.choice(COLORS), f'{rng.randint(2010, 2024)}(년생)', f'{rng.uniform(0.5, 30):.1f}(Kg)',
+               rng.choice(GENDERS), f'https://example.com/img/{i}.jpg',
+               shelter_id, shelter_name, phone, address, capacity)
+
+
+def build_animal_db(path, animals, shelters, hospitals, pharmacies, seed):
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(etl.SCHEMA_SCRIPT)
+    conn.executescript(etl.SHELTER_KEY_SCRIPT)
+
+    with conn:
+        conn.executemany("INSERT INTO shelter_final (source_key, name, capacity, address, phone) VALUES (?,?,?,?,?)",
+                         shelter_rows(shelters, rng))
+        for table, prefix, label, count in [('hospital_final', 'bench-hospital', '동물병원', hospitals),
+                                            ('pharmacy_final', 'bench-pharmacy', '동물약국', pharmacies)]:
+            conn.executemany(f"INSERT INTO {table} (source_key, name, address, phone, region, lat, lon) VALUES (?,?,?,?,?,?,?)",
+                             facility_rows(prefix, label, count, rng))
+
+    shelter_list = [(row[0], row[1], row[2], row[3], row[4], row[3].split()[1])
+                    for row in conn.execute("SELECT shelter_id, name, capacity, address, phone FROM shelter_final")]
+    columns = ['source_key'] + etl.ANIMAL_COLUMNS
+    insert_sql = f"INSERT INTO animal_status ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    done = 0
+    for chunk in chunked(animal_rows(animals, shelter_list, rng)):
+        with conn:
+            conn.executemany(insert_sql, chunk)
+        done += len(chunk)
+        print(f"\r  동물 {done:,}/{animals:,}", end='', flush=True)
+    print()
+
+    conn.executescript(etl.FTS_SCRIPT + etl.FTS_REBUILD_SCRIPT + etl.build_fts_triggers())
+    conn.executescript(etl.build_bigram_script() + etl.build_bigram_rebuild() + etl.build_bigram_triggers())
+    conn.executescript(etl.RTREE_SCRIPT + etl.build_rtree_rebuild() + etl.build_rtree_triggers())
+    conn.executescript(etl.META_SCRIPT)
+    etl.optimize_db(conn, full=False)
+    conn.close()
+
+
+def build_user_db(path, users, favorites_per_user, animals, seed):
+    rng = random.Random(seed + 1)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(create_user_db.SQL_SCHEMA)
+    conn.executescript(update_db.SQL_SCHEMA)
+    password_hash = generate_password_hash(BENCH_PASSWORD)  # 모든 사용자가 같은 비밀번호 (해시 계산은 한 번만)
+    with conn:
+        conn.executemany("INSERT INTO users (email, password_hash, name, is_admin) VALUES (?, ?, ?, ?)",
+                         ((bench_email(i), password_hash, f'벤치{i}', 1 if i == 1 else 0) for i in range(1, users + 1)))
+        fav_count = min(favorites_per_user, animals)
+        conn.executemany("INSERT INTO favorites (user_id, animal_id) VALUES (?, ?)",
+                         ((user_id, animal_id) for user_id in range(1, users + 1)
+                          for animal_id in rng.sample(range(1, animals + 1), fav_count)))
+    conn.close()
+
+
+def bench_email(i):
+    return f'bench{i}@example.com'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 animal_data.db / user_data.db 생성")
+    parser.add_argument('--scale', choices=SCALES, default='10k', help="동물 수 (10k / 100k / 1m)")
+    parser.add_argument('--animals', type=int, help="동물 수 직접 지정 (--scale 보다 우선)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--favorites', type=int, default=50, help="사용자당 찜 수")
+    parser.add_argument('--out', default=os.path.join(ROOT_DIR, 'benchmarks', 'data'))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    animals = args.animals or SCALES[args.scale]
+    os.makedirs(args.out, exist_ok=True)
+    animal_db = os.path.join(args.out, 'animal_data.db')
+    user_db = os.path.join(args.out, 'user_data.db')
+
+    started = time.perf_counter()
+    print(f"🐾 합성 동물 DB 생성: 동물 {animals:,}건 -> {animal_db}")
+    build_animal_db(animal_db, animals, shelters=max(50, animals // 200),
+                    hospitals=max(200, animals // 20), pharmacies=max(50, animals // 100), seed=args.seed)
+    print(f"👤 합성 회원 DB 생성: 사용자 {args.users:,}명 x 찜 {args.favorites}건 -> {user_db}")
+    build_user_db(user_db, args.users, args.favorites, animals, args.seed)
+    print(f"✅ 완료 ({time.perf_counter() - started:.1f}초)")
+
+
+if __name__ == '__main__':
+    main()
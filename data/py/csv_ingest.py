@@ -0,0 +1,85 @@
+import codecs
+import csv
+import re
+from itertools import islice
+
+# --- CSV -> SQLite 스트리밍 적재 도구 (csvtodb.py, preprocessing.py 공용) ---
+# 파일 전체를 DataFrame 으로 읽지 않고 csv 모듈로 한 줄씩 읽어 CHUNK_ROWS 단위로 executemany 한다.
+# 메모리 사용량은 파일 크기와 무관하게 청크 크기로 고정된다.
+
+CHUNK_ROWS = 5000
+ENCODING_SAMPLE_BYTES = 64 * 1024
+CANDIDATE_ENCODINGS = ['utf-8-sig', 'cp949']
+
+
+def clean_column_name(col):
+    col = re.sub(r'[()\s\/\-\.]+', '_', col.strip())
+    col = re.sub(r'_+', '_', col)
+    col = re.sub(r'(^_|_$)', '', col)
+    return col.lower()
+
+
+def detect_encoding(file_path):
+    """파일 앞부분만 읽어서 디코딩 가능한 인코딩을 찾음 (실패 시 전체를 다시 읽지 않음)"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # 샘플 끝에서 잘린 멀티바이트 문자는 final=False 로 허용
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise UnicodeDecodeError(CANDIDATE_ENCODINGS[-1], sample, 0, 1, "지원하는 인코딩으로 읽을 수 없습니다")
+
+
+def iter_csv_rows(file_path, encoding=None):
+    """(정리된 컬럼명 리스트, 행 iterator) 반환. 빈 문자열은 NULL(None)로 바꾼다."""
+    encoding = encoding or detect_encoding(file_path)
+    f = open(file_path, encoding=encoding, newline='')
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        f.close()
+        return [], iter(())
+    columns = [clean_column_name(col) for col in header]
+    width = len(columns)
+
+    def rows():
+        with f:
+            for row in reader:
+                if not row:
+                    continue
+                row = [v if v != '' else None for v in row[:width]]
+                if len(row) < width:
+                    row.extend([None] * (width - len(row)))
+                yield row
+
+    return columns, rows()
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def stream_csv_to_table(conn, file_path, table_name, chunk_rows=CHUNK_ROWS, encoding=None):
+    """CSV 파일을 table_name 테이블로 교체 적재하고 적재한 행 수를 반환.
+    DROP/CREATE/INSERT 를 한 트랜잭션으로 묶어 실패하면 기존 테이블이 그대로 남는다."""
+    columns, rows = iter_csv_rows(file_path, encoding)
+    if not columns:
+        return 0
+
+    col_defs = ', '.join(f'{quote_ident(c)} TEXT' for c in columns)
+    insert_sql = f"INSERT INTO {quote_ident(table_name)} VALUES ({', '.join('?' * len(columns))})"
+    count = 0
+    with conn:
+        conn.execute("BEGIN")  # DDL도 트랜잭션에 포함되도록 명시적으로 시작
+        conn.execute(f"DROP TABLE IF EXISTS {quote_ident(table_name)}")
+        conn.execute(f"CREATE TABLE {quote_ident(table_name)} ({col_defs})")
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            conn.executemany(insert_sql, chunk)
+            count += len(chunk)
+    return count
@@ -1,7 +1,6 @@
-import pandas as pd
 import sqlite3
-import re
 import os
+from csv_ingest import detect_encoding, stream_csv_to_table
 
 # --- 경로 및 파일 설정 ---
 csv_folder = "../csv" # CSV 파일이 있는 폴더 (database/csv)
@@ -16,15 +15,7 @@ files = {
     "동물약국현황utf8.csv": "animal_pharmacy_status"
 }
 
-# --- 보조 함수 ---
-
-def clean_column_name(col):
-    col = re.sub(r'[()\s\/\-\.]+', '_', col.strip())
-    col = re.sub(r'_+', '_', col)
-    col = re.sub(r'(^_|_$)', '', col)
-    return col.lower()
-
-# --- 메인 함수: 인코딩 재시도 로직 추가 ---
+# --- 메인 함수: 인코딩 감지 + 스트리밍 적재 ---
 
 def create_animal_data_db_with_fallback(files, db_path, csv_folder, db_folder):
     os.makedirs(db_folder, exist_ok=True)
@@ -41,22 +32,17 @@ def create_animal_data_db_with_fallback(files, db_path, csv_folder, db_folder):
         file_path = os.path.join(csv_folder, file_name)
         
         try:
-            # 1차 시도:  'euc-kr' 인코딩
-
-            df = pd.read_csv(file_path, encoding='utf-8')
-            used_encoding = 'utf-8'
-
-            # 컬럼명 정리
-            df.columns = [clean_column_name(col) for col in df.columns]
+            # 인코딩은 파일 앞부분 샘플로 감지 (utf-8 -> cp949 순)
+            used_encoding = detect_encoding(file_path)
 
-            # 데이터베이스에 저장
-            df.to_sql(table_name, conn, if_exists='replace', index=False)
-            print(f" '{table_name}' 테이블로 성공적으로 저장되었습니다. (인코딩: {used_encoding})")
+            # 컬럼명 정리(clean_column_name) 후 청크 단위로 한 트랜잭션에 저장
+            row_count = stream_csv_to_table(conn, file_path, table_name, encoding=used_encoding)
+            print(f" '{table_name}' 테이블로 성공적으로 저장되었습니다. ({row_count}건, 인코딩: {used_encoding})")
         
         except FileNotFoundError:
             print(f" 파일 찾기 오류: '{file_path}' 경로에 파일이 없습니다.")
         except UnicodeDecodeError:
-            print(f"최종 인코딩 오류: '{file_name}'은 'euc-kr'과 'utf-8' 모두로 디코딩할 수 없습니다. 다른 인코딩을 확인해주세요.")
+            print(f"최종 인코딩 오류: '{file_name}'은 'utf-8'과 'cp949' 모두로 디코딩할 수 없습니다. 다른 인코딩을 확인해주세요.")
         except Exception as e:
             print(f"'{file_name}' 처리 중 알 수 없는 오류 발생: {e}")
 
@@ -1,77 +1,246 @@
 import sqlite3
-import pandas as pd
 import os
+import sys
+import hashlib
+import json
+import argparse
+import glob
+import fnmatch
+import importlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from csv_ingest import stream_csv_to_table
 
 # --- 1. 경로 설정 ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 # CSV 파일 폴더 위치
-csv_folder = os.path.join(current_dir, "../csv")      
-db_folder = os.path.join(current_dir, "../processed") 
-db_path = os.path.join(db_folder, "animal_data.db")
+csv_folder = os.path.join(current_dir, "../csv")
+db_folder = os.path.join(current_dir, "../processed")
+db_path = os.path.join(db_folder, "animal_data.db")  # 기본 경로. 서비스 중인 파일은 포인터(animal_data.db.current)가 가리킴
+backend_dir = os.path.join(current_dir, "../../backend")
 
-# 로드할 CSV 목록
+def import_backend(name):
+    """backend/ 모듈 (보관/썸네일/추천/DB 교체 로직을 앱과 같이 씀)"""
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    return importlib.import_module(name)
+
+# 로드할 CSV 목록 (파일명 또는 glob 패턴 -> 원본 테이블)
+# 전국 데이터처럼 같은 테이블로 들어갈 파일이 여러 개면 패턴에 걸리는 파일을 모두 합쳐서 적재한다.
+# (예: 유기동물보호현황_서울utf8.csv, 유기동물보호현황_부산utf8.csv ...)
 csv_files = {
-    "유기동물보호현황utf8.csv": "stray_animal_protection_status",
+    "유기동물보호현황*utf8.csv": "stray_animal_protection_status",
     "동물병원현황utf8.csv": "animal_hospital_status",
     "동물약국현황utf8.csv": "animal_pharmacy_status",
-    "유기 동물 보호 현황_품종코드.csv": "breed_codes" 
+    "유기 동물 보호 현황_품종코드.csv": "breed_codes"
 }
 
 # --- 2. CSV를 DB로 로드하는 함수 ---
-def load_csv_to_db(conn):
-    print("📂 CSV 파일 로드 시작 (보호소 현황은 기존 데이터 유지)...")
-    
-    if not os.path.exists(csv_folder):
-        print(f"⚠️ 경고: CSV 폴더({csv_folder})를 찾을 수 없습니다. 경로를 확인해주세요.")
-    
-    for file_name, table_name in csv_files.items():
-        file_path = os.path.join(csv_folder, file_name)
-        
-        if not os.path.exists(file_path):
-            print(f"  ❌ 파일 없음 (건너뜀): {file_name}")
+# 파일별 SHA-256 해시를 etl_files 테이블에 기록해 두고, 내용이 같은 파일은 다시 읽지 않는다.
+# 바뀐 파일은 프로세스 풀에서 파일마다 별도의 스테이징 SQLite 파일로 병렬 파싱한 뒤,
+# 메인 프로세스가 ATTACH 해서 합치고 마지막에 한 트랜잭션으로 원본 테이블을 교체한다.
+ETL_FILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS etl_files (
+    file_name TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    row_count INTEGER,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+def file_sha256(file_path):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def find_source_files():
+    """csv_files 패턴을 실제 파일 목록으로 펼침: {테이블명: [파일 경로, ...]}"""
+    sources = {}
+    for pattern, table_name in csv_files.items():
+        paths = sorted(glob.glob(os.path.join(glob.escape(csv_folder), pattern)))
+        if not paths:
+            print(f"  ❌ 파일 없음 (건너뜀): {pattern}")
             continue
-            
-        try:
-            # 인코딩 자동 감지
+        sources.setdefault(table_name, []).extend(paths)
+    return sources
+
+def removed_source_files(table_name, paths, known_names):
+    """이전에 적재했지만 지금은 폴더에서 사라진 이 테이블의 파일 이름 목록"""
+    current = {os.path.basename(p) for p in paths}
+    patterns = [pattern for pattern, table in csv_files.items() if table == table_name]
+    return [name for name in known_names
+            if name not in current and any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+
+def stage_csv(file_path, table_name, staging_path):
+    """(작업 프로세스) CSV 하나를 스테이징 DB 파일로 파싱 후 적재 건수 반환"""
+    conn = sqlite3.connect(staging_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    try:
+        return stream_csv_to_table(conn, file_path, table_name)
+    finally:
+        conn.close()
+
+def merge_staged_tables(conn, staged, hashes):
+    """스테이징 파일들을 <테이블>__load 로 합친 뒤, 한 트랜잭션으로 원본 테이블과 교체.
+    staged: {테이블명: [(파일 경로, 스테이징 경로, 건수), ...]}"""
+    for table_name, parts in staged.items():
+        load_table = f"{table_name}__load"
+        conn.execute(f'DROP TABLE IF EXISTS "{load_table}"')
+        for i, (_, staging_path, _) in enumerate(parts):
+            conn.execute("ATTACH DATABASE ? AS stage", (staging_path,))
             try:
-                df = pd.read_csv(file_path, encoding='cp949')
-            except:
-                df = pd.read_csv(file_path, encoding='utf-8')
-            
-            # DB에 저장
-            df.to_sql(table_name, conn, if_exists='replace', index=False)
-            print(f"  ✅ {table_name} 업데이트 완료 ({len(df)}건)")
-        except Exception as e:
-            print(f"  ❌ {file_name} 로드 실패: {e}")
-
-# --- 3. 최종 테이블 생성 SQL (품종 매칭 로직 포함) ---
-SQL_SCRIPT = """
-PRAGMA foreign_keys = ON;
+                if i == 0:
+                    conn.execute(f'CREATE TABLE main."{load_table}" AS SELECT * FROM stage."{table_name}"')
+                else:
+                    # 파일마다 컬럼 순서가 달라도 이름으로 맞춰서 추가
+                    cols = ', '.join(f'"{row[1]}"' for row in conn.execute(f'PRAGMA stage.table_info("{table_name}")'))
+                    conn.execute(f'INSERT INTO main."{load_table}" ({cols}) SELECT {cols} FROM stage."{table_name}"')
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE stage")
 
--- 1. 기존 최종 테이블 삭제 (새로 만들기 위해)
+    with conn:
+        conn.execute("BEGIN")
+        for table_name, parts in staged.items():
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            conn.execute(f'ALTER TABLE "{table_name}__load" RENAME TO "{table_name}"')
+            for file_path, _, row_count in parts:
+                conn.execute(
+                    "INSERT OR REPLACE INTO etl_files (file_name, sha256, row_count) VALUES (?, ?, ?)",
+                    (os.path.basename(file_path), hashes[file_path], row_count)
+                )
+
+def find_changed_sources(conn, force=False):
+    """해시 비교: 테이블에 속한 파일 중 하나라도 바뀌면 그 테이블의 파일 전체를 다시 적재.
+    conn 은 읽기만 하므로 서비스 중인 DB 로 미리 확인할 수 있다. (다시 적재할 {테이블: [경로]}, 사라진 {테이블: [파일 이름]}, {경로: 해시})"""
+    if not os.path.exists(csv_folder):
+        print(f"⚠️ 경고: CSV 폴더({csv_folder})를 찾을 수 없습니다. 경로를 확인해주세요.")
+    sources = find_source_files()
+    known = dict(conn.execute("SELECT file_name, sha256 FROM etl_files")) if table_exists(conn, 'etl_files') else {}
+    hashes = {}
+    targets = {}
+    removed = {}
+    for table_name, paths in sources.items():
+        for path in paths:
+            hashes[path] = file_sha256(path)
+        removed[table_name] = removed_source_files(table_name, paths, known)
+        if force or removed[table_name] or any(known.get(os.path.basename(p)) != hashes[p] for p in paths):
+            targets[table_name] = paths
+        else:
+            print(f"  ⏭️  {table_name} 변경 없음 (건너뜀)")
+    return targets, removed, hashes
+
+def load_csv_to_db(conn, force=False, workers=None, changes=None):
+    """변경된 CSV만 원본 테이블로 다시 적재하고, 다시 적재한 테이블 이름 집합을 반환.
+    changes: 미리 확인한 find_changed_sources 결과 (없으면 conn 으로 확인)"""
+    print("📂 CSV 파일 로드 시작 (보호소 현황은 기존 데이터 유지)...")
+    conn.executescript(ETL_FILES_SCHEMA)
+    targets, removed, hashes = changes or find_changed_sources(conn, force)
+    if not targets:
+        return set()
+
+    # 2. 파일별 병렬 파싱 -> 스테이징 DB
+    jobs = [(table_name, path) for table_name, paths in targets.items() for path in paths]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    staged = {}
+    with tempfile.TemporaryDirectory(dir=db_folder, prefix="staging_") as staging_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for i, (table_name, path) in enumerate(jobs):
+                staging_path = os.path.join(staging_dir, f"{i:03d}_{table_name}.db")
+                futures[pool.submit(stage_csv, path, table_name, staging_path)] = (table_name, path, staging_path)
+
+            failed = set()
+            for future, (table_name, path, staging_path) in futures.items():
+                try:
+                    row_count = future.result()
+                    staged.setdefault(table_name, []).append((path, staging_path, row_count))
+                except Exception as e:
+                    failed.add(table_name)
+                    print(f"  ❌ {os.path.basename(path)} 로드 실패: {e}")
+
+        # 일부 파일이 실패한 테이블은 기존 데이터를 유지
+        for table_name in failed:
+            staged.pop(table_name, None)
+
+        # 3. 병합 및 교체
+        merge_staged_tables(conn, staged, hashes)
+        with conn:
+            for table_name in staged:
+                conn.executemany("DELETE FROM etl_files WHERE file_name = ?",
+                                 [(name,) for name in removed[table_name]])
+
+    for table_name, parts in staged.items():
+        print(f"  ✅ {table_name} 업데이트 완료 ({sum(p[2] for p in parts)}건, 파일 {len(parts)}개)")
+    return set(staged)
+
+# --- 3. 최종 테이블 스키마 ---
+# source_key: 원본 데이터의 자연키 (공고고유번호, 업체명, 시군명|사업장명|인허가일자|지번주소).
+# 증분 갱신 시 이 키로 upsert 하므로 animal_id 등 PK가 바뀌지 않아 찜 목록이 깨지지 않는다.
+# 관리자가 직접 추가한 행은 source_key 가 NULL 이라 ETL이 건드리지 않는다.
+DROP_SCRIPT = """
 DROP TABLE IF EXISTS animal_status;
 DROP TABLE IF EXISTS shelter_final;
 DROP TABLE IF EXISTS hospital_final;
 DROP TABLE IF EXISTS pharmacy_final;
+DROP TABLE IF EXISTS animal_fts;
+DROP TABLE IF EXISTS shelter_fts;
+DROP TABLE IF EXISTS hospital_fts;
+DROP TABLE IF EXISTS pharmacy_fts;
+DROP TABLE IF EXISTS animal_bigram;
+DROP TABLE IF EXISTS shelter_bigram;
+DROP TABLE IF EXISTS hospital_bigram;
+DROP TABLE IF EXISTS pharmacy_bigram;
+DROP TABLE IF EXISTS hospital_rtree;
+DROP TABLE IF EXISTS pharmacy_rtree;
+"""
+
+# --- 조회용 정규화 컬럼 ---
+# 목록 필터/정렬에 쓰는 값을 원본 컬럼에서 계산해 두는 가상(generated) 컬럼.
+# LIKE '%고양이%' 같은 조건 대신 인덱스가 걸린 값으로 비교하고, 날짜는 정수(YYYYMMDD)로 정렬한다.
+# 관리자가 직접 추가한 행도 SQLite 가 자동으로 계산하므로 트리거가 필요 없다.
+def ymd_sql(col):
+    return f"IFNULL(CAST(REPLACE({col}, '-', '') AS INTEGER), 0)"
+
+NORMALIZED_ANIMAL_COLUMNS = [
+    ('species', 'TEXT', "CASE WHEN breed LIKE '%고양이%' THEN 'cat' ELSE 'dog' END"),
+    ('sex', 'TEXT', "CASE WHEN gender = 'M' OR gender LIKE '수컷%' THEN 'M' "
+                    "WHEN gender = 'F' OR gender LIKE '암컷%' THEN 'F' END"),
+    ('register_ymd', 'INTEGER', ymd_sql('register_date')),
+    ('register_end_ymd', 'INTEGER', ymd_sql('register_end_date')),
+]
+
+def generated_column_sql(col_type, expr):
+    return f"{col_type} GENERATED ALWAYS AS ({expr}) VIRTUAL"
+
+NORMALIZED_COLUMN_DEFS = ''.join(
+    f"    {name} {generated_column_sql(col_type, expr)},\n"
+    for name, col_type, expr in NORMALIZED_ANIMAL_COLUMNS
+)
 
--- 2. 보호소 테이블 (shelter_final)
+SCHEMA_SCRIPT = f"""
+PRAGMA foreign_keys = ON;
+
+-- 1. 보호소 테이블 (shelter_final)
 -- 기존에 로드된 stray_animal_shelter_status 테이블 사용
-CREATE TABLE shelter_final (
+CREATE TABLE IF NOT EXISTS shelter_final (
     shelter_id INTEGER PRIMARY KEY,
+    source_key TEXT UNIQUE,
     name TEXT NOT NULL,
     capacity INTEGER,
     address TEXT,
-    phone TEXT
+    phone TEXT,
+    phone_digits TEXT,  -- 매칭용: 전화번호 숫자만 (트리거가 채움)
+    name_norm TEXT      -- 매칭용: 공백 없는 보호소명 (트리거가 채움)
 );
 
-INSERT INTO shelter_final (name, capacity, address, phone)
-SELECT 업체명, CAST(수용능력수 AS INTEGER), 소재지지번주소, 업체전화번호
-FROM stray_animal_shelter_status
-ORDER BY 업체명;
-
--- 3. 동물병원 테이블
-CREATE TABLE hospital_final (
+-- 2. 동물병원 테이블
+CREATE TABLE IF NOT EXISTS hospital_final (
     hospital_id INTEGER PRIMARY KEY,
+    source_key TEXT UNIQUE,
     name TEXT NOT NULL,
     address TEXT,
     phone TEXT,
@@ -79,13 +248,11 @@ CREATE TABLE hospital_final (
     lat REAL,
     lon REAL
 );
-INSERT INTO hospital_final (name, address, phone, region, lat, lon)
-SELECT 사업장명, 소재지지번주소, 소재지시설전화번호, 시군명, WGS84위도, WGS84경도
-FROM animal_hospital_status WHERE 영업상태명 = '정상' ORDER BY 사업장명;
 
--- 4. 동물약국 테이블
-CREATE TABLE pharmacy_final (
+-- 3. 동물약국 테이블
+CREATE TABLE IF NOT EXISTS pharmacy_final (
     pharmacy_id INTEGER PRIMARY KEY,
+    source_key TEXT UNIQUE,
     name TEXT NOT NULL,
     address TEXT,
     phone TEXT,
@@ -93,13 +260,11 @@ CREATE TABLE pharmacy_final (
     lat REAL,
     lon REAL
 );
-INSERT INTO pharmacy_final (name, address, phone, region, lat, lon)
-SELECT 사업장명, 소재지지번주소, 소재지시설전화번호, 시군명, WGS84위도, WGS84경도
-FROM animal_pharmacy_status WHERE 영업상태명 = '정상' ORDER BY 사업장명;
 
--- 5. 유기동물 현황 테이블 (animal_status)
-CREATE TABLE animal_status (
+-- 4. 유기동물 현황 테이블 (animal_status)
+CREATE TABLE IF NOT EXISTS animal_status (
     animal_id INTEGER PRIMARY KEY,
+    source_key TEXT UNIQUE,  -- 공고고유번호
     region TEXT,
     register_date TEXT,
     register_end_date TEXT,
@@ -112,60 +277,635 @@ CREATE TABLE animal_status (
     image_url TEXT,
     shelter_id INTEGER,
     shelter_name TEXT,
-    FOREIGN KEY(shelter_id) REFERENCES shelter_final(shelter_id)
+    -- 상세 팝업용 보호소 정보 (조인 없이 PK 조회 한 번으로 끝나도록 미리 복사)
+    shelter_phone TEXT,
+    shelter_address TEXT,
+    shelter_capacity INTEGER,
+    -- 필터/정렬용 정규화 컬럼 (species: dog/cat, sex: M/F, 날짜: YYYYMMDD 정수)
+{NORMALIZED_COLUMN_DEFS}    FOREIGN KEY(shelter_id) REFERENCES shelter_final(shelter_id)
 );
+"""
 
-INSERT INTO animal_status (
-    region, register_date, register_end_date, breed, breed_code, color, years, weight, gender, image_url, shelter_id, shelter_name
-)
-SELECT
-    p.시군명,
-    p.공고시작일자,
-    p.공고종료일자,
-    COALESCE(b.품종명, p.품종) AS breed_final,
-    p.품종 AS breed_code_origin,
-    p.색상,
-    p.나이,
-    p.체중,
-    p.성별,
-    -- 이미지 (썸네일 우선)
-    COALESCE(p.썸네일이미지경로, p.이미지경로),
-    COALESCE(s_phone.shelter_id, s_name.shelter_id),
-    p.보호소명
-FROM stray_animal_protection_status p
-LEFT JOIN breed_codes b ON CAST(p.품종 AS INTEGER) = CAST(b.품종 AS INTEGER)
-LEFT JOIN shelter_final s_phone ON REPLACE(p.보호소전화번호, '-', '') = REPLACE(s_phone.phone, '-', '')
-LEFT JOIN shelter_final s_name ON p.보호소명 = s_name.name
-WHERE p.상태 = '보호중'
-ORDER BY p.공고시작일자 DESC;
+# 예전 스키마로 만든 DB 에 나중에 추가된 컬럼 (증분 갱신 시 ALTER TABLE 로 추가)
+SCHEMA_MIGRATIONS = {
+    'shelter_final': [('phone_digits', 'TEXT'), ('name_norm', 'TEXT')],
+    'animal_status': [('shelter_phone', 'TEXT'), ('shelter_address', 'TEXT'), ('shelter_capacity', 'INTEGER')]
+                     + [(name, generated_column_sql(col_type, expr)) for name, col_type, expr in NORMALIZED_ANIMAL_COLUMNS],
+}
+
+def table_columns(conn, table):
+    """테이블의 컬럼 이름 집합. generated(VIRTUAL) 컬럼은 table_info 에 보이지 않으므로 table_xinfo 로 읽는다"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+def missing_columns(conn):
+    """아직 추가하지 않은 컬럼 [(테이블, 컬럼, 타입)]"""
+    missing = []
+    for table, columns in SCHEMA_MIGRATIONS.items():
+        existing = table_columns(conn, table)
+        missing.extend((table, name, col_type) for name, col_type in columns if name not in existing)
+    return missing
+
+def migrate_schema(conn):
+    """빠진 컬럼을 추가하고, 추가한 것이 있으면 True (전체 병합으로 값을 채워야 함)"""
+    missing = missing_columns(conn)
+    for table, name, col_type in missing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+    conn.commit()
+    return bool(missing)
+
+# --- 보호소 매칭 키 ---
+# 보호소는 전화번호(숫자만) 또는 공백을 뺀 이름으로 찾는다. 두 키 모두 인덱스를 걸어
+# 동물 행마다 보호소 테이블을 훑지 않도록 한다.
+def phone_digits_sql(expr):
+    return f"REPLACE(REPLACE(REPLACE(REPLACE(REPLACE({expr}, '-', ''), ' ', ''), '(', ''), ')', ''), '.', '')"
+
+def name_norm_sql(expr):
+    return f"REPLACE({expr}, ' ', '')"
+
+SHELTER_KEY_SCRIPT = f"""
+CREATE INDEX IF NOT EXISTS idx_shelter_phone_digits ON shelter_final(phone_digits);
+CREATE INDEX IF NOT EXISTS idx_shelter_name_norm ON shelter_final(name_norm);
+CREATE INDEX IF NOT EXISTS idx_animal_shelter_id ON animal_status(shelter_id);
+
+-- 매칭 키는 보호소가 추가/수정될 때 트리거로 계산 (관리자 추가 포함)
+CREATE TRIGGER IF NOT EXISTS shelter_keys_ai AFTER INSERT ON shelter_final BEGIN
+    UPDATE shelter_final
+    SET phone_digits = {phone_digits_sql('new.phone')}, name_norm = {name_norm_sql('new.name')}
+    WHERE shelter_id = new.shelter_id;
+END;
+CREATE TRIGGER IF NOT EXISTS shelter_keys_au AFTER UPDATE OF phone, name ON shelter_final BEGIN
+    UPDATE shelter_final
+    SET phone_digits = {phone_digits_sql('new.phone')}, name_norm = {name_norm_sql('new.name')}
+    WHERE shelter_id = new.shelter_id;
+END;
+
+-- 보호소 정보가 바뀌거나 삭제되면 동물 행에 복사해 둔 값도 함께 갱신
+CREATE TRIGGER IF NOT EXISTS shelter_detail_au AFTER UPDATE OF phone, address, capacity ON shelter_final BEGIN
+    UPDATE animal_status
+    SET shelter_phone = new.phone, shelter_address = new.address, shelter_capacity = new.capacity
+    WHERE shelter_id = new.shelter_id;
+END;
+CREATE TRIGGER IF NOT EXISTS shelter_detail_ad AFTER DELETE ON shelter_final BEGIN
+    UPDATE animal_status
+    SET shelter_id = NULL, shelter_phone = NULL, shelter_address = NULL, shelter_capacity = NULL
+    WHERE shelter_id = old.shelter_id;
+END;
+
+-- 보호소 없이 추가된 동물(관리자 입력 등)은 보호소명으로 찾아서 채움
+CREATE TRIGGER IF NOT EXISTS animal_shelter_ai AFTER INSERT ON animal_status
+WHEN new.shelter_id IS NULL AND new.shelter_name IS NOT NULL BEGIN
+    UPDATE animal_status
+    SET (shelter_id, shelter_phone, shelter_address, shelter_capacity) = (
+        SELECT shelter_id, phone, address, capacity FROM shelter_final
+        WHERE name_norm = {name_norm_sql('new.shelter_name')}
+        ORDER BY shelter_id LIMIT 1
+    )
+    WHERE animal_id = new.animal_id
+      AND EXISTS (SELECT 1 FROM shelter_final WHERE name_norm = {name_norm_sql('new.shelter_name')});
+END;
+
+-- 예전 DB 에서 넘어온 보호소 행의 매칭 키 채우기
+UPDATE shelter_final
+SET phone_digits = {phone_digits_sql('phone')}, name_norm = {name_norm_sql('name')}
+WHERE name_norm IS NULL;
 """
 
-def main():
-    if not os.path.exists(db_folder):
-        os.makedirs(db_folder, exist_ok=True)
-        
-    conn = sqlite3.connect(db_path)
-    print(f"데이터베이스 연결: {db_path}")
-
-    # 1. CSV 로드 (품종 코드 포함)
-    load_csv_to_db(conn)
-    
-    # 2. SQL 실행 (매칭 및 테이블 생성)
+# --- 4. 원본 -> 최종 테이블 병합 SQL (upsert + 사라진 행 삭제) ---
+# 값이 실제로 바뀐 행만 UPDATE 되도록 DO UPDATE ... WHERE 로 비교한다.
+MERGE_SHELTER_SQL = [
+    """
+    INSERT INTO shelter_final (source_key, name, capacity, address, phone)
+    SELECT 업체명, 업체명, CAST(수용능력수 AS INTEGER), 소재지지번주소, 업체전화번호
+    FROM stray_animal_shelter_status
+    WHERE 업체명 IS NOT NULL
+    ORDER BY 업체명
+    ON CONFLICT(source_key) DO UPDATE SET
+        capacity = excluded.capacity, address = excluded.address, phone = excluded.phone
+    WHERE (shelter_final.capacity, shelter_final.address, shelter_final.phone)
+          IS NOT (excluded.capacity, excluded.address, excluded.phone)
+    """,
+    """
+    DELETE FROM shelter_final
+    WHERE source_key IS NOT NULL
+      AND source_key NOT IN (SELECT 업체명 FROM stray_animal_shelter_status WHERE 업체명 IS NOT NULL)
+    """,
+]
+
+def build_facility_merge_sql(final_table, source_table):
+    """병원/약국 공통 병합 SQL (자연키: 시군명|사업장명|인허가일자|지번주소)
+    원본에 완전히 같은 행이 중복으로 들어 있는 경우는 하나로 합쳐진다."""
+    source_key = "시군명 || '|' || 사업장명 || '|' || IFNULL(인허가일자, '') || '|' || IFNULL(소재지지번주소, '')"
+    return [
+        f"""
+        INSERT INTO {final_table} (source_key, name, address, phone, region, lat, lon)
+        SELECT {source_key}, 사업장명, 소재지지번주소, 소재지시설전화번호, 시군명, WGS84위도, WGS84경도
+        FROM {source_table} WHERE 영업상태명 = '정상' AND 사업장명 IS NOT NULL
+        ORDER BY 사업장명
+        ON CONFLICT(source_key) DO UPDATE SET
+            phone = excluded.phone, lat = excluded.lat, lon = excluded.lon
+        WHERE ({final_table}.phone, {final_table}.lat, {final_table}.lon)
+              IS NOT (excluded.phone, excluded.lat, excluded.lon)
+        """,
+        f"""
+        DELETE FROM {final_table}
+        WHERE source_key IS NOT NULL
+          AND source_key NOT IN (
+              SELECT {source_key} FROM {source_table}
+              WHERE 영업상태명 = '정상' AND 사업장명 IS NOT NULL
+          )
+        """,
+    ]
+
+ANIMAL_COLUMNS = [
+    'region', 'register_date', 'register_end_date', 'breed', 'breed_code', 'color',
+    'years', 'weight', 'gender', 'image_url', 'shelter_id', 'shelter_name',
+    'shelter_phone', 'shelter_address', 'shelter_capacity',
+]
+
+# 품종 매칭 로직 포함. 공고가 끝났거나(상태 != 보호중) 원본에서 사라진 공고는 삭제한다.
+# 공고 종료일이 지난 공고는 병합 전에 animal_archive 로 옮기므로(archive_expired) 다시 넣지 않는다.
+# 보호소는 공고마다 한 번, 인덱스가 걸린 매칭 키로 찾는다 (전화번호 우선, 없으면 이름).
+NOT_EXPIRED_SQL = (f"({ymd_sql('src.공고종료일자')} = 0 OR "
+                   f"{ymd_sql('src.공고종료일자')} >= CAST(strftime('%Y%m%d', 'now', 'localtime') AS INTEGER))")
+
+MERGE_ANIMAL_SQL = [
+    f"""
+    INSERT INTO animal_status (source_key, {', '.join(ANIMAL_COLUMNS)})
+    SELECT
+        CAST(p.공고고유번호 AS TEXT),
+        p.시군명,
+        p.공고시작일자,
+        p.공고종료일자,
+        COALESCE(b.품종명, p.품종) AS breed_final,
+        p.품종 AS breed_code_origin,
+        p.색상,
+        p.나이,
+        p.체중,
+        p.성별,
+        -- 이미지 (썸네일 우선)
+        COALESCE(p.썸네일이미지경로, p.이미지경로),
+        p.resolved_shelter_id,
+        p.보호소명,
+        s.phone,
+        s.address,
+        s.capacity
+    FROM (
+        SELECT src.*,
+               COALESCE(
+                   (SELECT shelter_id FROM shelter_final
+                    WHERE phone_digits = {phone_digits_sql('src.보호소전화번호')} ORDER BY shelter_id LIMIT 1),
+                   (SELECT shelter_id FROM shelter_final
+                    WHERE name_norm = {name_norm_sql('src.보호소명')} ORDER BY shelter_id LIMIT 1)
+               ) AS resolved_shelter_id
+        FROM stray_animal_protection_status src
+        WHERE src.상태 = '보호중' AND src.공고고유번호 IS NOT NULL AND {NOT_EXPIRED_SQL}
+    ) p
+    LEFT JOIN breed_codes b ON CAST(p.품종 AS INTEGER) = CAST(b.품종 AS INTEGER)
+    LEFT JOIN shelter_final s ON s.shelter_id = p.resolved_shelter_id
+    WHERE true
+    ORDER BY p.공고시작일자 DESC
+    ON CONFLICT(source_key) DO UPDATE SET
+        {', '.join(f'{c} = excluded.{c}' for c in ANIMAL_COLUMNS)}
+    WHERE ({', '.join(f'animal_status.{c}' for c in ANIMAL_COLUMNS)})
+          IS NOT ({', '.join(f'excluded.{c}' for c in ANIMAL_COLUMNS)})
+    """,
+    f"""
+    DELETE FROM animal_status
+    WHERE source_key IS NOT NULL
+      AND source_key NOT IN (
+          SELECT CAST(공고고유번호 AS TEXT) FROM stray_animal_protection_status src
+          WHERE 상태 = '보호중' AND 공고고유번호 IS NOT NULL AND {NOT_EXPIRED_SQL}
+      )
+    """,
+]
+
+# (최종 테이블, 병합 SQL, 이 테이블이 의존하는 원본/최종 테이블)
+MERGE_STEPS = [
+    ('shelter_final', MERGE_SHELTER_SQL, set()),
+    ('hospital_final', build_facility_merge_sql('hospital_final', 'animal_hospital_status'), {'animal_hospital_status'}),
+    ('pharmacy_final', build_facility_merge_sql('pharmacy_final', 'animal_pharmacy_status'), {'animal_pharmacy_status'}),
+    ('animal_status', MERGE_ANIMAL_SQL, {'stray_animal_protection_status', 'breed_codes', 'shelter_final'}),
+]
+
+# --- 5. 전문 검색(FTS5) 인덱스 ---
+# 검색창 키워드는 LIKE '%키워드%' 대신 trigram 토크나이저 FTS5 인덱스로 찾는다.
+# (trigram은 한글도 글자 단위로 부분 일치 검색이 가능, 단 3글자 이상 단어만. 두 글자 단어는 아래 bigram 인덱스)
+# 관리자 추가/삭제와 증분 갱신도 반영되도록 원본 테이블에 트리거를 걸어 동기화한다.
+FTS_SCRIPT = """
+CREATE VIRTUAL TABLE IF NOT EXISTS animal_fts USING fts5(
+    breed, shelter_name,
+    content='animal_status', content_rowid='animal_id', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS shelter_fts USING fts5(
+    name, address,
+    content='shelter_final', content_rowid='shelter_id', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS hospital_fts USING fts5(
+    name, address,
+    content='hospital_final', content_rowid='hospital_id', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pharmacy_fts USING fts5(
+    name, address,
+    content='pharmacy_final', content_rowid='pharmacy_id', tokenize='trigram'
+);
+"""
+
+FTS_REBUILD_SCRIPT = """
+INSERT INTO animal_fts(animal_fts) VALUES ('rebuild');
+INSERT INTO shelter_fts(shelter_fts) VALUES ('rebuild');
+INSERT INTO hospital_fts(hospital_fts) VALUES ('rebuild');
+INSERT INTO pharmacy_fts(pharmacy_fts) VALUES ('rebuild');
+"""
+
+# 원본 테이블 -> FTS 동기화 트리거 (테이블명, FTS명, PK, 검색 컬럼)
+FTS_SOURCES = [
+    ('animal_status', 'animal_fts', 'animal_id', ['breed', 'shelter_name']),
+    ('shelter_final', 'shelter_fts', 'shelter_id', ['name', 'address']),
+    ('hospital_final', 'hospital_fts', 'hospital_id', ['name', 'address']),
+    ('pharmacy_final', 'pharmacy_fts', 'pharmacy_id', ['name', 'address']),
+]
+
+def build_fts_triggers():
+    script = ""
+    for table, fts, pk, cols in FTS_SOURCES:
+        col_list = ', '.join(cols)
+        new_vals = ', '.join(f'new.{c}' for c in cols)
+        old_vals = ', '.join(f'old.{c}' for c in cols)
+        script += f"""
+CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts}(rowid, {col_list}) VALUES (new.{pk}, {new_vals});
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.{pk}, {old_vals});
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.{pk}, {old_vals});
+    INSERT INTO {fts}(rowid, {col_list}) VALUES (new.{pk}, {new_vals});
+END;
+"""
+    return script
+
+# --- 5-1. 두 글자 검색어용 bigram 인덱스 ---
+# trigram 인덱스는 3글자 미만 단어를 찾지 못하는데, 품종/지역 검색어는 대부분 두 글자다. (믹스, 진도, 수원 ...)
+# 검색 컬럼을 두 글자씩 잘라 공백으로 이은 문자열을 unicode61 토크나이저 FTS5 표에 넣어 두고,
+# 두 글자 단어는 이 표에서 토큰 일치로 찾는다. (contentless 표라 행 id 와 색인만 저장)
+# 트리거 안에서는 WITH 를 쓸 수 없어서 json_each 로 글자 위치 1..BIGRAM_MAX_CHARS 를 만든다.
+BIGRAM_MAX_CHARS = 128  # 이보다 긴 값은 앞부분만 색인
+BIGRAM_POSITIONS = json.dumps(list(range(1, BIGRAM_MAX_CHARS)))
+
+# (원본 테이블, bigram 표, PK, 검색 컬럼) - FTS_SOURCES 와 같은 컬럼
+BIGRAM_SOURCES = [(table, fts.replace('_fts', '_bigram'), pk, cols) for table, fts, pk, cols in FTS_SOURCES]
+
+def bigram_sql(cols, prefix=''):
+    """검색 컬럼 값을 두 글자씩 잘라 공백으로 이은 문자열 (예: '믹스견' -> '믹스 스견')"""
+    text = " || ' ' || ".join(f"IFNULL({prefix}{c}, '')" for c in cols)
+    return (f"(SELECT group_concat(substr(t.v, p.value, 2), ' ') FROM (SELECT {text} AS v) t, "
+            f"json_each('{BIGRAM_POSITIONS}') p WHERE p.value < length(t.v))")
+
+def build_bigram_script():
+    return ''.join(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {bigram} USING fts5(grams, content='', tokenize='unicode61');\n"
+        for _, bigram, _, _ in BIGRAM_SOURCES
+    )
+
+def build_bigram_rebuild():
+    script = ""
+    for table, bigram, pk, cols in BIGRAM_SOURCES:
+        script += f"""
+INSERT INTO {bigram}({bigram}) VALUES ('delete-all');
+INSERT INTO {bigram}(rowid, grams) SELECT {pk}, {bigram_sql(cols)} FROM {table};
+"""
+    return script
+
+def build_bigram_triggers():
+    # contentless 표는 지울 때 넣었던 값과 같은 값을 넘겨야 하므로 old.* 로 같은 식을 다시 계산
+    script = ""
+    for table, bigram, pk, cols in BIGRAM_SOURCES:
+        script += f"""
+CREATE TRIGGER IF NOT EXISTS {bigram}_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO {bigram}(rowid, grams) VALUES (new.{pk}, {bigram_sql(cols, 'new.')});
+END;
+CREATE TRIGGER IF NOT EXISTS {bigram}_ad AFTER DELETE ON {table} BEGIN
+    INSERT INTO {bigram}({bigram}, rowid, grams) VALUES ('delete', old.{pk}, {bigram_sql(cols, 'old.')});
+END;
+CREATE TRIGGER IF NOT EXISTS {bigram}_au AFTER UPDATE OF {pk}, {', '.join(cols)} ON {table} BEGIN
+    INSERT INTO {bigram}({bigram}, rowid, grams) VALUES ('delete', old.{pk}, {bigram_sql(cols, 'old.')});
+    INSERT INTO {bigram}(rowid, grams) VALUES (new.{pk}, {bigram_sql(cols, 'new.')});
+END;
+"""
+    return script
+
+# --- 6. 위치 검색용 R*Tree 인덱스 ---
+# 병원/약국 좌표(lat/lon)를 R*Tree 에 넣어 두면 반경 검색이 전체 스캔 없이 인덱스로 처리된다.
+# 좌표가 없거나 0 인 행(관리자 직접 추가 등)은 넣지 않는다.
+RTREE_SCRIPT = """
+CREATE VIRTUAL TABLE IF NOT EXISTS hospital_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+CREATE VIRTUAL TABLE IF NOT EXISTS pharmacy_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+"""
+
+# (원본 테이블, R*Tree 이름, PK)
+RTREE_SOURCES = [
+    ('hospital_final', 'hospital_rtree', 'hospital_id'),
+    ('pharmacy_final', 'pharmacy_rtree', 'pharmacy_id'),
+]
+
+def build_rtree_rebuild():
+    script = ""
+    for table, rtree, pk in RTREE_SOURCES:
+        script += f"""
+DELETE FROM {rtree};
+INSERT INTO {rtree} (id, min_lat, max_lat, min_lon, max_lon)
+SELECT {pk}, lat, lat, lon, lon FROM {table}
+WHERE lat IS NOT NULL AND lon IS NOT NULL AND lat != 0 AND lon != 0;
+"""
+    return script
+
+def build_rtree_triggers():
+    script = ""
+    for table, rtree, pk in RTREE_SOURCES:
+        has_coords = "new.lat IS NOT NULL AND new.lon IS NOT NULL AND new.lat != 0 AND new.lon != 0"
+        script += f"""
+CREATE TRIGGER IF NOT EXISTS {rtree}_ai AFTER INSERT ON {table} WHEN {has_coords} BEGIN
+    INSERT INTO {rtree} VALUES (new.{pk}, new.lat, new.lat, new.lon, new.lon);
+END;
+CREATE TRIGGER IF NOT EXISTS {rtree}_ad AFTER DELETE ON {table} BEGIN
+    DELETE FROM {rtree} WHERE id = old.{pk};
+END;
+CREATE TRIGGER IF NOT EXISTS {rtree}_au AFTER UPDATE OF lat, lon ON {table} BEGIN
+    DELETE FROM {rtree} WHERE id = old.{pk};
+    INSERT INTO {rtree} SELECT new.{pk}, new.lat, new.lat, new.lon, new.lon WHERE {has_coords};
+END;
+"""
+    return script
+
+# --- 7. 데이터 버전 ---
+# 앱은 meta.data_version 값이 바뀌면 필터 목록 등 메모리 캐시를 다시 계산한다.
+# (관리자 추가/삭제 시에도 app.py 에서 같은 값을 올림)
+META_SCRIPT = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+INSERT INTO meta (key, value) VALUES ('data_version', 1)
+ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1;
+"""
+
+# --- 8. 조회 최적화 (인덱스 / 통계 / VACUUM) ---
+# app.py 의 각 화면 쿼리에 맞춘 인덱스. backend/check_query_plans.py 로 실제 쿼리 플랜을 확인할 수 있다.
+INDEX_SCRIPT = """
+-- /animals, 메인: 최신순/오래된순 키셋 페이지네이션, 지역/종/성별 필터
+CREATE INDEX IF NOT EXISTS idx_animal_register ON animal_status(register_ymd, animal_id);
+CREATE INDEX IF NOT EXISTS idx_animal_region_register ON animal_status(region, register_ymd);
+CREATE INDEX IF NOT EXISTS idx_animal_species_sex_register ON animal_status(species, sex, register_ymd);
+-- 지역별 종/성별 건수(facet)는 이 인덱스만 읽고 계산 (커버링 인덱스)
+CREATE INDEX IF NOT EXISTS idx_animal_facets ON animal_status(region, species, sex);
+-- /animals 마감 임박순, "N일 이내 마감" 필터, 공고 종료 동물 보관(backend/lifecycle.py)
+CREATE INDEX IF NOT EXISTS idx_animal_end ON animal_status(register_end_ymd, animal_id);
+CREATE INDEX IF NOT EXISTS idx_animal_region_end ON animal_status(region, register_end_ymd);
+
+-- /hospital: 이름순 정렬, 지역 필터
+CREATE INDEX IF NOT EXISTS idx_hospital_name ON hospital_final(name);
+CREATE INDEX IF NOT EXISTS idx_hospital_region_name ON hospital_final(region, name);
+CREATE INDEX IF NOT EXISTS idx_pharmacy_name ON pharmacy_final(name);
+CREATE INDEX IF NOT EXISTS idx_pharmacy_region_name ON pharmacy_final(region, name);
+
+-- /shelter: 이름순 정렬
+CREATE INDEX IF NOT EXISTS idx_shelter_name ON shelter_final(name);
+"""
+
+VACUUM_FREE_RATIO = 0.2  # 빈 페이지가 이 비율을 넘으면 증분 갱신 후에도 VACUUM
+
+def optimize_db(conn, full):
+    """인덱스 생성 후 통계(ANALYZE)를 갱신하고, 필요하면 VACUUM 으로 파일을 정리"""
+    conn.executescript(INDEX_SCRIPT)
+    conn.execute("ANALYZE")
+    conn.commit()
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if full or (page_count and free_count / page_count > VACUUM_FREE_RATIO):
+        conn.execute("VACUUM")
+        print(f"  🧹 VACUUM 완료 (빈 페이지 {free_count}/{page_count})")
+    print("  📈 인덱스/통계 갱신 완료")
+
+def table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+def needs_full_rebuild(conn):
+    """source_key 컬럼이 없는 예전 스키마(또는 빈 DB)면 전체 재구축이 필요"""
+    return 'source_key' not in table_columns(conn, 'animal_status')
+
+def needs_schema_update(conn):
+    """전체 재구축, 위치/두 글자 검색 인덱스 채우기, 컬럼 추가 중 하나라도 필요하면 True (CSV 가 같아도 갱신)"""
+    return (needs_full_rebuild(conn) or not table_exists(conn, 'hospital_rtree')
+            or not table_exists(conn, 'animal_bigram') or bool(missing_columns(conn)))
+
+def run_merges(conn, changed, full):
+    for table, statements, sources in MERGE_STEPS:
+        if not full and sources and not (sources & changed):
+            continue
+        changes = 0
+        for sql in statements:
+            changes += conn.execute(sql).rowcount  # FTS 트리거가 바꾼 행은 제외
+        if changes:
+            changed.add(table)  # 이 테이블에 의존하는 다음 병합도 실행
+        print(f"  🔄 {table} 병합 완료 (변경 {changes}건)")
+
+# --- 8-1. 새 버전 파일에서 갱신 후 교체 (blue/green) ---
+# 서비스 중인 DB 를 온라인 백업으로 복사한 새 버전 파일(animal_data.<시각>.db)에서 갱신하고,
+# 무결성/행 수를 확인한 뒤 포인터만 바꾼다. 앱은 갱신 중에도 예전 파일을 그대로 읽는다.
+# 공고 종료로 보관 테이블에 옮긴 동물은 사라진 행이 아니므로 보호 중 + 보관 행 수를 합쳐서 비교한다
+VALIDATE_TABLES = {
+    'animal_status': ['animal_status', 'animal_archive'],
+    'shelter_final': ['shelter_final'],
+    'hospital_final': ['hospital_final'],
+    'pharmacy_final': ['pharmacy_final'],
+}
+MIN_ROW_RATIO = 0.5  # 이전 버전보다 행 수가 이 비율 아래로 줄면 교체하지 않음 (--force 로 무시)
+
+def count_rows(conn, table):
     try:
-        conn.executescript(SQL_SCRIPT)
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+def validate_db(conn, previous_path, force=False):
+    """교체해도 되는지 확인하고 문제 목록을 반환 (비어 있으면 통과)"""
+    errors = []
+    result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    if result != 'ok':
+        errors.append(f"integrity_check: {result}")
+    previous = sqlite3.connect(f"file:{previous_path}?mode=ro", uri=True) if os.path.exists(previous_path) else None
+    try:
+        for tables in VALIDATE_TABLES.values():
+            label = ' + '.join(tables)
+            old_count = sum(count_rows(previous, table) for table in tables) if previous else 0
+            new_count = sum(count_rows(conn, table) for table in tables)
+            print(f"  🔎 {label}: {old_count} -> {new_count}")
+            if not force and old_count and new_count < old_count * MIN_ROW_RATIO:
+                errors.append(f"{label} 행 수가 {old_count} -> {new_count} 로 줄었습니다")
+    finally:
+        if previous:
+            previous.close()
+    return errors
+
+def update_db(conn, full=False, workers=None, changes=None):
+    """conn 의 DB 를 갱신. 바뀐 것이 없거나 SQL 오류로 갱신하지 않았으면 False"""
+    if not full and needs_full_rebuild(conn):
+        print("ℹ️ 증분 갱신용 스키마가 없어 전체 재구축합니다.")
+        full = True
+
+    # 1. CSV 로드 (품종 코드 포함, 변경된 파일만 병렬로)
+    changed = load_csv_to_db(conn, force=full, workers=workers, changes=None if full else changes)
+    # 위치 / 두 글자 검색 인덱스가 생기기 전의 DB 라면 이번 실행에서 한 번 채워 넣는다
+    missing_rtree = not full and not table_exists(conn, 'hospital_rtree')
+    missing_bigram = not full and not table_exists(conn, 'animal_bigram')
+    # 컬럼이 추가된 경우 모든 행을 다시 병합해서 새 컬럼 값을 채움
+    upgraded = not full and migrate_schema(conn)
+    if not full and not changed and not missing_rtree and not missing_bigram and not upgraded:
+        print("\n 변경된 CSV가 없어 DB 갱신을 건너뜁니다.")
+        return False
+
+    # 2. SQL 실행 (매칭 및 병합)
+    try:
+        # 공고 종료일이 지난 동물은 삭제 대신 보관 (찜 목록에서 계속 보이도록). 전체 재구축도 지우기 전에 옮긴다
+        if table_exists(conn, 'animal_status'):
+            archive_expired(conn)
+        if full:
+            conn.executescript(DROP_SCRIPT)
+        conn.executescript(SCHEMA_SCRIPT)
+        conn.executescript(SHELTER_KEY_SCRIPT)
+        # 보관 테이블 / 종료일 인덱스 / 새 id 트리거 (전체 재구축이면 animal_status 와 함께 지워졌으므로 다시 만듦)
+        import_backend('lifecycle').ensure_schema(conn)
+        if not full:
+            # 트리거가 병합 중 변경분을 FTS / R*Tree 에 반영
+            conn.executescript(FTS_SCRIPT + build_fts_triggers())
+            conn.executescript(build_bigram_script() + build_bigram_triggers())
+            conn.executescript(RTREE_SCRIPT + build_rtree_triggers())
+            if missing_rtree:
+                conn.executescript(build_rtree_rebuild())
+            if missing_bigram:
+                conn.executescript(build_bigram_rebuild())
+
+        with conn:
+            run_merges(conn, changed, full or upgraded)
+
+        if full:
+            # 전체 재구축은 행 단위 트리거 대신 한 번에 색인
+            conn.executescript(FTS_SCRIPT + FTS_REBUILD_SCRIPT + build_fts_triggers())
+            conn.executescript(build_bigram_script() + build_bigram_rebuild() + build_bigram_triggers())
+            conn.executescript(RTREE_SCRIPT + build_rtree_rebuild() + build_rtree_triggers())
+        conn.executescript(META_SCRIPT)
         conn.commit()
+        optimize_db(conn, full)
         print("\n DB 업데이트 완료!")
-        
+
         # 확인
         cursor = conn.cursor()
         cursor.execute("SELECT breed, breed_code FROM animal_status LIMIT 3")
         rows = cursor.fetchall()
         print(f" 변환 결과 예시 (품종명 / 코드): {rows}")
-        
+
     except Exception as e:
         print(f"\n SQL 실행 오류: {e}")
-    
-    conn.close()
+        return False
+    return True
+
+def main(full=False, workers=None, in_place=False, force=False, thumbs=False, similar=False):
+    """갱신 후 서비스 중인 DB 파일 경로를 반환.
+    thumbs / similar: 교체하기 전에 새 버전으로 썸네일 캐시를 채우고 비슷한 동물 표를 만듦"""
+    if not os.path.exists(db_folder):
+        os.makedirs(db_folder, exist_ok=True)
+
+    db = import_backend('db')
+    if in_place:
+        active_path = db.resolve_animal_db(db_path)
+        conn = sqlite3.connect(active_path)
+        print(f"데이터베이스 연결: {active_path} (직접 갱신)")
+        try:
+            update_db(conn, full, workers)
+            if similar:
+                build_similar(conn)
+        finally:
+            conn.close()
+        if thumbs:
+            prewarm_thumbnails(active_path)
+        return active_path
+
+    # 바뀐 CSV 가 없으면 복사(와 쓰기 잠금) 없이 끝낸다. 확인은 서비스 중인 파일을 읽기만 함
+    active_path = db.resolve_animal_db(db_path)
+    changes = None
+    if not full and os.path.exists(active_path):
+        conn = sqlite3.connect(f"file:{active_path}?mode=ro", uri=True)
+        try:
+            if not needs_schema_update(conn):
+                changes = find_changed_sources(conn)
+        finally:
+            conn.close()
+        if changes and not changes[0]:
+            print("\n 변경된 CSV가 없어 DB 갱신을 건너뜁니다.")
+            if not similar:
+                if thumbs:
+                    prewarm_thumbnails(active_path)  # 읽기만 하므로 서비스 중인 파일로
+                return active_path
+
+    # 새 버전을 만드는 동안(잠금 파일이 있는 동안) 앱/보관 스케줄러는 서비스 중인 파일에 쓰지 않는다
+    with db.AnimalDBVersion(db_path) as version:
+        conn = sqlite3.connect(version.path)
+        print(f"데이터베이스 연결: {version.path} (서비스 중: {os.path.basename(version.active_path)})")
+        try:
+            # CSV 가 그대로면 (--similar 만 필요한 경우) 병합 없이 추천 표만 다시 만듦
+            unchanged = changes is not None and not changes[0]
+            if not unchanged and not update_db(conn, full, workers, changes):
+                return version.active_path
+            if similar:
+                build_similar(conn)
+            # 3. 검증 후 교체 (실패하면 예전 파일을 계속 서비스하고, 새 파일은 확인용으로 남김)
+            errors = validate_db(conn, version.active_path, force)
+        finally:
+            conn.close()
+        if errors:
+            version.keep = True
+            print(f"\n❌ 검증 실패로 교체하지 않습니다 ({os.path.basename(version.path)}):")
+            for error in errors:
+                print(f"  - {error}")
+            return version.active_path
+        if thumbs:
+            prewarm_thumbnails(version.path)  # 교체 직후 첫 방문자가 썸네일을 기다리지 않도록
+        version.publish()
+        print(f"🔁 서비스 DB 교체: {os.path.basename(version.active_path)} -> {os.path.basename(version.path)}")
+        return version.path
+
+# --- 9. 공고 종료 동물 보관 ---
+# backend/lifecycle.py 와 같은 규칙으로 옮긴다. (앱의 스케줄러와 ETL 이 같은 보관 테이블을 씀)
+def archive_expired(conn):
+    moved = import_backend('lifecycle').archive_expired(conn)
+    if moved:
+        print(f"  📦 공고 종료 동물 {moved}건 보관")
+
+# --- 10. 썸네일 미리 만들기 (선택) ---
+# 새로 들어온 동물 사진을 첫 방문자가 기다리지 않도록 backend/thumbnails.py 의 캐시를 채운다.
+# 교체하기 전에 새 버전 파일의 image_url 로 채운다.
+def prewarm_thumbnails(path, workers=None):
+    thumbnails = import_backend('thumbnails')
+    thumbnails.prewarm_db(path, workers or thumbnails.PREWARM_WORKERS)
+
+# --- 11. 비슷한 동물 표 (선택) ---
+# 찜(user_data.db)과 동물 속성으로 backend/recommend.py 의 animal_similar 표를 새 버전 파일 안에 다시 만든다. (NumPy 필요)
+def build_similar(conn):
+    import_backend('recommend').build_into(conn)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="공공데이터 CSV -> animal_data.db 전처리")
+    parser.add_argument('--full', action='store_true', help="증분 갱신 대신 모든 테이블을 지우고 다시 만듦")
+    parser.add_argument('--workers', type=int, default=None, help="CSV 파싱 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--thumbs', action='store_true', help="교체 전에 새 버전의 동물 사진 썸네일 캐시를 미리 만듦")
+    parser.add_argument('--similar', action='store_true', help="새 버전 안에 비슷한 동물 추천 표를 다시 만듦 (CSV 가 그대로여도 실행)")
+    parser.add_argument('--in-place', action='store_true', help="새 버전 파일 없이 서비스 중인 DB 를 직접 갱신 (서비스 중이 아닐 때만)")
+    parser.add_argument('--force', action='store_true', help="행 수가 크게 줄어도 교체")
+    args = parser.parse_args()
+    try:
+        main(full=args.full, workers=args.workers, in_place=args.in_place, force=args.force,
+             thumbs=args.thumbs, similar=args.similar)
+    except import_backend('db').AnimalDBFrozen as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+# backend/ 와 data/py/ 모듈은 서로를 폴더 안에서 바로 import 하므로 (from db import ...) 두 폴더를 경로에 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ('backend', os.path.join('data', 'py')):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# db.py / app.py 는 import 할 때 경로를 읽으므로 테스트 모듈을 불러오기 전에 임시 폴더로 돌려 둔다
+TEST_DIR = tempfile.mkdtemp(prefix='petmatch-tests-')
+os.environ.update({
+    'PETMATCH_ANIMAL_DB': os.path.join(TEST_DIR, 'animal_data.db'),
+    'PETMATCH_USER_DB': os.path.join(TEST_DIR, 'user_data.db'),
+    'PETMATCH_JINJA_CACHE': os.path.join(TEST_DIR, 'jinja_cache'),
+    'PETMATCH_THUMB_DIR': os.path.join(TEST_DIR, 'thumbs'),
+    'PETMATCH_ASSET_DIR': os.path.join(TEST_DIR, 'dist'),
+    'PETMATCH_PASSWORD_METHOD': 'pbkdf2:sha256:1000',
+})
+
+# (breed, shelter_name, region, register_date, register_end_date)
+SAMPLE_ANIMALS = [
+    ('믹스견', '수원시 동물보호센터', '수원시', '2024-01-01', '2099-01-01'),
+    ('진돗개', '화성시 보호소', '화성시', '2024-01-02', '2099-01-02'),
+    ('한국 고양이', '수원시 동물보호센터', '수원시', '2024-01-03', '2099-01-03'),
+    ('골든 리트리버', '용인 동물보호소', '용인시', '2024-01-04', '2099-01-04'),
+]
+
+
+def build_animal_db(conn, animals=SAMPLE_ANIMALS):
+    """ETL 과 같은 스키마/트리거/인덱스로 작은 동물 DB 를 만든다"""
+    import preprocessing as etl
+    import lifecycle
+    conn.executescript(etl.SCHEMA_SCRIPT + etl.SHELTER_KEY_SCRIPT)
+    conn.executescript(etl.FTS_SCRIPT + etl.build_fts_triggers())
+    conn.executescript(etl.build_bigram_script() + etl.build_bigram_triggers())
+    conn.executescript(etl.RTREE_SCRIPT + etl.build_rtree_triggers())
+    conn.executescript(etl.INDEX_SCRIPT + etl.META_SCRIPT)
+    for i, (breed, shelter, region, start, end) in enumerate(animals):
+        conn.execute("INSERT INTO animal_status (source_key, breed, shelter_name, region, register_date, register_end_date) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", (f"k{i}", breed, shelter, region, start, end))
+    lifecycle.ensure_schema(conn)
+    conn.commit()
+
+
+def build_user_db(conn):
+    import create_user_db
+    import update_db
+    conn.executescript(create_user_db.SQL_SCHEMA + update_db.SQL_SCHEMA)
+    conn.commit()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """임시 DB 로 띄운 Flask 앱 모듈 (테스트 세션 전체에서 하나)"""
+    for path, build in ((os.environ['PETMATCH_ANIMAL_DB'], build_animal_db),
+                        (os.environ['PETMATCH_USER_DB'], build_user_db)):
+        conn = sqlite3.connect(path)
+        build(conn)
+        conn.close()
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    app_module.page_cache.clear()
+    app_module.context_cache.clear()
+    return app_module.app.test_client()
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+import admin_tables
+from admin_tables import fetch_grid_page, get_grid_args
+
+SPEC = {
+    'label': '테스트', 'table': 'items', 'pk': 'id', 'fts': None,
+    'columns': [('id', 'ID'), ('name', '이름')],
+    'sorts': {'name': 'name', 'id': 'id'},
+    'default_sort': ('name', 'asc'),
+    'search': ['name'],
+}
+# 같은 값, NULL 이 섞인 정렬 컬럼
+NAMES = ['다', None, '가', '나', '가', None, '라', '나', '가', '마', None]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE INDEX idx_items_name ON items(name)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(n,) for n in NAMES])
+    return conn
+
+
+def expected_ids(conn, direction):
+    return [r[0] for r in conn.execute(f"SELECT id FROM items ORDER BY name {direction}, id {direction}")]
+
+
+def walk(conn, sort, direction, page_size=3):
+    """다음 커서로 끝까지 간 뒤 이전 커서로 처음까지 돌아옴. (앞으로 본 id 들, 되돌아오며 본 페이지들)"""
+    args = {'sort': sort, 'dir': direction, 'page_size': str(page_size)}
+    pages, pager = [], None
+    while True:
+        rows, total, pager = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, args))
+        pages.append([r['id'] for r in rows])
+        if not pager['next']:
+            break
+        args = dict(args, after=pager['next'])
+        args.pop('before', None)
+    back = [pages[-1]]
+    while pager['prev']:
+        args = dict(args, before=pager['prev'])
+        args.pop('after', None)
+        rows, _, pager = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, args))
+        back.append([r['id'] for r in rows])
+    return pages, back[::-1], total
+
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_cursor_pages_cover_every_row_once(conn, direction):
+    pages, back, total = walk(conn, 'name', direction)
+    assert [i for page in pages for i in page] == expected_ids(conn, direction)
+    assert all(len(page) == 3 for page in pages[:-1])
+    assert back == pages
+    assert total == len(NAMES)
+
+
+def test_cursor_skips_rows_deleted_before_it(conn):
+    args = {'sort': 'id', 'dir': 'asc', 'page_size': '4'}
+    _, _, pager = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, args))
+    conn.execute("DELETE FROM items WHERE id <= 2")
+    rows, _, _ = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, dict(args, after=pager['next'])))
+    # OFFSET 과 달리 앞 페이지에서 행이 지워져도 다음 페이지가 밀리지 않음
+    assert [r['id'] for r in rows] == [5, 6, 7, 8]
+
+
+def test_bad_cursor_starts_from_first_page(conn):
+    rows, _, pager = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, {'after': 'not-a-cursor', 'page_size': '3'}))
+    assert [r['id'] for r in rows] == expected_ids(conn, 'asc')[:3]
+    assert pager['prev'] is None
+
+
+def test_count_is_capped(conn, monkeypatch):
+    monkeypatch.setattr(admin_tables, 'ADMIN_COUNT_LIMIT', 5)
+    _, total, pager = fetch_grid_page(conn, SPEC, get_grid_args(SPEC, {}))
+    assert (total, pager['more']) == (5, True)
@@ -0,0 +1,157 @@
+import html
+import os
+import re
+import sqlite3
+
+
+def test_page_cache_counts_encoded_bytes(app_module, client):
+    first = client.get('/animals?keyword=수원')
+    assert first.status_code == 200
+    assert '수원시 동물보호센터'.encode('utf-8') in first.data
+
+    (body, etag), = [value for value, _ in app_module.page_cache._items.values()]
+    assert isinstance(body, bytes) and body == first.data
+    # max_bytes 는 문자 수가 아니라 UTF-8 바이트 수로 계산된다
+    assert app_module.page_cache.total_bytes == len(first.data) > len(first.data.decode('utf-8'))
+
+    second = client.get('/animals?keyword=수원', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+
+
+def test_context_cache_is_capped_by_estimated_bytes(app_module, client, monkeypatch):
+    signup_and_login(client, 'context@example.com')
+    client.get('/shelter')
+    (context, size), = app_module.context_cache._items.values()
+    assert size == app_module.context_size(context) >= len(context['shelters']) * app_module.CONTEXT_CELL_BYTES
+
+    # 바이트 상한을 넘으면 항목 수가 남아 있어도 오래된 결과부터 지움
+    cache = app_module.LRUCache(app_module.CONTEXT_CACHE_MAX_ENTRIES, int(size * 1.5))
+    monkeypatch.setattr(app_module, 'context_cache', cache)
+    client.get('/shelter')
+    client.get('/shelter?region=수원시')
+    assert len(cache) == 1 and cache.total_bytes <= cache.max_bytes
+
+
+def signup_and_login(client, email, name='테스터'):
+    client.post('/signup', data={'name': name, 'email': email, 'password': 'pw1234'})
+    client.post('/login', data={'email': email, 'password': 'pw1234'})
+
+
+def test_favorite_toggle_is_visible_to_other_workers(app_module, client):
+    signup_and_login(client, 'fav@example.com')
+    assert client.post('/api/favorite/1').get_json() == {'action': 'added'}
+    page = client.get('/animals')
+    assert b'new Set([1])' in page.data
+
+    # 다른 워커가 같은 사용자의 찜을 바꾼 경우 (이 프로세스의 캐시를 거치지 않고 DB 만 변경)
+    conn = app_module.db_pools['user_db'].acquire()
+    try:
+        user_id = conn.execute("SELECT id FROM users WHERE email = 'fav@example.com'").fetchone()[0]
+        with conn:
+            conn.execute("DELETE FROM favorites WHERE user_id = ?", (user_id,))
+            app_module.bump_favorite_version(conn, user_id)
+    finally:
+        app_module.db_pools['user_db'].release(conn)
+    with app_module.app.app_context():
+        assert app_module.get_fav_ids(user_id) == []
+
+
+def test_admin_grid_pages_with_cursor_links(app_module, client):
+    client.post('/signup', data={'name': '관리자', 'email': 'admin@test.com', 'password': 'pw1234'})
+    conn = sqlite3.connect(os.environ['PETMATCH_USER_DB'])
+    with conn:
+        conn.execute("UPDATE users SET is_admin = 1 WHERE email = 'admin@test.com'")
+    conn.close()
+    client.post('/login', data={'email': 'admin@test.com', 'password': 'pw1234'})
+
+    first = client.get('/admin?table=animal&sort=animal_id&dir=asc&page_size=2').get_data(as_text=True)
+    assert '이전</a>' not in first
+    next_url = html.unescape(re.search(r'href="([^"]*after=[^"]*)"', first).group(1))
+    second = client.get(next_url).get_data(as_text=True)
+    assert 'value="3"' in second and 'value="4"' in second and 'value="1"' not in second
+    assert '이전</a>' in second and '다음</a>' not in second
+
+
+def test_mypage_prefers_live_row_of_relisted_animal(app_module, client):
+    # 트리거가 생기기 전에 다시 공고된 동물: 찜한 보관 행(950)과 같은 공고(k1)의 보호 중 행(2)이 함께 있음
+    animal_conn = sqlite3.connect(os.environ['PETMATCH_ANIMAL_DB'])
+    with animal_conn:
+        animal_conn.execute("INSERT INTO animal_archive (animal_id, source_key, breed, region, register_end_date) "
+                            "VALUES (950, 'k1', '진돗개', '화성시', '2023-01-01')")
+    signup_and_login(client, 'relisted@example.com')
+    conn = app_module.db_pools['user_db'].acquire()
+    try:
+        user_id = conn.execute("SELECT id FROM users WHERE email = 'relisted@example.com'").fetchone()[0]
+        with conn:
+            conn.execute("INSERT INTO favorites (user_id, animal_id) VALUES (?, 950)", (user_id,))
+            app_module.bump_favorite_version(conn, user_id)
+    finally:
+        app_module.db_pools['user_db'].release(conn)
+    try:
+        page = client.get('/mypage').get_data(as_text=True)
+        assert '진돗개' in page and '공고 종료</span>' not in page
+        assert 'openDetailModal(2)' in page or 'animal_id=2' in page or '/img/2' in page
+    finally:
+        with animal_conn:
+            animal_conn.execute("DELETE FROM animal_archive WHERE animal_id = 950")
+        animal_conn.close()
+
+
+def test_recommendations_are_recomputed_only_when_favorites_change(app_module, client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module.recommend, 'fetch_recommended', lambda conn, user_id: calls.append(user_id) or [])
+    signup_and_login(client, 'recommend@example.com')
+    client.post('/api/favorite/1')
+    assert client.get('/').status_code == 200
+    assert client.get('/').status_code == 200
+    assert len(calls) == 1
+    client.post('/api/favorite/2')
+    client.get('/')
+    assert len(calls) == 2
+
+
+def test_admin_writes_are_blocked_while_etl_builds(app_module, client):
+    client.post('/signup', data={'name': '관리자', 'email': 'builder@test.com', 'password': 'pw1234'})
+    conn = sqlite3.connect(os.environ['PETMATCH_USER_DB'])
+    with conn:
+        conn.execute("UPDATE users SET is_admin = 1 WHERE email = 'builder@test.com'")
+    conn.close()
+    client.post('/login', data={'email': 'builder@test.com', 'password': 'pw1234'})
+
+    lock = os.environ['PETMATCH_ANIMAL_DB'] + '.building'
+    with open(lock, 'w') as f:
+        f.write(f"{os.getpid()}\n")
+    try:
+        assert '데이터 갱신(ETL)이 진행 중' in client.get('/admin?table=shelter').get_data(as_text=True)
+        page = client.post('/admin/add', data={'item_type': 'shelter', 'name': '갱신 중 보호소'},
+                           follow_redirects=True).get_data(as_text=True)
+        assert '추가 실패' in page
+    finally:
+        os.remove(lock)
+    animal_conn = sqlite3.connect(os.environ['PETMATCH_ANIMAL_DB'])
+    try:
+        assert animal_conn.execute("SELECT COUNT(*) FROM shelter_final WHERE name = '갱신 중 보호소'").fetchone()[0] == 0
+        client.post('/admin/add', data={'item_type': 'shelter', 'name': '갱신 후 보호소'})
+        assert animal_conn.execute("SELECT COUNT(*) FROM shelter_final WHERE name = '갱신 후 보호소'").fetchone()[0] == 1
+        assert '데이터 갱신(ETL)이 진행 중' not in client.get('/admin?table=shelter').get_data(as_text=True)
+    finally:
+        animal_conn.close()
+
+
+def test_prometheus_exports_cache_counts_as_counters(app_module, client):
+    client.post('/signup', data={'name': '관리자', 'email': 'metrics@test.com', 'password': 'pw1234'})
+    conn = sqlite3.connect(os.environ['PETMATCH_USER_DB'])
+    with conn:
+        conn.execute("UPDATE users SET is_admin = 1 WHERE email = 'metrics@test.com'")
+    conn.close()
+    client.post('/login', data={'email': 'metrics@test.com', 'password': 'pw1234'})
+
+    body = client.get('/admin/metrics?format=prometheus').get_data(as_text=True)
+    assert '# TYPE petmatch_page_cache_hits_total counter' in body
+    assert '# TYPE petmatch_session_cache_misses_total counter' in body
+    assert '# TYPE petmatch_page_cache_bytes gauge' in body
+    assert 'petmatch_page_cache_hits ' not in body
+    assert 'petmatch_page_cache_hits' in client.get('/admin/metrics').get_data(as_text=True)
+    # 프로파일링이 켜져 있을 때도 같은 형식
+    profiled = app_module.Profiler().prometheus({'petmatch_page_cache_bytes': 1}, {'petmatch_page_cache_hits': 2})
+    assert 'petmatch_page_cache_hits_total 2' in profiled and '# TYPE petmatch_page_cache_bytes gauge' in profiled
@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+
+def call_asgi(app, path, query=b''):
+    """ASGI 앱에 GET 요청 하나를 보내고 (상태 코드, JSON) 반환"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+def test_archived_animal_detail_matches_flask(app_module, client):
+    import asgi
+    conn = app_module.db_pools['animal_write_db'].acquire()
+    try:
+        with conn:
+            conn.execute("INSERT INTO animal_archive (animal_id, breed, region) VALUES (900, '말티즈', '수원시')")
+    finally:
+        app_module.db_pools['animal_write_db'].release(conn)
+
+    status, payload = call_asgi(asgi.app, '/api/animal/900')
+    assert status == 200
+    assert payload['breed'] == '말티즈' and payload['archived'] is True
+    assert client.get('/api/animal/900').get_json() == payload
+
+    status, payload = call_asgi(asgi.app, '/api/animal/1')
+    assert status == 200 and payload['animal_id'] == 1 and 'archived' not in payload
+    assert client.get('/api/animal/1').get_json() == payload
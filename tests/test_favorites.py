@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from favorites import FavoriteCache, FAVORITE_VERSION_SCHEMA, bump_favorite_version
+
+
+@pytest.fixture
+def user_db(tmp_path):
+    import update_db
+    path = str(tmp_path / 'user_data.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(update_db.SQL_SCHEMA)
+    conn.close()
+    return path
+
+
+def toggle(conn, user_id, animal_id, add=True):
+    with conn:
+        if add:
+            conn.execute("INSERT INTO favorites (user_id, animal_id) VALUES (?, ?)", (user_id, animal_id))
+        else:
+            conn.execute("DELETE FROM favorites WHERE user_id = ? AND animal_id = ?", (user_id, animal_id))
+        bump_favorite_version(conn, user_id)
+
+
+def test_change_in_one_worker_is_seen_by_another(user_db):
+    # 워커 두 개: 각자 연결과 메모리 캐시를 가짐
+    conn_a, conn_b = sqlite3.connect(user_db), sqlite3.connect(user_db)
+    cache_a, cache_b = FavoriteCache(), FavoriteCache()
+    toggle(conn_a, 1, 10)
+    assert cache_b.get(conn_b, 1)[1] == {10}
+
+    toggle(conn_a, 1, 20)
+    toggle(conn_a, 1, 10, add=False)
+    assert cache_b.get(conn_b, 1)[1] == {20}
+    assert cache_a.get(conn_a, 1)[1] == {20}
+
+
+def test_cache_hit_reads_only_version(user_db):
+    conn = sqlite3.connect(user_db)
+    cache = FavoriteCache()
+    toggle(conn, 1, 10)
+    first = cache.get(conn, 1)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert cache.get(conn, 1) is first
+    assert len(statements) == 1 and 'favorite_versions' in statements[0]
+
+
+def test_rows_without_version_are_cached_as_version_zero(user_db):
+    # favorite_versions 가 생기기 전에 들어간 찜 (예전 DB)
+    conn = sqlite3.connect(user_db)
+    with conn:
+        conn.execute("INSERT INTO favorites (user_id, animal_id) VALUES (2, 5)")
+    cache = FavoriteCache()
+    assert cache.get(conn, 2) == (0, frozenset({5}))
+    toggle(conn, 2, 6)
+    assert cache.get(conn, 2) == (1, frozenset({5, 6}))
+
+
+def test_schema_is_idempotent(user_db):
+    conn = sqlite3.connect(user_db)
+    conn.executescript(FAVORITE_VERSION_SCHEMA)
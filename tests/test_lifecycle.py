@@ -0,0 +1,104 @@
+import datetime
+import os
+import sqlite3
+
+import pytest
+
+import db
+import lifecycle
+from conftest import build_animal_db
+from queries import fetch_animal_detail, keyword_conditions
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'animal_data.db'))
+    conn.row_factory = sqlite3.Row
+    build_animal_db(conn)
+    return conn
+
+
+def insert_animal(conn, source_key, breed, end='2099-12-31'):
+    """새 공고를 넣고 트리거가 정한 animal_id 를 반환"""
+    with conn:
+        conn.execute("INSERT INTO animal_status (source_key, breed, shelter_name, region, register_date, register_end_date) "
+                     "VALUES (?, ?, '수원시 동물보호센터', '수원시', '2024-01-01', ?)", (source_key, breed, end))
+    return conn.execute("SELECT animal_id FROM animal_status WHERE source_key = ?", (source_key,)).fetchone()[0]
+
+
+def search(conn, keyword):
+    conditions, params = keyword_conditions(keyword, 'animal_id', 'animal_fts', ['breed', 'shelter_name'])
+    return [r[0] for r in conn.execute(f"SELECT animal_id FROM animal_status WHERE {' AND '.join(conditions)}", params)]
+
+
+def test_relisted_animal_gets_its_archived_id_back(conn):
+    # 모든 공고가 끝나 보관됨 (k3 는 id 4, 가장 큰 id)
+    moved = lifecycle.archive_expired(conn, today=datetime.date(2099, 1, 5))
+    assert moved == 4
+    assert fetch_animal_detail(conn, 4)['archived'] is True
+
+    # 새 공고는 보관된 id 와 겹치지 않는 id 를 받음
+    new_id = insert_animal(conn, 'k-new', '푸들')
+    assert new_id > 4
+
+    # 같은 공고가 다시 들어오면 예전 id 를 돌려받고 보관 행은 사라짐
+    assert insert_animal(conn, 'k3', '골든 리트리버') == 4
+    assert conn.execute("SELECT COUNT(*) FROM animal_archive WHERE source_key = 'k3'").fetchone()[0] == 0
+    assert 'archived' not in fetch_animal_detail(conn, 4)
+    # 검색 인덱스도 바뀐 id 를 따라감
+    assert search(conn, '리트리버') == [4]
+    assert search(conn, '푸들') == [new_id]
+    conn.execute("INSERT INTO animal_fts(animal_fts) VALUES ('integrity-check')")
+
+
+def test_relisted_row_whose_id_came_back_on_its_own_is_kept(conn):
+    lifecycle.archive_expired(conn, today=datetime.date(2099, 1, 5))
+    conn.execute("DELETE FROM animal_status")
+    conn.commit()
+    # 보호 중인 행이 없어서 rowid 가 다시 1 부터: 보관된 k0 와 같은 id 를 받음
+    assert insert_animal(conn, 'k0', '믹스견') == 1
+    assert conn.execute("SELECT COUNT(*) FROM animal_archive WHERE animal_id = 1").fetchone()[0] == 0
+    # 다른 공고는 보관된 id(2)와 겹치지 않게 옮겨짐
+    other = insert_animal(conn, 'k-other', '푸들')
+    assert conn.execute("SELECT COUNT(*) FROM animal_archive WHERE animal_id = ?", (other,)).fetchone()[0] == 0
+    assert other > 4
+
+
+def test_detail_prefers_live_row_for_old_duplicates(conn):
+    lifecycle.archive_expired(conn, today=datetime.date(2099, 1, 2))
+    # 트리거가 생기기 전에 다시 들어온 공고: 보관 행과 보호 중 행이 함께 있음
+    conn.execute("DROP TRIGGER animal_status_relisted")
+    live_id = insert_animal(conn, 'k0', '믹스견')
+    assert live_id != 1
+    detail = fetch_animal_detail(conn, 1)
+    assert detail['animal_id'] == live_id and 'archived' not in detail
+
+
+def test_old_id_trigger_is_upgraded(conn):
+    conn.executescript("""
+        DROP TRIGGER animal_status_relisted;
+        DROP TRIGGER animal_status_id_after_archive;
+        CREATE TRIGGER animal_status_id_after_archive AFTER INSERT ON animal_status
+        WHEN new.animal_id <= (SELECT MAX(animal_id) FROM animal_archive)
+        BEGIN
+            UPDATE animal_status SET animal_id = (SELECT MAX(animal_id) + 1 FROM animal_archive)
+            WHERE animal_id = new.animal_id;
+        END;
+    """)
+    lifecycle.ensure_schema(conn)
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'animal_status_id_after_archive'").fetchone()[0]
+    assert 'source_key' in sql
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'animal_status_relisted'").fetchone()
+
+
+def test_archive_is_skipped_while_building(tmp_path, conn):
+    base = str(tmp_path / 'animal_data.db')
+    with open(db.animal_db_lock(base), 'w') as f:
+        f.write(f"{os.getpid()}\n")
+    with pytest.raises(db.AnimalDBFrozen):
+        lifecycle.archive_expired(conn, today=datetime.date(2099, 1, 5), base=base)
+    assert lifecycle.ArchiveScheduler(base).run_once() == 0
+    assert conn.execute("SELECT COUNT(*) FROM animal_status").fetchone()[0] == 4
+
+    os.remove(db.animal_db_lock(base))
+    assert lifecycle.archive_expired(conn, today=datetime.date(2099, 1, 5), base=base) == 4
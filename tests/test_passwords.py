@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import passwords
+from passwords import PasswordBusy
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    """대기열 한 자리, 짧은 시간 제한. 스레드는 넉넉해서 자리만 제한이 됨"""
+    monkeypatch.setattr(passwords, '_pending', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(passwords, 'HASH_TIMEOUT', 0.05)
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(passwords, '_executor', executor)
+    yield
+    executor.shutdown(wait=False)
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes(one_slot):
+    release = threading.Event()
+    try:
+        with pytest.raises(PasswordBusy):
+            passwords._run(release.wait)
+        # 시간 초과로 응답했어도 계산은 아직 도는 중이라 새 요청은 자리를 받지 못함
+        with pytest.raises(PasswordBusy):
+            passwords._run(lambda: 'next')
+    finally:
+        release.set()
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        try:
+            assert passwords._run(lambda: 'next') == 'next'
+            break
+        except PasswordBusy:
+            time.sleep(0.01)
+    else:
+        pytest.fail("계산이 끝난 뒤에도 자리가 돌아오지 않음")
+
+
+@pytest.mark.parametrize('method, stored, expected', [
+    ('scrypt', 'scrypt:32768:8:1', False),
+    ('scrypt:32768', 'scrypt:32768:8:1', False),
+    ('scrypt:16384:8:1', 'scrypt:32768:8:1', True),
+    ('pbkdf2', f'pbkdf2:sha256:{passwords.DEFAULT_PBKDF2_ITERATIONS}', False),
+    ('pbkdf2:sha256:600000', 'pbkdf2:sha256:600000', False),
+    ('pbkdf2:sha256:600000', 'scrypt:32768:8:1', True),
+])
+def test_needs_rehash_fills_in_werkzeug_defaults(monkeypatch, method, stored, expected):
+    monkeypatch.setattr(passwords, 'PASSWORD_METHOD', method)
+    assert passwords.needs_rehash(f'{stored}$salt$hash') is expected
+
+
+def test_bare_method_config_matches_what_werkzeug_stores(monkeypatch):
+    monkeypatch.setattr(passwords, 'PASSWORD_METHOD', 'scrypt')
+    stored = passwords.hash_password('pw1234')
+    assert stored.startswith('scrypt:32768:8:1$')
+    assert passwords.needs_rehash(stored) is False
+
+
+def test_dummy_hash_is_built_once_in_the_hash_pool(monkeypatch):
+    threads = []
+    real = passwords.generate_password_hash
+
+    def generate(*args):
+        threads.append(threading.current_thread().name)
+        return real(*args)
+
+    monkeypatch.setattr(passwords, 'generate_password_hash', generate)
+    monkeypatch.setattr(passwords, 'PASSWORD_METHOD', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr(passwords, '_dummy_hash', None)
+    first = passwords.prepare_dummy_hash()
+    assert passwords.verify_dummy('pw1234') is False
+    assert passwords.prepare_dummy_hash() == first
+    assert len(threads) == 1 and threads[0].startswith('petmatch-hash')
@@ -0,0 +1,234 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import preprocessing as etl
+from csv_ingest import stream_csv_to_table
+
+PROTECTION_HEADER = ['시군명', '공고고유번호', '공고시작일자', '공고종료일자', '품종', '색상', '나이', '체중', '성별',
+                     '상태', '보호소명', '보호소전화번호', '썸네일이미지경로', '이미지경로']
+FACILITY_HEADER = ['시군명', '사업장명', '인허가일자', '영업상태명', '소재지시설전화번호', '소재지지번주소', 'WGS84위도', 'WGS84경도']
+SHELTER_HEADER = ['업체명', '업체전화번호', '수용능력수', '소재지지번주소']
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def animal_rows(count, start=0):
+    return [['수원시', f'경기-{i:06d}', '20240101', '20991231', '000054' if i % 2 else '믹스견', '갈색', '2022(년생)',
+             '5(Kg)', 'M' if i % 3 else 'F', '보호중', '수원시 동물보호센터', '031-000-0000',
+             f'http://img.example/{i}_s.jpg', f'http://img.example/{i}.jpg'] for i in range(start, start + count)]
+
+
+class EtlEnv:
+    """임시 폴더의 CSV / processed 폴더로 preprocessing.main 을 실행"""
+
+    def __init__(self, root):
+        self.csv_folder = os.path.join(root, 'csv')
+        self.db_folder = os.path.join(root, 'processed')
+        self.db_path = os.path.join(self.db_folder, 'animal_data.db')
+        os.makedirs(self.csv_folder)
+        os.makedirs(self.db_folder)
+        self.write_animals(animal_rows(20))
+        write_csv(os.path.join(self.csv_folder, '유기 동물 보호 현황_품종코드.csv'), ['품종', '품종명'], [['000054', '골든 리트리버']])
+        for name, prefix in (('동물병원현황utf8.csv', '동물병원'), ('동물약국현황utf8.csv', '동물약국')):
+            write_csv(os.path.join(self.csv_folder, name), FACILITY_HEADER,
+                      [['수원시', f'{prefix} {i}', '2020-01-01', '정상', '031-111-1111', f'경기도 수원시 {i}번지',
+                        37.26 + i / 1000, 127.02] for i in range(5)])
+        # 보호소 현황은 ETL 이 다시 읽지 않는 원본 테이블이라 서비스 DB 에 미리 넣어 둔다
+        shelters = os.path.join(root, 'shelters.csv')
+        write_csv(shelters, SHELTER_HEADER, [['수원시 동물보호센터', '031-000-0000', '30', '경기도 수원시 권선구']])
+        conn = sqlite3.connect(self.db_path)
+        stream_csv_to_table(conn, shelters, 'stray_animal_shelter_status')
+        conn.close()
+
+    def write_animals(self, rows):
+        write_csv(os.path.join(self.csv_folder, '유기동물보호현황utf8.csv'), PROTECTION_HEADER, rows)
+
+    def active(self):
+        import db
+        return db.resolve_animal_db(self.db_path)
+
+    def connect(self):
+        conn = sqlite3.connect(self.active())
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+@pytest.fixture
+def etl_env(tmp_path, monkeypatch):
+    env = EtlEnv(str(tmp_path))
+    monkeypatch.setattr(etl, 'csv_folder', env.csv_folder)
+    monkeypatch.setattr(etl, 'db_folder', env.db_folder)
+    monkeypatch.setattr(etl, 'db_path', env.db_path)
+    return env
+
+
+def test_migrate_schema_is_noop_on_current_schema():
+    # generated 컬럼은 table_info 에 보이지 않으므로 table_xinfo 로 확인해야 다시 ADD COLUMN 하지 않는다
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(etl.SCHEMA_SCRIPT)
+    assert etl.migrate_schema(conn) is False
+    assert etl.migrate_schema(conn) is False
+
+
+def test_migrate_schema_adds_missing_generated_columns():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE shelter_final (shelter_id INTEGER PRIMARY KEY, source_key TEXT UNIQUE, name TEXT, address TEXT, phone TEXT);
+        CREATE TABLE animal_status (animal_id INTEGER PRIMARY KEY, source_key TEXT UNIQUE, breed TEXT, gender TEXT,
+                                    register_date TEXT, register_end_date TEXT);
+        INSERT INTO animal_status (source_key, breed, gender, register_date) VALUES ('a', '한국 고양이', '암컷', '2024-03-01');
+    """)
+    assert etl.migrate_schema(conn) is True
+    assert conn.execute("SELECT species, sex, register_ymd FROM animal_status").fetchone() == ('cat', 'F', 20240301)
+    assert etl.migrate_schema(conn) is False
+
+
+def test_full_build_then_incremental_run(etl_env):
+    first = etl.main(full=True, workers=1)
+    assert first != etl_env.db_path and os.path.exists(first)
+    # 같은 CSV 로 다시 실행하면 아무것도 바꾸지 않는다 (예전에는 generated 컬럼을 다시 추가하다 실패)
+    assert etl.main(workers=1) == first
+
+    etl_env.write_animals(animal_rows(25))
+    second = etl.main(workers=1)
+    assert second != first
+    conn = etl_env.connect()
+    assert conn.execute("SELECT COUNT(*) FROM animal_status").fetchone()[0] == 25
+    assert conn.execute("SELECT COUNT(*) FROM animal_status WHERE species = 'dog'").fetchone()[0] == 25
+
+
+def test_expired_heavy_refresh_publishes_without_force(etl_env):
+    first = etl.main(full=True, workers=1)
+    # 지난 빌드 뒤로 시간이 흘러 20마리 중 18마리의 공고가 끝남
+    conn = sqlite3.connect(first)
+    with conn:
+        conn.execute("UPDATE animal_status SET register_end_date = '2024-01-31' WHERE animal_id > 2")
+    conn.close()
+    rows = animal_rows(20)
+    for row in rows[2:]:
+        row[3] = '20240131'
+    etl_env.write_animals(rows)
+    # 보관 테이블로 옮긴 행은 줄어든 행으로 세지 않으므로 --force 없이 교체됨
+    second = etl.main(workers=1)
+    assert second != first and etl_env.active() == second
+    conn = etl_env.connect()
+    assert conn.execute("SELECT COUNT(*) FROM animal_status").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM animal_archive").fetchone()[0] == 18
+
+
+def test_unchanged_csv_skips_copy(etl_env, monkeypatch):
+    import db
+    first = etl.main(full=True, workers=1)
+    files = sorted(os.listdir(etl_env.db_folder))
+    # 바뀐 것이 없으면 서비스 중인 파일을 복사하지도, 쓰기를 막지도 않는다
+    monkeypatch.setattr(db.AnimalDBVersion, '__enter__', lambda self: pytest.fail("새 버전을 만들면 안 됨"))
+    assert etl.main(workers=1) == first
+    assert sorted(os.listdir(etl_env.db_folder)) == files
+
+
+def write_to_active(env):
+    import db
+    conn = sqlite3.connect(env.active())
+    try:
+        db.begin_animal_write(conn, env.db_path)
+        conn.execute("DELETE FROM animal_status WHERE source_key = '경기-000000'")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_writes_to_active_file_are_blocked_while_building(etl_env, monkeypatch):
+    import db
+    etl.main(full=True, workers=1)
+    blocked = []
+    update_db = etl.update_db
+
+    def update_and_write(conn, *args):
+        # 새 버전을 만드는 중에 관리자/보관 스케줄러가 서비스 중인 파일에 쓰려고 하면 막힘
+        with pytest.raises(db.AnimalDBFrozen):
+            write_to_active(etl_env)
+        blocked.append(db.animal_db_builder(etl_env.db_path))
+        return update_db(conn, *args)
+
+    monkeypatch.setattr(etl, 'update_db', update_and_write)
+    etl_env.write_animals(animal_rows(25))
+    etl.main(workers=1)
+    assert blocked == [os.getpid()]
+    assert not os.path.exists(db.animal_db_lock(etl_env.db_path))
+    # 갱신이 끝나면 다시 쓸 수 있음
+    write_to_active(etl_env)
+    assert etl_env.connect().execute("SELECT COUNT(*) FROM animal_status").fetchone()[0] == 24
+
+
+def test_second_build_and_stale_lock(etl_env):
+    import db
+    etl.main(full=True, workers=1)
+    with db.AnimalDBVersion(etl_env.db_path) as version:
+        with pytest.raises(db.AnimalDBFrozen):
+            db.AnimalDBVersion(etl_env.db_path).__enter__()
+        assert os.path.exists(version.path)
+    assert not os.path.exists(version.path)  # publish 하지 않은 새 파일은 지움
+
+    # 죽은 갱신 프로세스가 남긴 잠금 파일은 무시
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    with open(db.animal_db_lock(etl_env.db_path), 'w') as f:
+        f.write(f"{dead.pid}\n")
+    assert db.animal_db_builder(etl_env.db_path) is None
+    write_to_active(etl_env)
+    before = etl_env.active()
+    etl_env.write_animals(animal_rows(25))
+    assert etl.main(workers=1) == etl_env.active() != before
+    assert not os.path.exists(db.animal_db_lock(etl_env.db_path))
+
+
+@pytest.fixture
+def user_db(tmp_path, monkeypatch):
+    import recommend
+    from conftest import build_user_db
+    path = str(tmp_path / 'user_data.db')
+    conn = sqlite3.connect(path)
+    build_user_db(conn)
+    conn.close()
+    monkeypatch.setattr(recommend, 'USER_DB_PATH', path)
+    return path
+
+
+def test_similar_and_thumbs_are_built_into_the_new_version(etl_env, user_db, monkeypatch):
+    pytest.importorskip('numpy')
+    import db
+    import thumbnails
+    first = etl.main(full=True, workers=1)
+    prewarmed = []
+    # 썸네일은 교체 전에, 새 버전 파일의 image_url 로 만든다
+    monkeypatch.setattr(thumbnails, 'prewarm_db',
+                        lambda path, workers: prewarmed.append((path, etl_env.active())) or (0, 0))
+
+    # CSV 가 그대로여도 --similar 는 새 버전을 만들어 표를 넣고 교체
+    second = etl.main(workers=1, thumbs=True, similar=True)
+    assert second != first and etl_env.active() == second
+    assert prewarmed == [(second, first)]
+    assert etl_env.connect().execute("SELECT COUNT(*) FROM animal_similar").fetchone()[0] > 0
+    previous = sqlite3.connect(first)
+    assert previous.execute("SELECT 1 FROM sqlite_master WHERE name = 'animal_similar'").fetchone() is None
+    previous.close()
+    assert not os.path.exists(db.animal_db_lock(etl_env.db_path))
+
+
+def test_recommend_build_db_swaps_in_a_new_version(etl_env, user_db):
+    pytest.importorskip('numpy')
+    import recommend
+    first = etl.main(full=True, workers=1)
+    recommend.build_db(etl_env.db_path)
+    assert etl_env.active() != first
+    assert etl_env.connect().execute("SELECT COUNT(*) FROM animal_similar").fetchone()[0] > 0
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import preprocessing as etl
+from check_query_plans import full_scans
+from queries import (
+    build_fts_match, build_bigram_match, build_animal_query, build_hospital_query, build_shelter_query,
+    fetch_animal_page, get_animal_filters,
+)
+
+ANIMALS = [
+    # (breed, shelter_name, region)
+    ('믹스견', '수원시 동물보호센터', '수원시'),
+    ('진돗개', '화성시 보호소', '화성시'),
+    ('한국 고양이', '수원시 동물보호센터', '수원시'),
+    ('골든 리트리버', '용인 동물보호소', '용인시'),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(etl.SCHEMA_SCRIPT)
+    conn.executescript(etl.FTS_SCRIPT + etl.build_fts_triggers())
+    conn.executescript(etl.build_bigram_script() + etl.build_bigram_triggers())
+    conn.executescript(etl.INDEX_SCRIPT)
+    for i, (breed, shelter, region) in enumerate(ANIMALS):
+        conn.execute("INSERT INTO animal_status (source_key, breed, shelter_name, region, register_date) "
+                     "VALUES (?, ?, ?, ?, ?)", (f"k{i}", breed, shelter, region, f"2024-01-{i + 1:02d}"))
+    conn.executemany("INSERT INTO shelter_final (name, address) VALUES (?, ?)",
+                     [('수원시 동물보호센터', '경기도 수원시 권선구'), ('화성시 보호소', '경기도 화성시 남양읍')])
+    conn.executemany("INSERT INTO hospital_final (name, address, region) VALUES (?, ?, ?)",
+                     [('믹스동물병원', '경기도 수원시 팔달구', '수원시'), ('진도동물병원', '경기도 화성시', '화성시')])
+    conn.execute("INSERT INTO pharmacy_final (name, address, region) VALUES ('수원동물약국', '경기도 수원시 장안구', '수원시')")
+    yield conn
+    conn.close()
+
+
+def search(conn, keyword):
+    rows, _ = fetch_animal_page(conn, get_animal_filters({'keyword': keyword}))
+    return sorted(row['breed'] for row in rows)
+
+
+def test_keyword_terms_are_split_by_length():
+    assert build_fts_match('리트리버 수원') == '"리트리버"'
+    assert build_bigram_match('리트리버 수원') == '"수원"'
+    assert build_fts_match('믹스') is None
+    assert build_bigram_match('골든리트리버') is None
+
+
+@pytest.mark.parametrize('keyword, expected', [
+    ('믹스', ['믹스견']),
+    ('진돗', ['진돗개']),
+    ('수원', ['믹스견', '한국 고양이']),   # 보호소명의 두 글자 지역명
+    ('리트리버', ['골든 리트리버']),
+    ('고양이 수원', ['한국 고양이']),      # 3글자 + 2글자 단어는 AND
+    ('견 수원', ['믹스견']),              # 한 글자 단어는 좁혀진 행에 LIKE
+])
+def test_animal_keyword_search(conn, keyword, expected):
+    assert search(conn, keyword) == expected
+
+
+def test_two_letter_keyword_uses_index(conn):
+    sql, params = build_animal_query(get_animal_filters({'keyword': '믹스'}))
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    assert not full_scans(plan)
+    assert 'LIKE' not in sql
+
+
+def test_index_follows_updates_and_deletes(conn):
+    conn.execute("UPDATE animal_status SET breed = '진도 믹스' WHERE breed = '진돗개'")
+    assert search(conn, '진도') == ['진도 믹스']
+    assert search(conn, '믹스') == ['믹스견', '진도 믹스']
+    conn.execute("DELETE FROM animal_status WHERE breed = '믹스견'")
+    assert search(conn, '믹스') == ['진도 믹스']
+    conn.execute("INSERT INTO animal_bigram(animal_bigram) VALUES ('integrity-check')")
+
+
+def test_facility_two_letter_keyword(conn):
+    sql, params = build_hospital_query('수원', '전체', '전체')
+    assert sorted(row['name'] for row in conn.execute(sql, params)) == ['믹스동물병원', '수원동물약국']
+    sql, params = build_hospital_query('동물병원 진도', '전체', '전체')
+    assert [row['name'] for row in conn.execute(sql, params)] == ['진도동물병원']
+    sql, params = build_shelter_query('화성', '전체')
+    assert [row['name'] for row in conn.execute(sql, params)] == ['화성시 보호소']
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+
+import sessions
+from db import SQLitePool, USER_DB_PRAGMAS
+from sessions import SessionStore, token_key
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """같은 user_data.db 를 쓰는 워커 두 개"""
+    path = str(tmp_path / 'user_data.db')
+    log_path = path + '.sessions.log'
+    return (SessionStore(SQLitePool(path, USER_DB_PRAGMAS), log_path),
+            SessionStore(SQLitePool(path, USER_DB_PRAGMAS), log_path))
+
+
+def test_save_invalidates_only_that_session_in_other_workers(stores):
+    a, b = stores
+    first = a.save(None, {'user_id': 1}, existing=False)
+    second = a.save(None, {'user_id': 2}, existing=False)
+    assert b.load(first)[0] == {'user_id': 1}
+    assert b.load(second)[0] == {'user_id': 2}
+
+    a.save(first, {'user_id': 1, 'theme': 'dark'}, existing=True)
+    assert b.load(first)[0] == {'user_id': 1, 'theme': 'dark'}
+    # 다른 세션의 사본은 그대로 남아 있음
+    assert token_key(second) in b.cache._items
+    # 고친 워커는 자기가 쓴 줄 때문에 방금 저장한 사본을 버리지 않음
+    misses = a.cache.misses
+    assert a.load(first)[0]['theme'] == 'dark'
+    assert a.cache.misses == misses
+
+
+def test_delete_is_seen_by_other_workers(stores):
+    a, b = stores
+    token = a.save(None, {'user_id': 1}, existing=False)
+    assert b.load(token) is not None
+    a.delete(token)
+    assert b.load(token) is None
+    assert a.load(token) is None
+
+
+def test_revoked_clears_every_worker(stores):
+    a, b = stores
+    tokens = [a.save(None, {'user_id': i}, existing=False) for i in range(3)]
+    for token in tokens:
+        b.load(token)
+    conn = a.pool.acquire()
+    with conn:
+        a.revoke_user(conn, 1)
+    a.pool.release(conn)
+    a.revoked()
+    assert b.load(tokens[1]) is None
+    assert b.load(tokens[0]) is not None
+    assert len(b.cache) == 1  # 비운 뒤 다시 읽은 세션만
+
+
+def test_log_is_rotated_when_large(stores, monkeypatch):
+    a, b = stores
+    monkeypatch.setattr(sessions, 'SESSION_LOG_MAX_BYTES', 500)
+    token = a.save(None, {'user_id': 1}, existing=False)
+    for i in range(10):
+        a.save(token, {'user_id': 1, 'n': i}, existing=True)
+    assert os.path.getsize(a.log_path) < 500
+    assert b.load(token)[0]['n'] == 9
+
+
+def test_expired_looking_cache_entry_is_reloaded(stores):
+    a, b = stores
+    token = a.save(None, {'user_id': 1}, existing=False)
+    b.load(token)
+    # b 의 사본은 만료된 것처럼 보이지만 DB 에서는 a 가 touch 로 늦춰 둔 상태
+    b.cache.set(token_key(token), ({'user_id': 1}, int(time.time()) - 1, 0))
+    a.touch(token)
+    assert b.load(token)[0] == {'user_id': 1}
@@ -0,0 +1,167 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import thumbnails
+from thumbnails import ThumbnailCache, ThumbnailError, THUMB_SIZES
+
+
+class ImageServer:
+    """공공데이터 이미지 서버 대신 쓰는 로컬 HTTP 서버. 경로별 응답과 요청 횟수를 기록"""
+
+    def __init__(self):
+        self.images = {}   # 경로 -> (bytes, content-type)
+        self.requests = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                if self.path not in server.images:
+                    self.send_error(404)
+                    return
+                data, content_type = server.images[self.path]
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def add(self, path, data, content_type='image/jpeg'):
+        self.images[path] = (data, content_type)
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    srv = ImageServer()
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def fake_resize(monkeypatch):
+    """Pillow 없이도 돌도록 크기마다 다른 결과를 내는 가짜 변환"""
+    def resize(data, content_type, size):
+        return data + f"@{size[0]}x{size[1]}".encode('ascii'), 'image/jpeg'
+    monkeypatch.setattr(thumbnails, 'resize_image', resize)
+
+
+def object_count(cache):
+    return sum(1 for _ in cache._scan_objects())
+
+
+def test_miss_then_hit(tmp_path, server, fake_resize):
+    url = server.add('/a.jpg', b'photo-a')
+    cache = ThumbnailCache(str(tmp_path))
+    path, digest, content_type = cache.get(url, 'card')
+    assert (cache.hits, cache.misses) == (0, 1)
+    with open(path, 'rb') as f:
+        assert f.read() == b'photo-a@400x300'
+    # 원본은 한 번만 받고 모든 크기를 한꺼번에 만들어 둠
+    assert cache.get(url, 'modal')[2] == 'image/jpeg'
+    assert cache.get(url, 'card')[1] == digest
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert server.requests['/a.jpg'] == 1
+    # 다른 워커(새 인스턴스)도 디스크 캐시를 그대로 씀
+    other = ThumbnailCache(str(tmp_path))
+    assert other.lookup(url, 'card')[1] == digest
+    assert other.total_bytes == cache.total_bytes
+
+
+def test_same_image_at_two_urls_is_stored_once(tmp_path, server, fake_resize):
+    first = server.add('/a.jpg', b'same-photo')
+    second = server.add('/copy/a.jpg', b'same-photo')
+    cache = ThumbnailCache(str(tmp_path))
+    assert cache.get(first)[1] == cache.get(second)[1]
+    # 참조는 URL x 크기만큼, 이미지는 크기별로 하나씩
+    assert len(os.listdir(cache.refs_dir)) == 2 * len(THUMB_SIZES)
+    assert object_count(cache) == len(THUMB_SIZES)
+
+
+def test_eviction_removes_least_recently_used(tmp_path, server, fake_resize):
+    urls = [server.add(f'/{i}.jpg', bytes([65 + i]) * 1000) for i in range(3)]
+    per_url = sum(len(b'x' * 1000 + f"@{w}x{h}".encode('ascii')) for w, h in THUMB_SIZES.values())
+    cache = ThumbnailCache(str(tmp_path), max_bytes=int(per_url * 2.5))
+    cache.get(urls[0])
+    cache.get(urls[1])
+    # 첫 번째를 과거로 돌린 뒤 다시 조회하면 두 번째가 가장 오래 쓰지 않은 이미지가 됨
+    for path, _, _ in cache._scan_objects():
+        os.utime(path, (time.time() - 100, time.time() - 100))
+    cache.lookup(urls[0], 'card')
+    cache.lookup(urls[0], 'modal')
+    cache.get(urls[2])
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.lookup(urls[1], 'card') is None
+    assert cache.lookup(urls[0], 'card') is not None
+    assert cache.lookup(urls[2], 'card') is not None
+    # 지워진 이미지는 다음 요청 때 다시 받아옴
+    cache.get(urls[1])
+    assert server.requests['/1.jpg'] == 2
+
+
+def test_prewarm_fetches_each_url_once(tmp_path, server, fake_resize):
+    urls = [server.add(f'/p{i}.jpg', f'photo-{i}'.encode('ascii')) for i in range(6)]
+    missing = server.add('/missing.jpg', b'')
+    del server.images['/missing.jpg']
+    cache = ThumbnailCache(str(tmp_path))
+    created, failed = cache.prewarm(urls + urls[:2] + [missing, None], workers=4)
+    assert (created, failed) == (6, 1)
+    assert all(server.requests[f'/p{i}.jpg'] == 1 for i in range(6))
+    # 이미 있는 것은 다시 받지 않음
+    assert cache.prewarm(urls, workers=4) == (0, 0)
+    assert all(server.requests[f'/p{i}.jpg'] == 1 for i in range(6))
+
+
+def test_non_image_response_is_rejected(tmp_path, server, fake_resize):
+    url = server.add('/page.html', b'<html></html>', 'text/html')
+    with pytest.raises(ThumbnailError):
+        ThumbnailCache(str(tmp_path)).get(url)
+
+
+def test_without_pillow_nothing_is_cached(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(thumbnails, 'Image', None)
+    url = server.add('/a.jpg', b'photo-a')
+    cache = ThumbnailCache(str(tmp_path))
+    with pytest.raises(ThumbnailError):
+        cache.get(url)
+    assert object_count(cache) == 0
+    assert thumbnails.prewarm_db(cache=cache) == (0, 0)
+
+
+def test_resize_with_pillow(tmp_path, server):
+    Image = pytest.importorskip('PIL.Image')
+    out = io.BytesIO()
+    Image.new('RGB', (1600, 1200), 'orange').save(out, 'PNG')
+    url = server.add('/big.png', out.getvalue(), 'image/png')
+    path, _, content_type = ThumbnailCache(str(tmp_path)).get(url, 'card')
+    assert content_type == 'image/jpeg'
+    with Image.open(path) as img:
+        assert img.size == (400, 300)
+
+
+def test_img_route_redirects_to_original_without_cache(app_module, client, monkeypatch):
+    conn = sqlite3.connect(os.environ['PETMATCH_ANIMAL_DB'])
+    with conn:
+        conn.execute("UPDATE animal_status SET image_url = 'http://img.example/1.jpg' WHERE animal_id = 1")
+    conn.close()
+    monkeypatch.setattr(app_module, 'thumbnail_cache', None)
+    resp = client.get('/img/1')
+    assert resp.status_code == 302
+    assert resp.headers['Location'] == 'http://img.example/1.jpg'